@@ -0,0 +1,43 @@
+import asyncio
+import pathlib
+import sys
+import gedge
+
+# we specify the path to the directory that holds all locally pulled models
+# this allows us to use these models
+here = pathlib.Path(__file__).parents[2] / "models"
+gedge.use_models(str(here))
+
+config = gedge.NodeConfig("gedge/examples/methods/async_caller")
+
+if len(sys.argv) > 1:
+    ip_address = sys.argv[1]
+else:
+    ip_address = "localhost"
+
+bar_model = {
+    "foo/bar/baz": 23.45,
+    "baz": False,
+    "qux": 123
+}
+
+async def call(remote, param1: int) -> gedge.Response:
+    # remote.aio.call_method(...) is an async generator, it yields every response
+    # of the method as it arrives (0 to inf INFO followed by 1 OK or 1 ERR)
+    # no thread is blocked while we wait on the responses
+    last = None
+    async for r in remote.aio.call_method("my/method/path", param1=param1, param2=bar_model):
+        last = r
+    assert last is not None
+    return last
+
+async def main(session: gedge.NodeSession):
+    remote = session.connect_to_remote("gedge/examples/methods/callee")
+
+    # because nothing blocks, we can have many method calls in flight at once
+    responses = await asyncio.gather(*[call(remote, i % 5) for i in range(100)])
+    for r in responses:
+        print(r.code, r.type, r.body)
+
+with gedge.connect(config, ip_address) as session:
+    asyncio.run(main(session))
@@ -0,0 +1,97 @@
+import sys
+import tempfile
+import time
+import pathlib
+
+import gedge
+from gedge.py_proto.base_type import BaseType
+from gedge.py_proto.codec import codec
+from gedge.py_proto.data_model_config import DataItemConfig
+from gedge.py_proto.type import Type
+
+# Measures the cost of encoding (value -> proto.DataItem) and decoding (proto.DataItem -> value)
+# one tag value with its compiled codec, for every base type and for models nested 1 to MAX_DEPTH deep.
+# "compile" is the one time cost of building the codec, paid on the first value of a tag.
+# Nothing is sent over the network, so no zenoh router is needed.
+# Usage: python ./scripts/bench_codec.py [iterations]
+
+MAX_DEPTH = 4
+# base type items on every level of the benchmark models
+ITEMS_PER_MODEL = 4
+TYPES = [t for t in BaseType if t != BaseType.UNKNOWN]
+
+def sample_value(type: BaseType):
+    match type:
+        case BaseType.INT | BaseType.LONG:
+            return 7919
+        case BaseType.FLOAT:
+            return 1.5
+        case BaseType.STRING:
+            return "value"
+        case BaseType.BOOL:
+            return True
+        case BaseType.LIST_INT | BaseType.LIST_LONG:
+            return [i * 7919 for i in range(100)]
+        case BaseType.LIST_FLOAT:
+            return [i * 1.5 for i in range(100)]
+        case BaseType.LIST_STRING:
+            return [f"value-{i}" for i in range(100)]
+        case BaseType.LIST_BOOL:
+            return [i % 2 == 0 for i in range(100)]
+    raise ValueError(f"no sample value for {type}")
+
+def write_models(model_dir: pathlib.Path):
+    # level/d has ITEMS_PER_MODEL float tags and, below the deepest level, one tag of model level/(d + 1)
+    for depth in range(1, MAX_DEPTH + 1):
+        tags = [f'{{ path: "f{i}", base_type: "float" }}' for i in range(ITEMS_PER_MODEL)]
+        if depth < MAX_DEPTH:
+            tags.append(f'{{ path: "next", model_path: "level/{depth + 1}/VERSION/1" }}')
+        path = model_dir / "level" / str(depth)
+        path.mkdir(parents=True)
+        (path / "v1.json5").write_text(f'{{ path: "level/{depth}", version: 1, tags: [{", ".join(tags)}] }}')
+
+def model_value(depth: int, max_depth: int) -> dict:
+    value: dict = {f"f{i}": i * 1.5 for i in range(ITEMS_PER_MODEL)}
+    if depth < max_depth:
+        value["next"] = model_value(depth + 1, max_depth)
+    return value
+
+def bench(config: DataItemConfig, value, iterations: int) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    c = codec(config)
+    compile = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        c.encode(value)
+    encode = (time.perf_counter() - start) / iterations
+
+    data = c.encode(value)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        c.decode(data)
+    decode = (time.perf_counter() - start) / iterations
+    return compile, encode, decode
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{'type':<12} {'compile us':>10} {'encode us':>10} {'decode us':>10}")
+    for type in TYPES:
+        config = DataItemConfig("tag", Type(type), [])
+        compile, encode, decode = bench(config, sample_value(type), iterations)
+        print(f"{type.name:<12} {compile * 1e6:>10.2f} {encode * 1e6:>10.2f} {decode * 1e6:>10.2f}")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        write_models(pathlib.Path(model_dir))
+        gedge.use_models(model_dir)
+        print()
+        print(f"{'model depth':<12} {'compile us':>10} {'encode us':>10} {'decode us':>10}")
+        for depth in range(1, MAX_DEPTH + 1):
+            # a tag of level/(MAX_DEPTH - depth + 1) holds depth levels of models
+            start = MAX_DEPTH - depth + 1
+            config = DataItemConfig("tag", Type.from_model_ref(f"level/{start}/VERSION/1"), [])
+            compile, encode, decode = bench(config, model_value(start, MAX_DEPTH), iterations)
+            print(f"{depth:<12} {compile * 1e6:>10.2f} {encode * 1e6:>10.2f} {decode * 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    main()
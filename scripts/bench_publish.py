@@ -0,0 +1,59 @@
+import sys
+import time
+
+import gedge
+from gedge.comm.comm import Comm
+from gedge.node.tag_publishers import TagPublishers
+from gedge.py_proto.base_data import BaseData
+from gedge.py_proto.base_type import BaseType
+from gedge.py_proto.type import Type
+
+# Measures the cost of publishing one tag update on a node with 1, 100 and 10,000 distinct tags:
+# "put" joins the key expression of the tag and calls session.put with it (how updates used to be sent),
+# "publisher" looks up the tag's declared publisher by path and puts through it (how NodeSession sends them now).
+# "declare" is the one time cost of declaring the publisher of a tag, paid on its first update.
+# The session is a zenoh peer that is not connected to anything, so no zenoh router is needed.
+# Usage: python ./scripts/bench_publish.py [updates]
+
+TAG_COUNTS = [1, 100, 10000]
+
+def bench(comm: Comm, tags: int, updates: int) -> tuple[float, float, float]:
+    config = gedge.NodeConfig(f"bench/tags{tags}")
+    paths = [f"tag/{i}" for i in range(tags)]
+    for path in paths:
+        config.add_tag(path, Type(BaseType.INT))
+    ks = config.ks
+    wire_format = config.wire_format
+    value = BaseData.from_value(7919, BaseType.INT).to_proto()
+    # the same sequence of paths for both, cycling through every tag
+    order = [paths[i % tags] for i in range(updates)]
+
+    start = time.perf_counter()
+    for path in order:
+        comm._send_proto(ks.tag_data_path(path), value, wire_format)
+    put = (time.perf_counter() - start) / updates
+
+    publishers = TagPublishers(comm, ks)
+    start = time.perf_counter()
+    for path in paths:
+        publishers.tag(path)
+    declare = (time.perf_counter() - start) / tags
+
+    start = time.perf_counter()
+    for path in order:
+        publisher, key_expr = publishers.tag(path)
+        comm.publish(publisher, key_expr, value, wire_format)
+    publish = (time.perf_counter() - start) / updates
+    return put, declare, publish
+
+def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    options = gedge.CommOptions(mode=gedge.SessionMode.PEER, zenoh_config={"scouting/multicast/enabled": False})
+    with Comm([], options=options) as comm:
+        print(f"{'tags':<8} {'put us':>10} {'declare us':>11} {'publisher us':>13}")
+        for tags in TAG_COUNTS:
+            put, declare, publish = bench(comm, tags, updates)
+            print(f"{tags:<8} {put * 1e6:>10.2f} {declare * 1e6:>11.2f} {publish * 1e6:>13.2f}")
+
+if __name__ == "__main__":
+    main()
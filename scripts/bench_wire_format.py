@@ -0,0 +1,59 @@
+import sys
+import time
+
+from gedge import proto
+from gedge.comm.comm import Comm
+from gedge.comm.wire_format import WireFormat
+from gedge.py_proto.base_data import BaseData
+from gedge.py_proto.base_type import BaseType
+
+# Compares bytes-on-wire and CPU per message for every wire format.
+# Nothing is sent over the network, this only measures what Comm does
+# on either end of a put (serialize on the publisher, deserialize on the subscriber)
+# Usage: python ./scripts/bench_wire_format.py [iterations]
+
+SIZES = [1, 10, 100, 1000, 10000]
+TYPES = [BaseType.LIST_FLOAT, BaseType.LIST_INT, BaseType.LIST_STRING]
+
+def sample_value(type: BaseType, size: int):
+    match type:
+        case BaseType.LIST_FLOAT:
+            return [i * 1.5 for i in range(size)]
+        case BaseType.LIST_INT:
+            return [i * 7919 for i in range(size)]
+        case BaseType.LIST_STRING:
+            return [f"value-{i}" for i in range(size)]
+    raise ValueError(f"no sample value for {type}")
+
+def bench(comm: Comm, type: BaseType, size: int, wire_format: WireFormat, iterations: int) -> tuple[int, float, float]:
+    data = BaseData.from_value(sample_value(type, size), type).to_proto()
+    payload = comm.serialize(data, wire_format)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        comm.serialize(data, wire_format)
+    encode = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        comm.deserialize(proto.BaseData(), payload, wire_format)
+    decode = (time.perf_counter() - start) / iterations
+    return len(payload), encode, decode
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    # Comm does not open a session until it is connected, so no router is needed
+    comm = Comm([])
+    print(f"{'type':<12} {'size':>6} {'format':<7} {'bytes':>9} {'encode us':>10} {'decode us':>10}")
+    for type in TYPES:
+        for size in SIZES:
+            results = {}
+            for wire_format in WireFormat:
+                results[wire_format] = bench(comm, type, size, wire_format, iterations)
+                n, encode, decode = results[wire_format]
+                print(f"{type.name:<12} {size:>6} {wire_format.value:<7} {n:>9} {encode * 1e6:>10.2f} {decode * 1e6:>10.2f}")
+            raw, b64 = results[WireFormat.RAW][0], results[WireFormat.BASE64][0]
+            print(f"{'':<12} {'':>6} {'saved':<7} {b64 - raw:>9} ({(b64 - raw) / b64:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 import pathlib
-from gedge.node.codes import OK, ERR, CALLBACK_ERR
+from gedge.node.codes import OK, ERR, CALLBACK_ERR, TIMEOUT
 from gedge.node.gtypes import TagGroupValue, TagBaseValue
 from gedge.node.method_response import ResponseConfig, ResponseType
-from gedge.node.query import MethodQuery, TagWriteQuery
+from gedge.node.query import GroupWriteQuery, MethodQuery, TagWriteQuery
 from gedge.node.reply import Response
 from gedge.py_proto.singleton import Singleton
+from gedge.py_proto.model_registry import ModelRegistry, RegistryStats, model_registry
+from gedge.py_proto.model_store import ModelStore, model_store
+from gedge.py_proto.ndarray import use_numpy
 from gedge.py_proto.state import State
 from gedge.py_proto.meta import Meta
+from .comm.dispatch import Dispatcher, DispatchMode, Backpressure, DispatchStats
+from .comm.tag_router import TagSubscription
+from .comm.sequence_number import SequenceFormat, SequenceStats
+from .comm.options import CommOptions, SessionMode, Traffic
 from .comm.mock_comm import MockComm
 from .node.node import NodeConfig, NodeSession
 from .node.test_node import TestNodeSession
@@ -21,7 +28,7 @@ except:
     logging.basicConfig(level="NOTSET")
 
 ZENOH_PORT = 7447
-def connect(config: NodeConfig, *connections: str) -> NodeSession:
+def connect(config: NodeConfig, *connections: str, telemetry_dispatcher: Dispatcher | None = None, handler_dispatcher: Dispatcher | None = None, options: CommOptions | None = None) -> NodeSession:
     conns = list(connections)
     if len(conns) == 0:
         raise ValueError("Must provide at least one connection point to gedge.connect(config, connections)")
@@ -31,13 +38,21 @@ def connect(config: NodeConfig, *connections: str) -> NodeSession:
         if not (conns[i].startswith("tcp/") and conns[i].endswith(f":{ZENOH_PORT}")):
             conns[i] = f"tcp/{conns[i]}:{ZENOH_PORT}"
 
-    return config._connect(conns)
+    return config._connect(conns, telemetry_dispatcher, handler_dispatcher, options)
 
 def mock_connect(config: NodeConfig) -> TestNodeSession:
     session = TestNodeSession(config, MockComm())
     return session
 
-def use_models(model_dir: str):
+def use_models(model_dir: str, max_models: int | None = None):
     if not pathlib.Path(model_dir).exists():
         raise ValueError(f"model directory {model_dir} does not exist")
-    Singleton().set_model_dir(model_dir)
\ No newline at end of file
+    if Singleton().get_model_dir() != model_dir:
+        # models loaded from another directory may not match the ones in this one
+        model_registry().clear()
+    Singleton().set_model_dir(model_dir)
+    model_registry().max_size = max_models
+    # only models whose json5 changed since the last run are parsed again
+    if model_store(model_dir).refresh():
+        # a registered model may have been edited, or a newer version added
+        model_registry().clear()
\ No newline at end of file
@@ -5,6 +5,7 @@ import gedge
 
 from gedge.comm.comm import Comm
 from gedge.py_proto.data_model_config import DataModelConfig
+from gedge.py_proto.model_store import model_store
 from gedge.py_proto.singleton import Singleton
 
 import logging
@@ -69,6 +70,18 @@ def _pull(path: str, version: int | None, ip_address: str, model_dir: str):
     if not config.to_file(model_dir):
         raise LookupError("Could not convert config to file")
     logger.info(f"Model written to file {str(pathlib.Path(model_dir) / path)}")
+    model_store(model_dir).refresh()
+
+def compile(args):
+    model_dir = args.model_dir
+    if not model_dir:
+        raise LookupError("Argument '--model-dir' required for 'gedge compile' command")
+    if not pathlib.Path(model_dir).is_dir():
+        raise LookupError(f"Model directory {model_dir} does not exist")
+    if model_store(model_dir).refresh():
+        print(f"Compiled models in {model_dir}")
+    else:
+        print(f"Compiled models in {model_dir} are up to date")
 
 def main():
     parser = argparse.ArgumentParser(prog="gedge", description="Handle models in golden-edge", epilog="Try 'gedge --help' for more info")
@@ -94,5 +107,8 @@ def main():
     push_pull_parser.add_argument("path", type=str, help="path to json5 file describing model")
     push_pull_parser.set_defaults(func=push_pull)
 
+    compile_parser = subparsers.add_parser("compile", help="Compiles the models in the directory specified by --model-dir so that nodes using them start faster. Pulling models and gedge.use_models(...) do this automatically")
+    compile_parser.set_defaults(func=compile)
+
     args = parser.parse_args()
     args.func(args)
@@ -1,51 +1,91 @@
 from __future__ import annotations
 
-import base64
+import asyncio
+from dataclasses import dataclass
+import inspect
+import threading
+import time
 import uuid
 import zenoh
-import json
-from gedge.comm.sequence_number import SequenceNumber
+from gedge.comm.dispatch import Dispatcher, DispatchMode, DispatchStats
+from gedge.comm.meta_cache import MetaCache
+from gedge.comm.options import CommOptions
+from gedge.comm.sequence_number import SequenceNumbers, SequenceStats, SequenceTracker, decode as decode_sequence
+from gedge.comm.subscriptions import Subscription, SubscriptionRegistry
+from gedge.comm.tag_router import TagDataRouter
+from gedge.comm.wire_format import WireFormat
 from gedge.node import codes
-from gedge.node.error import NodeLookupError, QueryEnd, TagLookupError
+from gedge.node.error import NodeLookupError, QueryEnd, SessionError, TagLookupError
 from gedge import proto
 from gedge.comm import keys
-from gedge.comm.keys import NodeKeySpace, group_path_from_key, internal_to_user_key, key_join, method_response_from_call, tag_path_from_key
+from gedge.comm.keys import NodeKeySpace, group_path_from_key, internal_to_user_key, key_join, method_response_from_call
 
 from typing import Any, TYPE_CHECKING, Callable
 
 from gedge.node.reply import Response
 from gedge.py_proto.base_data import BaseData
+from gedge.py_proto.base_type import BaseType
 from gedge.py_proto.conversions import props_to_json5
 from gedge.py_proto.data_model_config import DataItemConfig, DataModelConfig
-from gedge.node.query import MethodQuery, TagWriteQuery
+from gedge.node.query import GroupWriteQuery, MethodQuery, TagWriteQuery
 from gedge.py_proto.data_model_ref import DataModelRef
 from gedge.py_proto.state import State
 from gedge.py_proto.tag_config import Tag, TagConfig 
 if TYPE_CHECKING:
     from gedge.node.gtypes import LivelinessCallback, MetaCallback, MethodReplyCallback, StateCallback, TagDataCallback, TagValue, ZenohCallback, ZenohQueryCallback, ProtoMessage, TagBaseValue, TagGroupDataCallback
     from gedge.node.method import MethodConfig
+    from gedge.node.method_response import ResponseConfig
     from gedge.py_proto.meta import Meta
 
 import logging
 logger = logging.getLogger(__name__)
 
+# a call that never gets its final response (callee died, caller stopped iterating) is forgotten after this long
+ORPHANED_CALL_TIMEOUT = 10 * 60
+
+@dataclass
+class PendingMethodCall:
+    user_key: str
+    method: MethodConfig
+    on_reply: MethodReplyCallback
+    wire_format: WireFormat
+    key_expr: str # the key expression the call was sent on
+    deadline: float # time.monotonic() after which the call is dropped
+
 # handle Zenoh communications
 # The user will not interact with this item
 # TODO: should this hold a key_space? and allow for a context manager when we want to change it
 class Comm:
-    def __init__(self, connections: list[str]):
-        config = json.dumps({
-            "mode": "client",
-            "connect": {
-                "endpoints": connections,
-                "timeout_ms": 3 * 1000,
-                "exit_on_failure": True
-            }
-        })
-        self.config = config
+    def __init__(self, connections: list[str], telemetry_dispatcher: Dispatcher | None = None, handler_dispatcher: Dispatcher | None = None, options: CommOptions | None = None):
+        self.options = options or CommOptions()
         self.connections = connections
-        self.subscriptions: list[zenoh.Subscriber] = []
-        self.sequence_number = SequenceNumber()
+        self.subscriptions = SubscriptionRegistry()
+        self._subscriptions_lock = self.subscriptions.lock
+        # every tag and group data put carries its sequence number on its key expression, which subscribers follow to count lost samples
+        self.sequence_numbers = SequenceNumbers(self.options.sequence_format)
+        self.sequence_tracker = SequenceTracker(self.options.drop_stale)
+        # tag and group data is published through one declared publisher per key expression, see publisher(...)
+        self.publishers: dict[str, zenoh.Publisher] = dict()
+        self._publishers_lock = threading.Lock()
+        self.wire_formats: dict[str, WireFormat] = dict() # user_key -> WireFormat
+        self.group_decoders: dict[str, dict[str, BaseType]] = dict() # group data key_expr -> member path -> BaseType
+        self.tag_routers: dict[str, TagDataRouter] = dict() # tag data key prefix -> router of that (sub)node
+
+        # responses to all of our method calls on a remote arrive on one wildcard subscriber and
+        # are routed to the pending call by the method_query_id in their key
+        self.response_subscribers: dict[tuple[str, str], Subscription] = dict() # (method key prefix, caller_id) -> subscriber
+        self.pending_calls: dict[str, PendingMethodCall] = dict() # method_query_id -> call
+        self._pending_calls_lock = threading.Lock()
+        # wakes the daemon thread that drops calls once their deadline passes, see _watch_pending_calls
+        self._pending_calls_cond = threading.Condition(self._pending_calls_lock)
+        self._pending_calls_watcher: threading.Thread | None = None
+        self._pending_calls_closed = False
+        self.meta_cache = MetaCache(self)
+
+        # telemetry (tag data, groups, state, meta, liveliness) and handlers (tag writes, method calls) are 
+        # dispatched separately so that slow handlers cannot starve telemetry
+        self.telemetry_dispatcher = telemetry_dispatcher or Dispatcher(DispatchMode.INLINE, name="gedge-telemetry")
+        self.handler_dispatcher = handler_dispatcher or Dispatcher(DispatchMode.INLINE, name="gedge-handlers")
     
     def connect(self):
         '''
@@ -61,14 +101,54 @@ class Comm:
 
     def __enter__(self):
         logger.debug(f"Attemping to connect to: {self.connections}")
-        config = zenoh.Config.from_json5(self.config)
+        config = self.options.to_zenoh_config(self.connections)
         session = zenoh.open(config)
         logger.info(f"Connected to one of: {self.connections}")
         self.session = session
         return self
     
     def __exit__(self, *exc):
+        self.publishers.clear()
         self.session.close()
+        self._close_pending_calls()
+        self.telemetry_dispatcher.close()
+        self.handler_dispatcher.close()
+
+    def dispatch_stats(self) -> dict[str, DispatchStats]:
+        '''
+        Returns a snapshot of the callback dispatchers (queue depths, drops, errors)
+
+        Arguments:
+            None
+
+        Returns:
+            dict[str, DispatchStats]: "telemetry" and "handlers" -> their stats
+        '''
+        return {"telemetry": self.telemetry_dispatcher.stats(), "handlers": self.handler_dispatcher.stats()}
+
+    def sequence_stats(self, key_expr: str | None = None) -> SequenceStats:
+        '''
+        Returns the lost, duplicate and reordered samples seen by the live tag data and group subscribers
+
+        Arguments:
+            key_expr (str | None): Only count the samples on this key expression
+
+        Returns:
+            SequenceStats
+        '''
+        return self.sequence_tracker.stats(key_expr)
+
+    def subscription_counts(self) -> dict[str, int]:
+        '''
+        Returns the number of live subscribers on every node (remote or this one) that has any
+
+        Arguments:
+            None
+
+        Returns:
+            dict[str, int]: user key of the node -> its number of subscribers
+        '''
+        return self.subscriptions.counts()
     
     def close_remote(self, ks: NodeKeySpace):
         '''
@@ -84,19 +164,54 @@ class Comm:
         logger.info(f"Closing remote connection to {ks.user_key}")
         # TODO: will this be affected by one node having multiple instance connections to
         # the same remote? do we even allow that?
-        subscriptions = [s for s in self.subscriptions if ks.contains(str(s.key_expr))]
-        logger.debug(f"Undeclaring {len(subscriptions)} remote subscriptions")
-        for s in subscriptions:
-            s.undeclare()
+        with self._subscriptions_lock:
+            n = self.subscriptions.undeclare_owner(ks.user_key)
+            logger.debug(f"Undeclared {n} remote subscriptions")
+            # a subnode shares the user key of its node, but not its method key prefix
+            for key in [key for key in self.response_subscribers if ks.contains(key[0])]:
+                del self.response_subscribers[key]
+            for prefix in [prefix for prefix, router in self.tag_routers.items() if ks.contains(router.key_expr)]:
+                self.tag_routers.pop(prefix).close()
+        self.meta_cache.remove_listeners(ks)
+        with self._pending_calls_lock:
+            for method_query_id in [i for i, call in self.pending_calls.items() if call.user_key == ks.user_key]:
+                del self.pending_calls[method_query_id]
+
+    def set_wire_format(self, ks: NodeKeySpace, wire_format: WireFormat):
+        '''
+        Records the wire format that the node at the passed key space speaks. Subnodes share the format of their root node.
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+            wire_format (WireFormat): The format advertised by that node
+
+        Returns:
+            None
+        '''
+        logger.debug(f"Node {ks.user_key} speaks wire format {wire_format.value}")
+        self.wire_formats[ks.user_key] = wire_format
+
+    def wire_format(self, ks: NodeKeySpace) -> WireFormat:
+        '''
+        Returns the wire format of the node at the passed key space, defaulting to base64 for nodes we know nothing about
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
 
-    def serialize(self, proto: ProtoMessage) -> bytes:
+        Returns:
+            WireFormat
         '''
-        Converts the passed ProtoMessage to a base 64 encoded bytes object
+        return self.wire_formats.get(ks.user_key, WireFormat.BASE64)
+
+    def serialize(self, proto: ProtoMessage, wire_format: WireFormat = WireFormat.BASE64) -> bytes:
+        '''
+        Converts the passed ProtoMessage to a bytes object laid out according to the passed wire format
         
         Note: In this instance "ProtoMessage" means proto.Meta | proto.TagData | proto.WriteResponseData | proto.State | proto.MethodQueryData | proto.ResponseData | proto.WriteResponseData
 
         Arguments:
             proto (ProtoMessage): The ProtoMessage being converted to bytes
+            wire_format (WireFormat): base64 (the default, needed by the historian) or raw
 
         Returns:
             bytes: The ProtoMessage converted to bytes
@@ -107,41 +222,100 @@ class Comm:
         # which we should try to address in a better way than this
         # Base64 adds about 25% to the payload size (y = 4/3 * x, where x is the original payload and y is the new payload)
         # Example: 5 bytes encoded as base64 will become 8 bytes
-        b = base64.b64encode(b)
-        logger.debug(f"Size of serialized protobuf base64 encoded {len(b)}")
+        # Nodes that do not need the historian to read their traffic can opt into WireFormat.RAW
+        b = wire_format.encode(b)
+        logger.debug(f"Size of serialized protobuf {wire_format.value} encoded {len(b)}")
         return b
     
-    def deserialize(self, proto: ProtoMessage, payload: bytes) -> Any:
+    def deserialize(self, proto: ProtoMessage, payload: bytes, wire_format: WireFormat = WireFormat.BASE64) -> Any:
         '''
         Converts the passed payload to a ProtoMessage
 
         Arguments:
             proto (ProtoMessage): The ProtoMessage that will be returned by the function as a ProtoMessage
             payload(bytes): The bytes object that will be converted to the ProtoMessage object
+            wire_format (WireFormat): The format the payload was encoded with
 
         Returns:
             Any: The payload converted to a ProtoMessage
         '''
-        b = base64.b64decode(payload)
+        b = wire_format.decode(payload)
         proto.ParseFromString(b)
         return proto
 
-    def _send_proto(self, key_expr: str, value: ProtoMessage):
+    def _send_proto(self, key_expr: str, value: ProtoMessage, wire_format: WireFormat = WireFormat.BASE64):
         '''
         Sends the passed ProtoMessage to the passed node
 
         Arguments:
             key_expr (str): The key expression of a node
             value (ProtoMessage): The value being passed to the node
+            wire_format (WireFormat): The format the value is encoded with
 
         Returns:
             None
         '''
-        logger.debug(f"putting proto on key_expr '{key_expr}' with value {value}")
-        b = self.serialize(value)
-        self.session.put(key_expr, b, encoding="application/protobuf", attachment=bytes(self.sequence_number))
-        self.sequence_number.increment()
-    
+        if logger.isEnabledFor(logging.DEBUG):
+            # formatting a proto is not free, even when the message is never logged
+            logger.debug(f"putting proto on key_expr '{key_expr}' with value {value}")
+        b = self.serialize(value, wire_format)
+        # no sequence number: only tag and group data is sequenced, and method calls and replies put on a new key every call
+        self.session.put(key_expr, b, encoding=wire_format.encoding, **self.options.control.kwargs())
+
+    def publisher(self, key_expr: str) -> zenoh.Publisher:
+        '''
+        Returns the publisher of the tag or group data on key_expr, declaring it with the telemetry quality of service the first time
+
+        Arguments:
+            key_expr (str): The key expression of the tag or group data
+
+        Returns:
+            zenoh.Publisher
+        '''
+        publisher = self.publishers.get(key_expr)
+        if publisher is None:
+            with self._publishers_lock:
+                publisher = self.publishers.get(key_expr)
+                if publisher is None:
+                    publisher = self.session.declare_publisher(key_expr, **self.options.telemetry.kwargs())
+                    self.publishers[key_expr] = publisher
+        return publisher
+
+    def publish(self, publisher: zenoh.Publisher, key_expr: str, value: ProtoMessage, wire_format: WireFormat = WireFormat.BASE64):
+        '''
+        Sends tag or group data through its declared publisher
+
+        Arguments:
+            publisher (zenoh.Publisher): The publisher of key_expr
+            key_expr (str): The key expression of the tag or group data
+            value (ProtoMessage): The value being published
+            wire_format (WireFormat): The format the value is encoded with
+
+        Returns:
+            None
+        '''
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"publishing proto on key_expr '{key_expr}' with value {value}")
+        b = self.serialize(value, wire_format)
+        publisher.put(b, encoding=wire_format.encoding, attachment=self.sequence_numbers.next(key_expr))
+
+    def publish_many(self, values: list[tuple[zenoh.Publisher, str, ProtoMessage]], wire_format: WireFormat = WireFormat.BASE64):
+        '''
+        Publishes several values of tag or group data as one burst. Everything is serialized before the 
+        first put goes out, so the puts are issued back to back and zenoh can batch them onto the wire
+
+        Arguments:
+            values (list[tuple[zenoh.Publisher, str, ProtoMessage]]): (publisher, key expression, value), sent in order
+            wire_format (WireFormat): The format the values are encoded with
+
+        Returns:
+            None
+        '''
+        logger.debug(f"publishing {len(values)} protos in one burst")
+        payloads = [(publisher, key_expr, self.serialize(value, wire_format)) for publisher, key_expr, value in values]
+        for publisher, key_expr, b in payloads:
+            publisher.put(b, encoding=wire_format.encoding, attachment=self.sequence_numbers.next(key_expr))
+
     def liveliness_token(self, ks: NodeKeySpace) -> zenoh.LivelinessToken:
         '''
         Returns a liveliness token representing the liveliness (online state) of the passed node
@@ -155,46 +329,58 @@ class Comm:
         key_expr = ks.liveliness_key_prefix
         return self.session.liveliness().declare_token(key_expr)
 
-    def _on_liveliness(self, on_liveliness_change: LivelinessCallback) -> ZenohCallback:
+    def _on_liveliness(self, ks: NodeKeySpace, on_liveliness_change: LivelinessCallback) -> ZenohCallback:
+        user_key = ks.user_key
         def _on_liveliness(sample: zenoh.Sample):
+            key_expr = str(sample.key_expr)
             is_online = sample.kind == zenoh.SampleKind.PUT
             online = "online" if is_online else "offline"
-            
-            ks = NodeKeySpace.from_internal_key(str(sample.key_expr))
-            logger.info(f"Liveliness of remote node {ks.user_key} changed: {online}")
-            on_liveliness_change(str(sample.key_expr), is_online)
+            logger.info(f"Liveliness of remote node {user_key} changed: {online}")
+            self.telemetry_dispatcher.submit(key_expr, on_liveliness_change, key_expr, is_online)
         return _on_liveliness
 
     # Tag Data is always of type BaseData
-    def _on_tag_data(self, on_tag_data: TagDataCallback, tag_config: TagConfig) -> ZenohCallback:
+    def _on_tag_data(self, on_tag_data: TagDataCallback, ks: NodeKeySpace, path: str, tag_config: TagConfig, wire_format: WireFormat = WireFormat.BASE64) -> ZenohCallback:
+        # the subscription is on exactly one tag, so nothing is parsed out of the key expression of a sample
+        user_key = ks.user_key
+        sequence = self.sequence_tracker.stream()
         def _on_tag_data(sample: zenoh.Sample):
-            data: proto.BaseData = self.deserialize(proto.BaseData(), sample.payload.to_bytes())
-            logger.debug(f"Sample received on key expression {str(sample.key_expr)}, value = {data}, sequence_number = {sample.attachment.to_string() if sample.attachment else 0}")
-            path: str = tag_path_from_key(str(sample.key_expr))
-            try:
-                config = tag_config.get_config(path)
-            except:
-                node: str = NodeKeySpace.name_from_key(str(sample.key_expr))
-                raise TagLookupError(path, node)
-            base_type = config.type.get_base_type()
+            key_expr = str(sample.key_expr)
+            if not sequence.accept(key_expr, sample.attachment):
+                return
+            data: proto.BaseData = self.deserialize(proto.BaseData(), sample.payload.to_bytes(), wire_format)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Sample received on key expression {key_expr}, value = {data}, sequence_number = {decode_sequence(sample.attachment)}")
+            entry = tag_config.lookup(path)
+            if entry is None:
+                raise TagLookupError(path, ks.name)
+            base_type = entry.base_type
             if base_type is None:
-                raise ValueError(f"cannot write to model object {config.path}")
+                raise ValueError(f"cannot write to model object {path}")
             value = BaseData.proto_to_py(data, base_type)
-            logger.debug(f"Remote node {internal_to_user_key(str(sample.key_expr))} received value {value} for tag {path}")
-            on_tag_data(str(sample.key_expr), value)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Remote node {user_key} received value {value} for tag {path}")
+            self.telemetry_dispatcher.submit(key_expr, on_tag_data, key_expr, value)
         return _on_tag_data
     
-    def _on_group_data_feed_to_tag_data_subscriber(self, on_tag_data: TagDataCallback, tag_config: TagConfig, path: str) -> ZenohCallback:
+    def _on_group_data_feed_to_tag_data_subscriber(self, on_tag_data: TagDataCallback, group_key_expr: str, path: str, wire_format: WireFormat = WireFormat.BASE64) -> ZenohCallback:
+        sequence = self.sequence_tracker.stream()
         def _func(sample: zenoh.Sample):
-            data: proto.TagGroup = self.deserialize(proto.TagGroup(), sample.payload.to_bytes())
-            group_path: str = group_path_from_key(str(sample.key_expr))
-            configs = tag_config.get_group_member_configs(group_path)
-            base_type = configs[path].get_base_type()
-            if not base_type:
-                raise ValueError(f"cannot subscribe to model data at path {path}")
+            if not sequence.accept(group_key_expr, sample.attachment):
+                return
+            data: proto.TagGroup = self.deserialize(proto.TagGroup(), sample.payload.to_bytes(), wire_format)
+            # a group frame only carries the members that were updated
+            if path not in data.data:
+                return
+            base_type = self.group_decoders[group_key_expr].get(path)
+            if base_type is None:
+                logger.warning(f"Tag {path} is no longer part of group {group_path_from_key(group_key_expr)}")
+                return
+            key_expr = str(sample.key_expr)
             value = BaseData.proto_to_py(data.data[path], base_type)
-            logger.debug(f"Remote node {internal_to_user_key(str(sample.key_expr))} received value {value} for tag {path}")
-            on_tag_data(str(sample.key_expr), value)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Remote node {internal_to_user_key(key_expr)} received value {value} for tag {path}")
+            self.telemetry_dispatcher.submit(key_expr, on_tag_data, key_expr, value)
         return _func
     
     '''
@@ -208,44 +394,134 @@ class Comm:
         }
     })
     '''
-    def _on_group_data(self, on_group_data: TagGroupDataCallback, tag_config: TagConfig) -> ZenohCallback:
+    def _on_group_data(self, on_group_data: TagGroupDataCallback, group_key_expr: str, wire_format: WireFormat = WireFormat.BASE64) -> ZenohCallback:
+        sequence = self.sequence_tracker.stream()
         def _on_group_data(sample: zenoh.Sample):
-            data: proto.TagGroup = self.deserialize(proto.TagGroup(), sample.payload.to_bytes())
-            logger.debug(f"Sample received on key expression {str(sample.key_expr)}, value = {data}, sequence_number = {sample.attachment.to_string() if sample.attachment else 0}")
-            group_path: str = group_path_from_key(str(sample.key_expr))
-            configs = tag_config.get_group_member_configs(group_path)
-            # print(configs)
+            if not sequence.accept(group_key_expr, sample.attachment):
+                return
+            data: proto.TagGroup = self.deserialize(proto.TagGroup(), sample.payload.to_bytes(), wire_format)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Sample received on key expression {str(sample.key_expr)}, value = {data}, sequence_number = {decode_sequence(sample.attachment)}")
+            # swapped out as a whole when a new meta arrives, so look it up once per sample
+            decoder = self.group_decoders[group_key_expr]
 
             new_data: dict[str, TagBaseValue] = {}
             # value here must be of type BaseData
             for key, value in data.data.items():
-                new_data[key] = BaseData.from_proto(value, configs[key].get_base_type()).to_py() # type: ignore
-            on_group_data(str(sample.key_expr), new_data)
+                base_type = decoder.get(key)
+                if base_type is None:
+                    logger.warning(f"Received tag {key} that is not part of group {group_path_from_key(group_key_expr)}")
+                    continue
+                new_data[key] = BaseData.proto_to_py(value, base_type)
+            self.telemetry_dispatcher.submit(str(sample.key_expr), on_group_data, str(sample.key_expr), new_data)
         return _on_group_data
 
-    def _on_state(self, on_state: StateCallback) -> ZenohCallback:
+    def _on_state(self, ks: NodeKeySpace, on_state: StateCallback) -> ZenohCallback:
+        user_key = ks.user_key
         def _on_state(sample: zenoh.Sample):
+            key_expr = str(sample.key_expr)
             state: proto.State = self.deserialize(proto.State(), sample.payload.to_bytes())
-            logger.debug(f"Remote node {internal_to_user_key(str(sample.key_expr))} received state message: online = {state.online}")
-            on_state(str(sample.key_expr), State.from_proto(state))
+            logger.debug(f"Remote node {user_key} received state message: online = {state.online}")
+            self.telemetry_dispatcher.submit(key_expr, on_state, key_expr, State.from_proto(state))
         return _on_state
 
-    def _on_meta(self, on_meta: MetaCallback) -> ZenohCallback:
+    def _on_meta(self, ks: NodeKeySpace, on_meta: MetaCallback) -> ZenohCallback:
+        from gedge.py_proto.meta import Meta
+        user_key = ks.user_key
         def _on_meta(sample: zenoh.Sample):
+            key_expr = str(sample.key_expr)
             meta: proto.Meta = self.deserialize(proto.Meta(), sample.payload.to_bytes())
-            logger.debug(f"Remote node {internal_to_user_key(str(sample.key_expr))} received meta message")
-            on_meta(str(sample.key_expr), Meta.from_proto(meta))
+            logger.debug(f"Remote node {user_key} received meta message")
+            self.telemetry_dispatcher.submit(key_expr, on_meta, key_expr, Meta.from_proto(meta))
         return _on_meta
 
-    def _on_method_reply(self, on_reply: MethodReplyCallback, method: MethodConfig) -> ZenohCallback:
-        def _on_reply(sample: zenoh.Sample) -> None:
-            if not sample:
-                logger.warning(f"reply from method failed")
+    def _on_method_response(self) -> ZenohCallback:
+        def _on_response(sample: zenoh.Sample) -> None:
+            key_expr = str(sample.key_expr)
+            call = self._pending_call(key_expr)
+            if call is None:
                 return
-            r: proto.Response = self.deserialize(proto.Response(), sample.payload.to_bytes())
-            self._handle_on_method_reply(method, str(sample.key_expr), r, on_reply)
-        return _on_reply
-    
+            r: proto.Response = self.deserialize(proto.Response(), sample.payload.to_bytes(), call.wire_format)
+            self._handle_on_method_reply(call.method, key_expr, r, call.on_reply)
+        return _on_response
+
+    def _pending_call(self, key_expr: str) -> PendingMethodCall | None:
+        # .../METHODS/<path>/<caller_id>/<method_query_id>/RESPONSE
+        method_query_id = key_expr.rsplit("/", 2)[-2]
+        with self._pending_calls_lock:
+            call = self.pending_calls.get(method_query_id)
+        if call is None:
+            logger.debug(f"Dropping response on {key_expr}, the call already ended or timed out")
+        return call
+
+    def _end_method_call(self, key_expr: str) -> None:
+        '''
+        Forgets the call that key_expr (its call or response key expression) belongs to. Responses to it arriving later are dropped
+        '''
+        rest, _, last = key_expr.rpartition("/")
+        method_query_id = rest.rpartition("/")[2] if last == keys.RESPONSE else last
+        with self._pending_calls_lock:
+            self.pending_calls.pop(method_query_id, None)
+
+    def _add_pending_call(self, method_query_id: str, call: PendingMethodCall) -> None:
+        with self._pending_calls_cond:
+            if self._pending_calls_closed:
+                raise SessionError("cannot call a method on a closed session")
+            self.pending_calls[method_query_id] = call
+            if self._pending_calls_watcher is None:
+                self._pending_calls_watcher = threading.Thread(target=self._watch_pending_calls, name="gedge-calls", daemon=True)
+                self._pending_calls_watcher.start()
+            self._pending_calls_cond.notify()
+
+    def _watch_pending_calls(self) -> None:
+        while True:
+            self._sweep_orphaned_calls()
+            with self._pending_calls_cond:
+                if self._pending_calls_closed:
+                    return
+                next_deadline = min((call.deadline for call in self.pending_calls.values()), default=None)
+                timeout = None if next_deadline is None else next_deadline - time.monotonic()
+                if timeout is None or timeout > 0:
+                    self._pending_calls_cond.wait(timeout)
+
+    def _sweep_orphaned_calls(self) -> None:
+        '''
+        Drops every call whose deadline passed without a final response, and tells its on_reply with a TIMEOUT response
+        '''
+        now = time.monotonic()
+        with self._pending_calls_lock:
+            orphans = [(i, call) for i, call in self.pending_calls.items() if call.deadline <= now]
+            for method_query_id, _ in orphans:
+                del self.pending_calls[method_query_id]
+        for method_query_id, call in orphans:
+            logger.warning(f"Method call {method_query_id} to {call.user_key} at path '{call.method.path}' never finished, dropping it")
+            self._abandon_call(call)
+
+    def _close_pending_calls(self) -> None:
+        # no response can arrive once the session is closed, so every call still in flight is abandoned
+        with self._pending_calls_cond:
+            self._pending_calls_closed = True
+            calls = list(self.pending_calls.values())
+            self.pending_calls.clear()
+            self._pending_calls_cond.notify()
+        if calls:
+            logger.info(f"Abandoning {len(calls)} method calls that were still in flight")
+        for call in calls:
+            self._abandon_call(call)
+
+    def _abandon_call(self, call: PendingMethodCall) -> None:
+        try:
+            self._handle_on_method_reply(call.method, method_response_from_call(call.key_expr), proto.Response(code=codes.TIMEOUT), call.on_reply)
+        except Exception as e:
+            logger.exception(f"on_reply of abandoned method call {call.key_expr} raised {repr(e)}")
+
+    def _response_subscriber(self, ks: NodeKeySpace, caller_id: str) -> None:
+        with self._subscriptions_lock:
+            if (ks.method_key_prefix, caller_id) in self.response_subscribers:
+                return
+            key_expr = key_join(ks.method_key_prefix, "**", caller_id, "*", keys.RESPONSE)
+            self.response_subscribers[(ks.method_key_prefix, caller_id)] = self._subscriber(key_expr, self._on_method_response())
+
     def _handle_on_method_reply(self, method: MethodConfig, key_expr: str, r: proto.Response, on_reply: MethodReplyCallback) -> None:
         '''
         Design decision here. The problem is that golden-edge reserved codes do not have a 
@@ -261,30 +537,40 @@ class Comm:
         body: dict[str, TagValue] = response_config.body_proto_to_value(dict(r.body))
         props = props_to_json5(response_config.props)
         reply = Response(key_expr, r.code, response_config.type, body, props)
-        on_reply(reply)
         if codes.is_final_method_response(reply):
-            logger.debug(f"remove subscription for key expr {key_expr}")
-            self.cancel_subscription(key_expr)
+            logger.debug(f"method call {key_expr} finished")
+            self._end_method_call(key_expr)
+        on_reply(reply)
     
-    def _tag_write_reply(self, query: zenoh.Query, tag: Tag) -> Callable[[int, dict[str, TagValue]], None]:
+    def _tag_write_reply(self, query: zenoh.Query, tag: Tag, path: str, wire_format: WireFormat = WireFormat.BASE64) -> Callable[[int, dict[str, TagValue]], None]:
         def _reply(code: int, body: dict[str, TagValue]):
-            path = tag_path_from_key(str(query.key_expr))
             responses, _ = tag.write_config[path]
             response_config = codes.config_from_code(code, responses)
             new_body: dict[str, proto.DataItem] = response_config.body_value_to_proto(body)
             write_response = proto.Response(code=code, body=new_body)
-            b = self.serialize(write_response)
-            query.reply(key_expr=str(query.key_expr), payload=b)
+            b = self.serialize(write_response, wire_format)
+            # a reply has the priority and congestion control of its query, zenoh ignores (and warns about) them here
+            query.reply(key_expr=str(query.key_expr), payload=b, encoding=wire_format.encoding, express=self.options.control.express)
         return _reply
 
-    def _on_tag_write(self, tag: Tag, path: str) -> ZenohQueryCallback:
+    def _on_tag_write(self, tag: Tag, path: str, wire_format: WireFormat = WireFormat.BASE64) -> ZenohQueryCallback:
         from gedge.node.method_response import ResponseType
         def _on_write(query: zenoh.Query) -> None:
-            reply = self._tag_write_reply(query, tag)
+            # the query stays open until it is dropped, so it can be handled on another thread
+            self.handler_dispatcher.submit(str(query.key_expr), _handle_write_and_drop, query)
+        def _handle_write_and_drop(query: zenoh.Query) -> None:
+            try:
+                _handle_write(query)
+            finally:
+                # the caller does not get its reply until the query is finalized. Zenoh only does that on its 
+                # own when the callback returns, which has already happened if this ran on another thread
+                query.drop()
+        def _handle_write(query: zenoh.Query) -> None:
+            reply = self._tag_write_reply(query, tag, path, wire_format)
             if not query.payload:
                 reply(codes.CALLBACK_ERR, {"reason": "Empty write request"})
                 return
-            proto_data = self.deserialize(proto.BaseData(), query.payload.to_bytes())
+            proto_data = self.deserialize(proto.BaseData(), query.payload.to_bytes(), wire_format)
 
             try: 
                 config = tag.get_config(path)
@@ -310,46 +596,111 @@ class Comm:
             # reply(code, body)
         return _on_write
     
-    def _method_reply(self, key_expr: str, method: MethodConfig) -> Callable[[int, dict[str, TagValue]], None]:
+    def _group_write_reply(self, query: zenoh.Query, responses: list[ResponseConfig], wire_format: WireFormat = WireFormat.BASE64) -> Callable[[int, dict[str, TagValue]], None]:
+        def _reply(code: int, body: dict[str, TagValue]):
+            response_config = codes.config_from_code(code, responses)
+            new_body: dict[str, proto.DataItem] = response_config.body_value_to_proto(body)
+            b = self.serialize(proto.Response(code=code, body=new_body), wire_format)
+            # like a tag write reply, it has the priority and congestion control of its query
+            query.reply(key_expr=str(query.key_expr), payload=b, encoding=wire_format.encoding, express=self.options.control.express)
+        return _reply
+
+    def _on_group_write(self, group_path: str, tag_config: TagConfig, wire_format: WireFormat = WireFormat.BASE64) -> ZenohQueryCallback:
+        from gedge.node.method_response import ResponseType
+        # resolved once, when the queryable is declared, like the decoders of group subscribers
+        decoder = tag_config.get_group_decoder(group_path)
+        def _on_write(query: zenoh.Query) -> None:
+            self.handler_dispatcher.submit(str(query.key_expr), _handle_write_and_drop, query)
+        def _handle_write_and_drop(query: zenoh.Query) -> None:
+            try:
+                _handle_write(query)
+            finally:
+                query.drop()
+        def _handle_write(query: zenoh.Query) -> None:
+            responses, handler = tag_config.group_write_config[group_path]
+            reply = self._group_write_reply(query, responses, wire_format)
+            if not query.payload:
+                reply(codes.CALLBACK_ERR, {"reason": "Empty write request"})
+                return
+            data: proto.TagGroup = self.deserialize(proto.TagGroup(), query.payload.to_bytes(), wire_format)
+
+            values: dict[str, Any] = {}
+            for path, value in data.data.items():
+                base_type = decoder.get(path)
+                if base_type is None:
+                    reply(codes.CALLBACK_ERR, {"reason": f"tag {path} not part of group {group_path}"})
+                    return
+                values[path] = BaseData.proto_to_py(value, base_type)
+            logger.info(f"Node {query.key_expr} received group write at path '{group_path}' with values '{values}'")
+
+            q = GroupWriteQuery(str(query.key_expr), reply, responses, [], values)
+            try:
+                if handler is None:
+                    raise Exception(f"No handler provided for group {group_path}")
+                handler(q)
+            except QueryEnd as e:
+                pass
+            except Exception as e:
+                q._reply(codes.CALLBACK_ERR, {"reason": str(e)}, ResponseType.ERR)
+            finally:
+                if not q._responses_sent or q._responses_sent[-1].type == ResponseType.INFO:
+                    q._reply(codes.CALLBACK_ERR, { "reason": "group write handler did not finish function with OK or ERR message" }, ResponseType.ERR)
+        return _on_write
+
+    def _method_reply(self, key_expr: str, method: MethodConfig, wire_format: WireFormat = WireFormat.BASE64) -> Callable[[int, dict[str, TagValue]], None]:
         responses = method.responses
         def _reply(code: int, body: dict[str, TagValue]) -> None:
             response_config = codes.config_from_code(code, responses)
             new_body: dict[str, proto.DataItem] = response_config.body_value_to_proto(body)
             r = proto.Response(code=code, body=new_body)
-            self._send_proto(key_expr=key_expr, value=r)
+            self._send_proto(key_expr=key_expr, value=r, wire_format=wire_format)
         return _reply
     
-    def _on_method_query(self, method: MethodConfig):
+    def _on_method_query(self, method: MethodConfig, wire_format: WireFormat = WireFormat.BASE64):
         def _on_query(sample: zenoh.Sample) -> None:
-            m = self.deserialize(proto.MethodCall(), sample.payload.to_bytes())
-            self._handle_method_query(method, str(sample.key_expr), m)
+            m = self.deserialize(proto.MethodCall(), sample.payload.to_bytes(), wire_format)
+            self.handler_dispatcher.submit(str(sample.key_expr), self._handle_method_query, method, str(sample.key_expr), m, wire_format)
         return _on_query
 
-    def _handle_method_query(self, method: MethodConfig, key_expr: str, value: proto.MethodCall):
+    def _handle_method_query(self, method: MethodConfig, key_expr: str, value: proto.MethodCall, wire_format: WireFormat = WireFormat.BASE64):
         from gedge.node.method_response import ResponseType
         p = dict(value.params)
         params: dict[str, TagValue] = method.params_proto_to_py(p)
         
         key_expr = method_response_from_call(key_expr)
-        reply_func = self._method_reply(key_expr, method)
+        reply_func = self._method_reply(key_expr, method, wire_format)
         q = MethodQuery(key_expr, reply_func, method.responses, [], params)
+        name = NodeKeySpace.user_key_from_key(key_expr)
+        logger.info(f"Node {name} method call at path '{method.path}' with params {params}")
+        logger.debug(f"Received from {key_expr}")
+        if inspect.iscoroutinefunction(method.handler):
+            # the dispatcher awaits this on its event loop
+            return self._await_method_handler(method, q)
         try:
-            name = NodeKeySpace.user_key_from_key(key_expr)
-            logger.info(f"Node {name} method call at path '{method.path}' with params {params}")
-            logger.debug(f"Received from {key_expr}")
             assert method.handler is not None, "No method handler provided"
             method.handler(q)
         except QueryEnd as e:
             pass
         except Exception as e:
-            # print("ENCOUNTERED EXCEPTION")
-            body = {
-                "reason": str(e)
-            }
-            q._reply(codes.CALLBACK_ERR, body, ResponseType.ERR) 
+            q._reply(codes.CALLBACK_ERR, {"reason": str(e)}, ResponseType.ERR) 
         finally:
-            if not q._responses_sent or q._responses_sent[-1].type == ResponseType.INFO:
-                q._reply(codes.CALLBACK_ERR, { "reason": "method handler did not finish function with OK or ERR message" }, ResponseType.ERR)
+            self._end_method_query(q)
+
+    async def _await_method_handler(self, method: MethodConfig, q: MethodQuery):
+        from gedge.node.method_response import ResponseType
+        try:
+            await method.handler(q) # type: ignore
+        except QueryEnd as e:
+            pass
+        except Exception as e:
+            q._reply(codes.CALLBACK_ERR, {"reason": str(e)}, ResponseType.ERR) 
+        finally:
+            self._end_method_query(q)
+
+    def _end_method_query(self, q: MethodQuery):
+        from gedge.node.method_response import ResponseType
+        if not q._responses_sent or q._responses_sent[-1].type == ResponseType.INFO:
+            q._reply(codes.CALLBACK_ERR, { "reason": "method handler did not finish function with OK or ERR message" }, ResponseType.ERR)
 
     def liveliness_subscriber(self, ks: NodeKeySpace, handler: LivelinessCallback) -> None:
         '''
@@ -363,9 +714,9 @@ class Comm:
             None
         '''
         key_expr = ks.liveliness_key_prefix
-        zenoh_handler = self._on_liveliness(handler)
+        zenoh_handler = self._on_liveliness(ks, handler)
         subscriber = self.session.liveliness().declare_subscriber(key_expr, zenoh_handler)
-        self.subscriptions.append(subscriber)
+        self.subscriptions.add(key_expr, subscriber)
 
     def _query_liveliness(self, ks: NodeKeySpace) -> zenoh.Reply:
         '''
@@ -380,7 +731,7 @@ class Comm:
         key_expr = ks.liveliness_key_prefix
         return self.session.liveliness().get(key_expr).recv()
 
-    def _subscriber(self, key_expr: str, handler: ZenohCallback) -> None:
+    def _subscriber(self, key_expr: str, handler: ZenohCallback) -> Subscription:
         '''
         Declares a subscriber with the passed handler on the node corresponding to the passed key expression
 
@@ -389,11 +740,23 @@ class Comm:
             handler (ZenohCallback): The handler of the subscription being added
 
         Returns:
-            None
+            Subscription: The handle of the declared subscriber
         '''
         logger.debug(f"declaring subscriber on key expression '{key_expr}'")
         subscriber = self.session.declare_subscriber(key_expr, handler)
-        self.subscriptions.append(subscriber)
+        return self.subscriptions.add(key_expr, subscriber)
+
+    def undeclare_subscriber(self, subscriber: Subscription):
+        '''
+        Removes one subscriber, leaving any other subscriber on the same key expression in place
+
+        Arguments:
+            subscriber (Subscription): The handle returned when it was declared
+
+        Returns:
+            None
+        '''
+        self.subscriptions.undeclare(subscriber)
 
     def cancel_subscription(self, key_expr: str):
         '''
@@ -405,11 +768,8 @@ class Comm:
         Returns:
             None
         '''
-        subs = [s for s in self.subscriptions if str(s.key_expr) == key_expr]
-        logger.debug(f"canceling {len(subs)} subscriptions at key_expr = {key_expr}")
-        for s in subs:
-            s.undeclare()
-            self.subscriptions.remove(s)
+        n = self.subscriptions.undeclare_key(key_expr)
+        logger.debug(f"canceled {n} subscriptions at key_expr = {key_expr}")
     
     def _queryable(self, key_expr: str, handler: ZenohQueryCallback) -> zenoh.Queryable:
         '''
@@ -437,7 +797,7 @@ class Comm:
             zenoh.Reply
         '''
         try:
-            reply = self.session.get(key_expr, payload=payload).recv()
+            reply = self.session.get(key_expr, payload=payload, **self.options.control.kwargs()).recv()
         except Exception:
             raise LookupError(f"No queryable defined at {key_expr}")
         return reply
@@ -455,7 +815,7 @@ class Comm:
             None
         '''
         key_expr = ks.meta_key_prefix
-        zenoh_handler = self._on_meta(handler)
+        zenoh_handler = self._on_meta(ks, handler)
         self._subscriber(key_expr, zenoh_handler)
     
     def state_subscriber(self, ks: NodeKeySpace, handler: StateCallback) -> None:
@@ -470,7 +830,7 @@ class Comm:
             None
         '''
         key_expr = ks.state_key_prefix
-        zenoh_handler = self._on_state(handler)
+        zenoh_handler = self._on_state(ks, handler)
         self._subscriber(key_expr, zenoh_handler)
     
     def cancel_tag_data_subscription(self, ks: NodeKeySpace, path: str) -> None:
@@ -478,7 +838,7 @@ class Comm:
         key_expr = ks.tag_data_path(path)
         self.cancel_subscription(key_expr)
     
-    def tag_data_subscriber(self, ks: NodeKeySpace, path: str, handler: TagDataCallback, tag_config: TagConfig) -> None:
+    def tag_data_subscriber(self, ks: NodeKeySpace, path: str, handler: TagDataCallback, tag_config: TagConfig) -> Subscription:
         '''
         Declares a Tag Data subscriber with the passed handler on the passed node with the passed tags at the passed path
 
@@ -494,20 +854,79 @@ class Comm:
             None
         '''
 
+        wire_format = self.wire_format(ks)
         group = tag_config.get_group(path)
         if group:
-            key_expr = ks.group_data_path(group)
-            zenoh_handler = self._on_group_data_feed_to_tag_data_subscriber(handler, tag_config, path)
-            self._subscriber(key_expr, zenoh_handler)
+            key_expr = self._group_decoder(ks, group, tag_config)
+            zenoh_handler = self._on_group_data_feed_to_tag_data_subscriber(handler, key_expr, path, wire_format)
+            return self._subscriber(key_expr, zenoh_handler)
         else:
             key_expr = ks.tag_data_path(path)
-            zenoh_handler = self._on_tag_data(handler, tag_config)
-            self._subscriber(key_expr, zenoh_handler)
+            zenoh_handler = self._on_tag_data(handler, ks, path, tag_config, wire_format)
+            return self._subscriber(key_expr, zenoh_handler)
     
-    def group_data_subscriber(self, ks: NodeKeySpace, group_path: str, handler: TagGroupDataCallback, tag_config: TagConfig) -> None:
+    def tag_data_router(self, ks: NodeKeySpace, tag_config: TagConfig) -> TagDataRouter:
+        '''
+        Returns the router of every tag data sample of the passed node, creating it the first time
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+            tag_config (TagConfig): Tag configuration for this node
+
+        Returns:
+            TagDataRouter
+        '''
+        with self._subscriptions_lock:
+            router = self.tag_routers.get(ks.tag_data_key_prefix)
+            if router is None:
+                router = TagDataRouter(self, ks, tag_config)
+                self.tag_routers[ks.tag_data_key_prefix] = router
+            return router
+
+    def group_data_subscriber(self, ks: NodeKeySpace, group_path: str, handler: TagGroupDataCallback, tag_config: TagConfig) -> Subscription:
+        key_expr = self._group_decoder(ks, group_path, tag_config)
+        zenoh_handler = self._on_group_data(handler, key_expr, self.wire_format(ks))
+        return self._subscriber(key_expr, zenoh_handler)
+
+    def _group_decoder(self, ks: NodeKeySpace, group_path: str, tag_config: TagConfig) -> str:
+        '''
+        Resolves the member -> BaseType table of a group once, the first time the group is subscribed to
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node the group is on
+            group_path (str): The path of the group
+            tag_config (TagConfig): Tag configuration for this node
+
+        Returns:
+            str: The key expression of the group's data, which is also the key of its decoder in self.group_decoders
+        '''
         key_expr = ks.group_data_path(group_path)
-        zenoh_handler = self._on_group_data(handler, tag_config)
-        self._subscriber(key_expr, zenoh_handler)
+        if key_expr not in self.group_decoders:
+            self.group_decoders[key_expr] = tag_config.get_group_decoder(group_path)
+        return key_expr
+
+    def refresh_group_decoders(self, ks: NodeKeySpace, tag_config: TagConfig):
+        '''
+        Rebuilds the decoders of every group on the passed node that is subscribed to (and of its tag data router).
+        Called when a new Meta arrives for that node
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+            tag_config (TagConfig): The new tag configuration for this node
+
+        Returns:
+            None
+        '''
+        router = self.tag_routers.get(ks.tag_data_key_prefix)
+        if router is not None:
+            router.set_tag_config(tag_config)
+        groups = tag_config.all_groups()
+        prefix = ks.group_key_prefix + "/"
+        for key_expr in [k for k in self.group_decoders if k.startswith(prefix)]:
+            group_path = group_path_from_key(key_expr)
+            if group_path not in groups:
+                logger.warning(f"Group {group_path} is no longer on node {ks.user_key}")
+            self.group_decoders[key_expr] = tag_config.get_group_decoder(group_path)
 
     def tag_queryable(self, ks: NodeKeySpace, tag: Tag, path: str | None = None) -> zenoh.Queryable:
         '''
@@ -526,28 +945,46 @@ class Comm:
             path = tag.path
 
         key_expr = ks.tag_write_path(path)
-        zenoh_handler = self._on_tag_write(tag, path)
+        zenoh_handler = self._on_tag_write(tag, path, self.wire_format(ks))
         logger.debug(f"tag queryable on {key_expr}")
         return self._queryable(key_expr, zenoh_handler)
     
-    def _query_tag(self, key_expr: str, value: proto.BaseData) -> zenoh.Reply:
+    def group_queryable(self, ks: NodeKeySpace, group_path: str, tag_config: TagConfig) -> zenoh.Queryable:
+        '''
+        Registers a zenoh queryable at <prefix>/NODE/<name>/TAGS/GROUPS/<group_path>/WRITE, which passes every value
+        of a group write to the group's GroupWriteHandler at once
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node that has the group
+            group_path (str): The path of the writable group
+            tag_config (TagConfig): Tag configuration of the node
+
+        Returns:
+            zenoh.Queryable
+        '''
+        key_expr = ks.group_write_path(group_path)
+        zenoh_handler = self._on_group_write(group_path, tag_config, self.wire_format(ks))
+        logger.debug(f"group queryable on {key_expr}")
+        return self._queryable(key_expr, zenoh_handler)
+
+    def _query_tag(self, key_expr: str, value: proto.BaseData, wire_format: WireFormat = WireFormat.BASE64) -> zenoh.Reply:
         '''
         Sends the passed value to the Tag on the passed path in the passed node
 
         Arguments:
-            ks (NodeKeySpace): The key space of the node that the tag belongs to
-            path (str): The path to the tag
+            key_expr (str): The tag write key expression of the tag
             value (proto.TagData): The value that will be passed to the tag
+            wire_format (WireFormat): The wire format of the node that owns the tag
 
         Returns:
             zenoh.Reply: The reply from Zenoh after passing the parameter value to the tag on the passed node
         '''
-        b = self.serialize(value)
+        b = self.serialize(value, wire_format)
         logger.debug(f"querying tag at path {key_expr}")
         return self._query_sync(key_expr, payload=b)
     
-    def _query_group(self, key_expr: str, value: proto.TagGroup) -> zenoh.Reply:
-        b = self.serialize(value)
+    def _query_group(self, key_expr: str, value: proto.TagGroup, wire_format: WireFormat = WireFormat.BASE64) -> zenoh.Reply:
+        b = self.serialize(value, wire_format)
         logger.debug(f"querying group at path {key_expr}")
         return self._query_sync(key_expr, payload=b)
     
@@ -564,21 +1001,22 @@ class Comm:
         '''
         key_expr = ks.method_query_listen(method.path)
         logger.info(f"Setting up method at path {method.path} on node {ks.name}")
-        zenoh_handler = self._on_method_query(method)
+        zenoh_handler = self._on_method_query(method, self.wire_format(ks))
         self._subscriber(key_expr, zenoh_handler)
     
-    def query_method(self, ks: NodeKeySpace, path: str, caller_id: str, params: dict[str, proto.DataItem], on_reply: MethodReplyCallback, method: MethodConfig) -> str:
+    def query_method(self, ks: NodeKeySpace, path: str, caller_id: str, params: dict[str, proto.DataItem], on_reply: MethodReplyCallback, method: MethodConfig, timeout: float | None = None) -> str:
         '''
-        Queries the tag along the passed path between the caller and method query and then sends the response along proto
+        Queries the tag along the passed path between the caller and method query and then sends the response along proto.
+        Responses are received by the caller's one response subscriber on the remote, which is declared on the first call
         
         Arguments:
             ks (NodeKeySpace): The key space of the node that method queries are being handled on
             path (str): The path of the tag which is being queried
             caller_id (str): The id of the caller of the method
-            method_query_id (str): The id of the method query
             params (dict[str, proto.TagData]): The passed parameters for the Method Query Data
             on_reply (MethodReplyCallback): The MethodReplyCallback for the query
             method (Method): The method being queried
+            timeout (float | None): Seconds after which the call is dropped and on_reply gets a TIMEOUT response, defaults to ORPHANED_CALL_TIMEOUT
         
         Returns:
             str: The key expression of the query
@@ -587,27 +1025,27 @@ class Comm:
         query_key_expr = ks.method_query(path, caller_id, method_query_id)
         query_data = proto.MethodCall(params=params)
 
-        response_key_expr = ks.method_response(path, caller_id, method_query_id)
-        zenoh_handler = self._on_method_reply(on_reply, method)
-        self._subscriber(response_key_expr, zenoh_handler)
-        self._send_proto(query_key_expr, query_data)
+        # both the call and its responses travel on the callee's key space, so they use the callee's format
+        wire_format = self.wire_format(ks)
+        deadline = time.monotonic() + (ORPHANED_CALL_TIMEOUT if timeout is None else timeout)
+        self._add_pending_call(method_query_id, PendingMethodCall(ks.user_key, method, on_reply, wire_format, query_key_expr, deadline))
+        self._response_subscriber(ks, caller_id)
+        self._send_proto(query_key_expr, query_data, wire_format)
 
         return query_key_expr
 
-    def update_tag(self, ks: NodeKeySpace, path: str, value: proto.BaseData):
+    def cancel_method_call(self, key_expr: str) -> None:
         '''
-        Updates the tag within the passed node along the passed path with the passed value
-        
+        Stops routing responses to a method call, e.g. once the caller gave up waiting on it
+
         Arguments:
-            ks (NodeKeySpace): The key space of the node whose tag is being updated
-            path (str): The path of the tag
-            value (proto.TagData): The value being sent to the tag within the node along the path
-        
+            key_expr (str): The key expression returned by query_method
+
         Returns:
             None
         '''
-        key_expr = ks.tag_data_path(path)
-        self._send_proto(key_expr, value)
+        logger.debug(f"Canceling method call {key_expr}")
+        self._end_method_call(key_expr)
 
     def write_tag(self, ks: NodeKeySpace, path: str, value: BaseData) -> proto.Response:
         '''
@@ -621,16 +1059,168 @@ class Comm:
         Returns:
             proto.WriteResponseData
         '''
-        reply = self._query_tag(ks.tag_write_path(path), value.to_proto())
+        wire_format = self.wire_format(ks)
+        reply = self._query_tag(ks.tag_write_path(path), value.to_proto(), wire_format)
         if reply.ok:
-            d: proto.Response = self.deserialize(proto.Response(), reply.result.payload.to_bytes())
+            d: proto.Response = self.deserialize(proto.Response(), reply.result.payload.to_bytes(), wire_format)
             return d
         raise Exception(f"Failure in receiving tag write reply for tag at path {path}")
     
-    def write_group(self, key_expr: str, value: dict[str, proto.BaseData]) -> proto.Response:
-        reply = self._query_group(key_expr, proto.TagGroup(data=value))
+    def write_tag_async(self, ks: NodeKeySpace, path: str, value: BaseData) -> asyncio.Future[proto.Response]:
+        '''
+        Queries the tag on the passed path in the passed node with the passed value, without blocking.
+        Must be called from within a running event loop
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node who is being written to
+            path (str): The path of the tag in the node
+            value (BaseData): The value being passed to the tag
+
+        Returns:
+            asyncio.Future[proto.Response]: Resolves to the reply of the tag write
+        '''
+        wire_format = self.wire_format(ks)
+        b = self.serialize(value.to_proto(), wire_format)
+        return self._query_async(ks.tag_write_path(path), b, wire_format, f"tag at path {path}")
+
+    def _query_async(self, key_expr: str, payload: bytes, wire_format: WireFormat, target: str) -> asyncio.Future[proto.Response]:
+        '''
+        Sends a query and bridges its first reply from zenoh's callback onto the running event loop
+
+        Arguments:
+            key_expr (str): The key expression being queried
+            payload (bytes): The payload of the query
+            wire_format (WireFormat): The wire format of the node being queried
+            target (str): What is being queried, for error messages
+
+        Returns:
+            asyncio.Future[proto.Response]: Resolves to the first reply
+        '''
+        from gedge.node.aio import call_soon
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[proto.Response] = loop.create_future()
+        def _resolve(response: proto.Response | None, error: Exception | None):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(response) # type: ignore
+        def _on_reply(reply: zenoh.Reply):
+            if reply.ok:
+                d: proto.Response = self.deserialize(proto.Response(), reply.ok.payload.to_bytes(), wire_format)
+                call_soon(loop, _resolve, d, None)
+            else:
+                call_soon(loop, _resolve, None, Exception(f"Failure in receiving tag write reply for {target}"))
+        def _on_done():
+            # only does something if nobody replied at all
+            call_soon(loop, _resolve, None, LookupError(f"No queryable defined at {key_expr}"))
+        logger.debug(f"querying {target} asynchronously")
+        self.session.get(key_expr, zenoh.handlers.Callback(_on_reply, _on_done), payload=payload, **self.options.control.kwargs())
+        return future
+
+    def write_tags(self, ks: NodeKeySpace, values: dict[str, BaseData], timeout: float | None = None, max_in_flight: int | None = None) -> dict[str, proto.Response | Exception]:
+        '''
+        Queries the tags on the passed paths in the passed node with the passed values, all at once
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node who is being written to
+            values (dict[str, BaseData]): The value being passed to each tag, by path
+            timeout (float | None): Seconds all the writes have to finish in, defaults to zenoh's query timeout for each
+            max_in_flight (int | None): The most writes sent and not yet replied to at any time, no limit if None
+
+        Returns:
+            dict[str, proto.Response | Exception]: The reply of every write by path, or why there was none
+        '''
+        wire_format = self.wire_format(ks)
+        queries = [(ks.tag_write_path(path), self.serialize(value.to_proto(), wire_format)) for path, value in values.items()]
+        results = self._query_many(queries, wire_format, timeout, max_in_flight)
+        return dict(zip(values.keys(), results))
+
+    def _query_many(self, queries: list[tuple[str, bytes]], wire_format: WireFormat, timeout: float | None, max_in_flight: int | None) -> list[proto.Response | Exception]:
+        '''
+        Sends the passed queries without waiting for the reply of one before sending the next and gathers their first replies.
+        Queries are sent in order, and only once fewer than max_in_flight of the ones before them are waiting on a reply
+
+        Arguments:
+            queries (list[tuple[str, bytes]]): The key expression and payload of every query
+            wire_format (WireFormat): The wire format of the node being queried
+            timeout (float | None): Seconds every query has to finish in, counted from the first one
+            max_in_flight (int | None): The most queries waiting on a reply at any time, no limit if None
+
+        Returns:
+            list[proto.Response | Exception]: The first reply to every query, in order, or why there was none
+        '''
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results: list[proto.Response | Exception | None] = [None] * len(queries)
+        cond = threading.Condition()
+        in_flight = 0
+
+        def _remaining() -> float | None:
+            return None if deadline is None else deadline - time.monotonic()
+
+        def _handlers(i: int, key_expr: str) -> zenoh.handlers.Callback:
+            def _on_reply(reply: zenoh.Reply):
+                if reply.ok:
+                    result: proto.Response | Exception = self.deserialize(proto.Response(), reply.ok.payload.to_bytes(), wire_format)
+                else:
+                    result = Exception(f"Failure in receiving reply to query on {key_expr}")
+                with cond:
+                    if results[i] is None:
+                        results[i] = result
+            def _on_done():
+                nonlocal in_flight
+                with cond:
+                    if results[i] is None:
+                        # zenoh ends a query it timed out the same way as one nobody replied to
+                        remaining = _remaining()
+                        if remaining is not None and remaining <= 0:
+                            results[i] = TimeoutError(f"No reply to query on {key_expr} within {timeout}s")
+                        else:
+                            results[i] = LookupError(f"No queryable defined at {key_expr}")
+                    in_flight -= 1
+                    cond.notify_all()
+            return zenoh.handlers.Callback(_on_reply, _on_done)
+
+        kwargs = self.options.control.kwargs()
+        sent = 0
+        for i, (key_expr, payload) in enumerate(queries):
+            with cond:
+                if max_in_flight is not None:
+                    cond.wait_for(lambda: in_flight < max_in_flight, _remaining())
+                    if in_flight >= max_in_flight:
+                        break
+                remaining = _remaining()
+                if remaining is not None and remaining <= 0:
+                    break
+                in_flight += 1
+            logger.debug(f"querying {key_expr} ({i + 1}/{len(queries)})")
+            try:
+                if remaining is None:
+                    self.session.get(key_expr, _handlers(i, key_expr), payload=payload, **kwargs)
+                else:
+                    self.session.get(key_expr, _handlers(i, key_expr), payload=payload, timeout=remaining, **kwargs)
+            except Exception as e:
+                with cond:
+                    results[i] = e
+                    in_flight -= 1
+                continue
+            sent = i + 1
+
+        with cond:
+            cond.wait_for(lambda: in_flight == 0, _remaining())
+            for i, result in enumerate(results):
+                if result is None:
+                    what = "sent" if i >= sent else "replied to"
+                    results[i] = TimeoutError(f"Query on {queries[i][0]} not {what} within {timeout}s")
+            return results # type: ignore
+
+    def write_group(self, key_expr: str, value: dict[str, proto.BaseData], wire_format: WireFormat = WireFormat.BASE64) -> proto.Response:
+        reply = self._query_group(key_expr, proto.TagGroup(data=value), wire_format)
         if reply.ok:
-            d: proto.Response = self.deserialize(proto.Response(), reply.result.payload.to_bytes())
+            d: proto.Response = self.deserialize(proto.Response(), reply.result.payload.to_bytes(), wire_format)
             return d
         raise Exception(f"Failure in receiving tag write reply for group at path {group_path_from_key(key_expr)}")
 
@@ -662,6 +1252,65 @@ class Comm:
         key_expr = ks.meta_key_prefix
         self._send_proto(key_expr, meta.to_proto())
     
+    def _query_network(self) -> tuple[list[proto.Meta], set[str]]:
+        '''
+        Queries every Meta (from the historian) and every liveliness token on the network. Both queries
+        are in flight at the same time, so this is one round trip no matter how many nodes there are
+
+        Returns:
+            tuple[list[proto.Meta], set[str]]: the Metas, and the keys of the nodes that are online
+        '''
+        liveliness_replies = self.session.liveliness().get(keys.LIVELINESS_WILDCARD)
+        meta_replies = self.session.get(keys.META_WILDCARD)
+
+        online = self._online_from_replies(liveliness_replies)
+
+        metas: list[proto.Meta] = []
+        for r in meta_replies:
+            r: zenoh.Reply
+            if not r.ok:
+                continue
+            try:
+                metas.append(self.deserialize(proto.Meta(), r.result.payload.to_bytes()))
+            except Exception as e:
+                raise ValueError(f"Could not deserialize meta from historian: {e}")
+        logger.debug(f"Found {len(metas)} metas, {len(online)} nodes online")
+        return metas, online
+
+    def _query_online(self) -> set[str]:
+        '''
+        Queries every liveliness token on the network, in one round trip no matter how many nodes there are
+
+        Returns:
+            set[str]: the keys of the nodes that are online
+        '''
+        return self._online_from_replies(self.session.liveliness().get(keys.LIVELINESS_WILDCARD))
+
+    @staticmethod
+    def _online_from_replies(replies: Any) -> set[str]:
+        online: set[str] = set()
+        for r in replies:
+            r: zenoh.Reply
+            if r.ok is not None and r.ok.kind == zenoh.SampleKind.PUT:
+                online.add(internal_to_user_key(str(r.ok.key_expr)))
+        return online
+
+    def discover_nodes(self, only_online: bool = False) -> list[tuple[Meta, bool]]:
+        '''
+        Pulls the Metas of all nodes on the network along with whether each one is online.
+        The Metas are decoded lazily, see LazyMeta
+
+        Arguments:
+            only_online (bool): Only return nodes that are currently online
+
+        Returns:
+            list[tuple[Meta, bool]]: (Meta, is online) of every node
+        '''
+        from gedge.py_proto.meta import LazyMeta
+        metas, online = self._query_network()
+        nodes = [(LazyMeta(meta), meta.key in online) for meta in metas]
+        return [node for node in nodes if node[1] or not only_online]
+
     def pull_meta_messages(self, only_online: bool = False) -> list[Meta]:
         '''
         Pulls all Metas in the current Zenoh session of online nodes
@@ -674,25 +1323,7 @@ class Comm:
         Returns:
             list[Meta]: A list of the Meta messages
         '''
-        from gedge.py_proto.meta import Meta
-        res = self.session.get(keys.key_join("**", keys.NODE, "*", keys.META))
-        messages: list[Meta] = []
-        for r in res:
-            r: zenoh.Reply
-            if not r.ok:
-                continue
-            result = r.result
-
-            try:
-                meta: proto.Meta = self.deserialize(proto.Meta(), result.payload.to_bytes())
-                ks = NodeKeySpace.from_user_key(meta.key)
-                is_online = self.is_online(ks)
-                if only_online and not is_online:
-                    continue
-                messages.append(Meta.from_proto(meta))
-            except Exception as e:
-                raise ValueError(f"Could not deserialize meta from historian: {e}")
-        return messages
+        return [meta for meta, _ in self.discover_nodes(only_online)]
 
     def pull_meta_message(self, ks: NodeKeySpace) -> Meta:
         from gedge.py_proto.meta import Meta
@@ -733,77 +1364,106 @@ class Comm:
         except:
             return False
     
-    def _pull_all_model_versions(self, path: str) -> list[DataModelConfig]:
-        models = []
-        res = self.session.get(keys.model_fetch(path))
-        for r in res:
-            r: zenoh.Reply
-            if r.err:
-                continue
-            result = r.result
-            assert isinstance(result, zenoh.Sample)
-            try:
-                config = self.deserialize(proto.DataModelConfig(), result.payload.to_bytes())
-                config = DataModelConfig.from_proto(config)
-                pulled_version = keys.version_from_model(str(result.key_expr))
-                if config.version != pulled_version:
-                    logger.warning(f"Versions do not match for model {path}, model says {config.version}, key says {pulled_version}")
-                    return []
-                models.append(config)
-            except Exception as e:
-                raise ValueError(f"Could not deserialize model at path {path} from historian: {e}")
-        return models
-    
-    def _pull_model_with_version(self, path: str, version: int) -> DataModelConfig | None:
-        try:
-            res = self.session.get(keys.model_path(path, version)).recv()
-            if res.err:
-                raise Exception
-        except:
-            logger.info(f"No model found at path {path} with version {version}")
-            return None
-        assert isinstance(res.result, zenoh.Sample)
-        s = res.result
+    def _decode_model(self, sample: zenoh.Sample, path: str) -> DataModelConfig | None:
         try:
-            config = self.deserialize(proto.DataModelConfig(), s.payload.to_bytes())
+            config = self.deserialize(proto.DataModelConfig(), sample.payload.to_bytes())
             config = DataModelConfig.from_proto(config)
-        except:
-            raise ValueError(f"Could not deserialize model at path {path} (version {version}) from historian")
-
-        pulled_version = keys.version_from_model(str(s.key_expr))
+        except Exception as e:
+            raise ValueError(f"Could not deserialize model at path {path} from historian: {e}")
+        if str(sample.key_expr).endswith(keys.LATEST):
+            return config
+        pulled_version = keys.version_from_model(str(sample.key_expr))
         if config.version != pulled_version:
             logger.warning(f"Versions do not match for model {path}, model says {config.version}, key says {pulled_version}")
             return None
         return config
-    
+
+    def _pull_models(self, refs: list[DataModelRef]) -> list[DataModelConfig | None]:
+        '''
+        Pulls the passed models with all of their queries in flight at once. A ref without a version
+        gets the model's LATEST pointer, falling back to every version of it for models pushed before the pointer existed
+
+        Arguments:
+            refs (list[DataModelRef]): The models to pull
+
+        Returns:
+            list[DataModelConfig | None]: The model for each ref, None if it could not be found
+        '''
+        in_flight = []
+        for ref in refs:
+            key_expr = keys.model_latest_pointer(ref.path) if ref.version is None else keys.model_path(ref.path, ref.version)
+            in_flight.append(self.session.get(key_expr))
+
+        models: list[DataModelConfig | None] = []
+        for ref, replies in zip(refs, in_flight):
+            model = None
+            for r in replies:
+                r: zenoh.Reply
+                if r.ok is None:
+                    continue
+                pulled = self._decode_model(r.ok, ref.path)
+                if pulled is not None and (model is None or pulled.version > model.version):
+                    model = pulled
+            models.append(model)
+
+        missing = [i for i, (ref, model) in enumerate(zip(refs, models)) if model is None and ref.version is None]
+        in_flight = [self.session.get(keys.model_fetch(refs[i].path)) for i in missing]
+        for i, replies in zip(missing, in_flight):
+            for r in replies:
+                r: zenoh.Reply
+                if r.ok is None:
+                    continue
+                pulled = self._decode_model(r.ok, refs[i].path)
+                if pulled is not None and (models[i] is None or pulled.version > models[i].version): # type: ignore
+                    models[i] = pulled
+        return models
+
     # TODO: just take a DataModelType as the argument
     # we expand everything when we return it
     def pull_model(self, path: str, version: int | None = None) -> DataModelConfig | None:
-        if version is not None:
-            model = self._pull_model_with_version(path, version)
-            if not model:
-                logger.info(f"No model at path {path} with version {version}")
-                return None
-        else:
-            models = self._pull_all_model_versions(path)
-            if not models:
-                logger.info(f"No model at path {path}")
-                return None
-            model = max(models, key=lambda m : m.version)
-        
-        if model.parent is not None:
-            if not self._fetch(model.parent):
-                logger.warning(f"Unable to fetch parent model {model.parent.path}")
-        for item in model.items:
-            ref = item.get_model_ref()
-            if not ref:
-                continue
-            if not self._fetch(ref):
-                logger.warning(f"Unable to fetch model {item.path} for tag at path {item.path}")
-        return model
+        '''
+        Pulls the model at path (the latest version if version is None) along with every model it depends on
+        (its parent and the models of its items, recursively). Every level of the dependency graph is pulled
+        concurrently, each model only once, and everything pulled is added to the model registry together
+
+        Arguments:
+            path (str): The path of the model
+            version (int | None): The version of the model, None for the latest
+
+        Returns:
+            DataModelConfig | None: The model, None if it could not be found
+        '''
+        from gedge.py_proto.model_registry import model_registry
+        root_ref = DataModelRef(path, version)
+        requested: set[tuple[str, int | None]] = {(path, version)}
+        pulled: dict[tuple[str, int], DataModelConfig] = dict()
+        root: DataModelConfig | None = None
+        level = [root_ref]
+        while level:
+            logger.debug(f"Pulling models {[ref.full_path for ref in level]}")
+            next_level: list[DataModelRef] = []
+            for ref, model in zip(level, self._pull_models(level)):
+                if model is None:
+                    if ref is root_ref:
+                        logger.info(f"No model at path {path}" + (f" with version {version}" if version is not None else ""))
+                        return None
+                    logger.warning(f"Unable to fetch model {ref.full_path}")
+                    continue
+                if ref is root_ref:
+                    root = model
+                pulled[(model.path, model.version)] = model
+                deps = [item.get_model_ref() for item in model.items] + [model.parent]
+                for dep in deps:
+                    if dep is None or (dep.path, dep.version) in requested or (dep.path, dep.version) in pulled:
+                        continue
+                    requested.add((dep.path, dep.version))
+                    next_level.append(dep)
+            level = next_level
+        model_registry().add_all(pulled.values())
+        return root
     
     def push_model(self, model: DataModelConfig, push_embedded: bool = True) -> bool:
-        res = self.pull_model(model.path)
+        res = self._pull_models([DataModelRef(model.path)])[0]
         if res and res.version + 1 != model.version:
             # TODO: here we may check for equality of models before updating the version, 
             # but for now we just update and push
@@ -818,6 +1478,7 @@ class Comm:
     def _put_model(self, model: DataModelConfig):
         key_expr = keys.model_path(model.path, model.version)
         self._send_proto(key_expr, model.to_proto())
+        self._send_proto(keys.model_latest_pointer(model.path), model.to_proto())
 
     def fetch_model(self, config: DataItemConfig) -> DataModelConfig | None:
         ref = config.get_model_ref()
@@ -827,6 +1488,3 @@ class Comm:
     
     def _fetch(self, ref: DataModelRef) -> DataModelConfig | None:
         return self.pull_model(ref.path, ref.version)
-    
-    def send_group(self, key_expr: str, proto: proto.TagGroup):
-        self._send_proto(key_expr, proto)
\ No newline at end of file
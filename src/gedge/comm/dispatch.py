@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import concurrent.futures
+from dataclasses import dataclass
+from enum import Enum
+import inspect
+import threading
+from typing import Any, Callable
+
+import logging
+logger = logging.getLogger(__name__)
+
+class DispatchMode(Enum):
+    '''
+    Where user callbacks run once zenoh hands a sample to gedge.
+
+    INLINE: on zenoh's callback thread (the default, and how gedge has always behaved). A slow callback stalls every delivery behind it.
+    POOL: on a bounded pool of worker threads. Callbacks run concurrently, so samples can be delivered out of order.
+    SERIAL: on worker threads, but every key expression always lands on the same worker, so samples on one key are delivered in order.
+    ASYNCIO: on an asyncio event loop (the passed one, or one running on a background thread). Callbacks that return a coroutine are awaited.
+    '''
+    INLINE = 0
+    POOL = 1
+    SERIAL = 2
+    ASYNCIO = 3
+
+class Backpressure(Enum):
+    '''
+    What happens when a callback is dispatched while the dispatcher's queue is full.
+
+    BLOCK: wait (on zenoh's callback thread) until there is room, nothing is lost.
+    DROP_OLDEST: drop the oldest callback still waiting in the queue, good for telemetry where only the latest value matters.
+    DROP_NEWEST: drop the callback being dispatched.
+    '''
+    BLOCK = 0
+    DROP_OLDEST = 1
+    DROP_NEWEST = 2
+
+@dataclass
+class DispatchStats:
+    mode: DispatchMode
+    submitted: int = 0
+    completed: int = 0
+    dropped: int = 0
+    errors: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+_Task = tuple[Callable[..., Any], tuple[Any, ...]]
+
+_shared_loop: asyncio.AbstractEventLoop | None = None
+_shared_loop_lock = threading.Lock()
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    '''
+    The event loop that async callbacks (e.g. async method handlers) run on when their dispatcher
+    is not in ASYNCIO mode. Started on a background thread the first time it is needed
+    '''
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = asyncio.new_event_loop()
+            threading.Thread(target=_shared_loop.run_forever, name="gedge-async", daemon=True).start()
+        return _shared_loop
+
+class _Lane:
+    '''
+    A bounded queue of callbacks, drained by one or more workers
+    '''
+    def __init__(self, dispatcher: Dispatcher):
+        self.queue: deque[_Task] = deque()
+        self.cond = threading.Condition()
+        self.dispatcher = dispatcher
+
+    def put(self, task: _Task) -> bool:
+        d = self.dispatcher
+        with self.cond:
+            if len(self.queue) >= d.max_queue:
+                match d.backpressure:
+                    case Backpressure.BLOCK:
+                        while len(self.queue) >= d.max_queue and not d._closed:
+                            self.cond.wait()
+                    case Backpressure.DROP_OLDEST:
+                        self.queue.popleft()
+                        d._count("dropped")
+                    case Backpressure.DROP_NEWEST:
+                        d._count("dropped")
+                        return False
+            if d._closed:
+                return False
+            self.queue.append(task)
+            d._track_depth(len(self.queue))
+            self.cond.notify_all()
+            return True
+
+    def get(self, block: bool = True) -> _Task | None:
+        with self.cond:
+            while not self.queue:
+                if self.dispatcher._closed or not block:
+                    return None
+                self.cond.wait()
+            task = self.queue.popleft()
+            self.cond.notify_all()
+            return task
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+class Dispatcher:
+    '''
+    Runs user callbacks (tag data, groups, state, meta, liveliness, tag writes and method calls)
+    off of zenoh's callback thread according to the passed DispatchMode.
+
+    Example Implementation:
+        # slow method handlers get their own pool so they cannot starve telemetry
+        handlers = Dispatcher(DispatchMode.POOL, workers=8)
+        telemetry = Dispatcher(DispatchMode.SERIAL, workers=2, backpressure=Backpressure.DROP_OLDEST)
+        with gedge.connect(config, "...", telemetry_dispatcher=telemetry, handler_dispatcher=handlers) as session:
+            ...
+    '''
+    def __init__(self, mode: DispatchMode = DispatchMode.INLINE, workers: int = 4, max_queue: int = 1024, backpressure: Backpressure = Backpressure.BLOCK, loop: asyncio.AbstractEventLoop | None = None, name: str = "gedge-dispatch"):
+        if workers < 1:
+            raise ValueError(f"dispatcher needs at least one worker, got {workers}")
+        if max_queue < 1:
+            raise ValueError(f"dispatcher queue must hold at least one callback, got {max_queue}")
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.backpressure = backpressure
+        self.name = name
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = DispatchStats(mode)
+        self._threads: list[threading.Thread] = []
+        self._lanes: list[_Lane] = []
+        self.loop = loop
+
+        match mode:
+            case DispatchMode.POOL:
+                lane = _Lane(self)
+                self._lanes.append(lane)
+                for i in range(workers):
+                    self._start_thread(f"{name}-{i}", lane)
+            case DispatchMode.SERIAL:
+                for i in range(workers):
+                    lane = _Lane(self)
+                    self._lanes.append(lane)
+                    self._start_thread(f"{name}-{i}", lane)
+            case DispatchMode.ASYNCIO:
+                self._lanes.append(_Lane(self))
+                if self.loop is None:
+                    self.loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def _start_thread(self, name: str, lane: _Lane):
+        thread = threading.Thread(target=self._work, args=[lane], name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            setattr(self._stats, stat, getattr(self._stats, stat) + n)
+
+    def _track_depth(self, depth: int):
+        with self._lock:
+            self._stats.max_queue_depth = max(self._stats.max_queue_depth, depth)
+
+    def submit(self, key: str, func: Callable[..., Any], *args: Any) -> bool:
+        '''
+        Dispatches func(*args)
+
+        Arguments:
+            key (str): The key expression the callback is for, callbacks on the same key are kept in order in SERIAL mode
+            func (Callable): The callback
+            *args (Any): The arguments to call it with
+
+        Returns:
+            bool: False if the callback was dropped
+        '''
+        self._count("submitted")
+        match self.mode:
+            case DispatchMode.INLINE:
+                self._run(func, args)
+                return True
+            case DispatchMode.POOL:
+                return self._lanes[0].put((func, args))
+            case DispatchMode.SERIAL:
+                return self._lanes[hash(key) % len(self._lanes)].put((func, args))
+            case DispatchMode.ASYNCIO:
+                assert self.loop is not None
+                if not self._lanes[0].put((func, args)):
+                    return False
+                self.loop.call_soon_threadsafe(self._drain_async)
+                return True
+
+    def _run(self, func: Callable[..., Any], args: tuple[Any, ...]):
+        try:
+            res = func(*args)
+            if inspect.iscoroutine(res):
+                future = asyncio.run_coroutine_threadsafe(res, shared_loop())
+                if self.mode == DispatchMode.INLINE:
+                    # don't hold zenoh's thread, many async callbacks can be in flight at once
+                    future.add_done_callback(self._on_async_done)
+                    return
+                # workers wait, so the pool still bounds how many callbacks run at once (and SERIAL stays in order)
+                future.result()
+            self._count("completed")
+        except Exception as e:
+            self._count("errors")
+            logger.exception(f"Callback {getattr(func, '__name__', func)} raised {repr(e)}")
+
+    def _work(self, lane: _Lane):
+        while True:
+            task = lane.get()
+            if task is None:
+                return
+            self._run(*task)
+
+    def _drain_async(self):
+        # one call is scheduled per submitted callback, but DROP_OLDEST may have emptied the queue already
+        task = self._lanes[0].get(block=False)
+        if task is None:
+            return
+        func, args = task
+        try:
+            res = func(*args)
+        except Exception as e:
+            self._count("errors")
+            logger.exception(f"Callback {getattr(func, '__name__', func)} raised {repr(e)}")
+            return
+        if not inspect.iscoroutine(res):
+            self._count("completed")
+            return
+        task = asyncio.ensure_future(res, loop=self.loop)
+        task.add_done_callback(self._on_async_done)
+
+    def _on_async_done(self, task: asyncio.Future | concurrent.futures.Future):
+        if task.cancelled():
+            self._count("dropped")
+        elif task.exception() is not None:
+            self._count("errors")
+            logger.error(f"Async callback raised {repr(task.exception())}")
+        else:
+            self._count("completed")
+
+    def stats(self) -> DispatchStats:
+        '''
+        Returns a snapshot of how many callbacks were dispatched, completed, dropped and raised, and how deep the queues are
+
+        Arguments:
+            None
+
+        Returns:
+            DispatchStats
+        '''
+        with self._lock:
+            return DispatchStats(
+                self._stats.mode,
+                self._stats.submitted,
+                self._stats.completed,
+                self._stats.dropped,
+                self._stats.errors,
+                sum(len(lane) for lane in self._lanes),
+                self._stats.max_queue_depth,
+            )
+
+    def close(self):
+        '''
+        Stops accepting callbacks. Workers finish what is already queued and exit
+        '''
+        self._closed = True
+        for lane in self._lanes:
+            with lane.cond:
+                lane.cond.notify_all()
+        if self.mode == DispatchMode.ASYNCIO and self._threads and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -1,5 +1,4 @@
 from __future__ import annotations
-from sys import version
 
 import zenoh
 
@@ -14,6 +13,7 @@ RESPONSE = "RESPONSE"
 SUBNODES = "SUBNODES"
 MODELS = "MODELS"
 VERSION = "VERSION"
+LATEST = "LATEST"
 GROUPS = "GROUPS"
 
 import logging
@@ -52,6 +52,10 @@ def liveliness_key_prefix(prefix: str, name: str):
 def subnodes_key_prefix(prefix: str, node_name: str):
     return key_join(node_key_prefix(prefix, node_name), SUBNODES)
 
+# every node's meta and liveliness token, for discovering the nodes on the network
+META_WILDCARD = key_join("**", NODE, "*", META)
+LIVELINESS_WILDCARD = key_join("**", NODE, "*")
+
 def method_response_from_call(key_expr: str):
     return key_join(key_expr, RESPONSE)
 
@@ -80,37 +84,57 @@ def model_path(path: str, version: int) -> str:
 def model_path_latest(path: str) -> str:
     return key_join(MODELS, path)
 
+def model_latest_pointer(path: str) -> str:
+    # a copy of the newest version of the model, written on every push
+    return key_join(MODELS, path, LATEST)
+
+def _find_component(key_expr: str, component: str, start: int = 0) -> int:
+    # index of the first whole component equal to component at or after start, -1 if there is none
+    # (key_expr is padded with / so that the first and last components match too)
+    return f"/{key_expr}/".find(f"/{component}/", start)
+
+def _node_bounds(key_expr: str) -> tuple[int, int]:
+    # (start, end) of the node name, the component right after NODE
+    i = _find_component(key_expr, NODE)
+    if i == -1:
+        raise ValueError(f"Invalid key expr {key_expr}")
+    start = i + len(NODE) + 1
+    end = key_expr.find("/", start)
+    return start, len(key_expr) if end == -1 else end
+
 def internal_to_user_key(key_expr: str):
-    prefix = NodeKeySpace.prefix_from_key(key_expr)
-    name = NodeKeySpace.name_from_key(key_expr)
-    return key_join(prefix, name)
+    start, end = _node_bounds(key_expr)
+    # everything before /NODE/ is the prefix
+    return key_expr[:max(start - len(NODE) - 2, 0)] + "/" + key_expr[start:end]
 
 def overlap(key1: str, key2: str):
     k1 = zenoh.KeyExpr(key1)
     return k1.intersects(zenoh.KeyExpr(key2))
 
-def tag_path_from_key(key_expr: str):
-    components = key_expr.split("/")
-    try:
-        i = components.index(DATA)
-    except:
-        try: 
-            i = components.index(WRITE)
-        except:
+def _tag_path_start(key_expr: str) -> int:
+    i = _find_component(key_expr, DATA)
+    if i == -1:
+        i = _find_component(key_expr, WRITE)
+        if i == -1:
             raise ValueError(f"No tag path found in {key_expr}")
-    return key_join(*components[(i + 1):])
+        return i + len(WRITE) + 1
+    return i + len(DATA) + 1
+
+def tag_path_from_key(key_expr: str):
+    return key_expr[_tag_path_start(key_expr):]
 
 def group_path_from_key(key_expr: str):
-    components = key_expr.split("/")
-    try:
-        j = components.index(DATA)
-    except:
-        try: 
-            j = components.index(WRITE)
-        except:
-            raise ValueError(f"No tag path found in {key_expr}")
-    i = components.index(GROUPS)
-    return key_join(*components[(i+1):j])
+    # .../GROUPS/<group path>/DATA or .../GROUPS/<group path>/WRITE
+    i = _find_component(key_expr, GROUPS)
+    if i == -1:
+        raise ValueError(f"No group path found in {key_expr}")
+    start = i + len(GROUPS) + 1
+    end = _find_component(key_expr, DATA, start)
+    if end == -1:
+        end = _find_component(key_expr, WRITE, start)
+        if end == -1:
+            raise ValueError(f"No group path found in {key_expr}")
+    return key_expr[start:end - 1]
 
 # this defines a key prefix and a name
 class NodeKeySpace:
@@ -141,55 +165,37 @@ class NodeKeySpace:
 
     @staticmethod
     def name_from_key(key_expr: str):
-        components = key_expr.split("/")
-        return components[components.index(NODE) + 1]
+        start, end = _node_bounds(key_expr)
+        return key_expr[start:end]
 
     @staticmethod
     def prefix_from_key(key_expr: str):
-        components = key_expr.split(NODE)
-        return components[0][:-1]
+        start, _ = _node_bounds(key_expr)
+        return key_expr[:max(start - len(NODE) - 2, 0)]
     
     @staticmethod
     def internal_to_user_key(key_expr: str):
-        prefix = NodeKeySpace.prefix_from_key(key_expr)
-        name = NodeKeySpace.name_from_key(key_expr)
-        return key_join(prefix, name)
+        return internal_to_user_key(key_expr)
     
     @staticmethod
     def tag_path_from_key(key_expr: str):
-        components = key_expr.split("/")
-        try:
-            i = components.index(DATA)
-        except:
-            try: 
-                i = components.index(WRITE)
-            except:
-                raise ValueError(f"No tag path found in {key_expr}")
-        return key_join(*components[(i + 1):])
+        return tag_path_from_key(key_expr)
     
     @staticmethod
     def method_path_from_call_key(key_expr: str):
-        components = key_expr.split("/")
-        try:
-            i = components.index(METHODS)
-        except:
+        # .../METHODS/<method path>/<caller_id>/<method_query_id>/RESPONSE
+        i = _find_component(key_expr, METHODS)
+        if i == -1:
             raise ValueError(f"No method path found in {key_expr}")
-        return key_join(*components[(i + 1):(len(components) - 3)])
+        return key_expr[i + len(METHODS) + 1:].rsplit("/", 3)[0]
 
     @staticmethod
     def method_path_from_response_key(key_expr: str):
-        key_expr = NodeKeySpace.method_path_from_call_key(key_expr)
-        components = key_expr.split("/")
-        return key_join(*components[:-1])
+        return NodeKeySpace.method_path_from_call_key(key_expr).rpartition("/")[0]
     
     @staticmethod
     def user_key_from_key(key_expr: str):
-        components = key_expr.split("/")
-        try:
-            i = components.index(NODE)
-        except:
-            raise ValueError(f"Invalid key expr {key_expr}")
-        return key_join(*components[:i], components[i + 1])
+        return internal_to_user_key(key_expr)
 
     @property
     def prefix(self):
@@ -224,6 +230,7 @@ class NodeKeySpace:
         self.meta_key_prefix = meta_key_prefix(prefix, name)
         self.state_key_prefix = state_key_prefix(prefix, name)
         self.tag_data_key_prefix = tag_data_key_prefix(prefix, name)
+        self._tag_data_prefix_len = len(self.tag_data_key_prefix) + 1
         self.tag_write_key_prefix = tag_write_key_prefix(prefix, name)
         self.group_key_prefix = key_join(self.node_key_prefix, TAGS, GROUPS)
         self.liveliness_key_prefix = liveliness_key_prefix(prefix, name)
@@ -232,6 +239,12 @@ class NodeKeySpace:
     
     def tag_data_path(self, path: str):
         return key_join(self.tag_data_key_prefix, path)
+
+    def tag_path_from_data_key(self, key_expr: str):
+        '''
+        The tag path of a tag data key expression of this node, one slice (the key expression is not checked)
+        '''
+        return key_expr[self._tag_data_prefix_len:]
     
     def tag_write_path(self, path: str):
         return key_join(self.tag_write_key_prefix, path)
@@ -256,10 +269,7 @@ class NodeKeySpace:
         return key_join(self.method_path(path), "*", "*")
     
     def contains(self, key_expr: str):
-        name = self.name_from_key(key_expr)
-        prefix = self.prefix_from_key(key_expr)
-        # logger.debug(f"Comparing {name}:{self.name} and {prefix}:{self.prefix}")
-        return name == self.name and prefix == self.prefix
+        return internal_to_user_key(key_expr) == self.user_key
     
     def __repr__(self) -> str:
         return self.node_key_prefix
@@ -291,7 +301,9 @@ class SubnodeKeySpace(NodeKeySpace):
         self.subnode_key_prefix = key_prefix
         self.state_key_prefix = key_join(key_prefix, STATE)
         self.tag_data_key_prefix = key_join(key_prefix, TAGS, DATA)
+        self._tag_data_prefix_len = len(self.tag_data_key_prefix) + 1
         self.tag_write_key_prefix = key_join(key_prefix, TAGS, WRITE)
+        self.group_key_prefix = key_join(key_prefix, TAGS, GROUPS)
         self.method_key_prefix = key_join(key_prefix, METHODS)
         self.subnodes_key_prefix = key_join(key_prefix, SUBNODES)
 
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import threading
+import zenoh
+from gedge import proto
+from gedge.comm.keys import LIVELINESS_WILDCARD, META_WILDCARD, NodeKeySpace, internal_to_user_key
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from gedge.comm.comm import Comm
+    from gedge.comm.subscriptions import Subscription
+    from gedge.node.gtypes import MetaCallback
+    from gedge.py_proto.meta import Meta
+
+import logging
+logger = logging.getLogger(__name__)
+
+class MetaCache:
+    '''
+    The Metas of remote nodes, shared by every RemoteConnection of a session and keyed by node key.
+    One wildcard subscription on **/NODE/*/META keeps the cache current, and every connection to a
+    node is told when it republishes its Meta. Metas are only parsed when someone asks for them.
+
+    populate() fills the cache with one query for every Meta on the network and one liveliness
+    query, and is_online() answers from that snapshot of the online nodes without a query. Once a
+    node goes offline, the next is_online() refreshes the whole snapshot with one liveliness query.
+    '''
+    def __init__(self, comm: Comm):
+        self._comm = comm
+        self._lock = threading.RLock()
+        self._protos: dict[str, proto.Meta] = dict() # user_key -> proto, parsed on demand
+        self._metas: dict[str, Meta] = dict() # user_key -> Meta
+        self._listeners: dict[str, list[MetaCallback]] = dict() # user_key -> callbacks
+        self._online: set[str] | None = None # user keys of online nodes, None until populated
+        self._stale = False # a node went offline since the snapshot was taken
+        self._came_online: set[str] | None = None # user keys that came online while the snapshot is refreshed
+        self._meta_subscriber: Subscription | None = None
+        self._liveliness_subscriber: zenoh.Subscriber | None = None
+
+    def start(self) -> None:
+        '''
+        Declares the wildcard Meta subscription if it is not declared already
+        '''
+        with self._lock:
+            if self._meta_subscriber is not None:
+                return
+            self._meta_subscriber = self._comm._subscriber(META_WILDCARD, self._on_meta)
+
+    def populate(self) -> None:
+        '''
+        Pulls every Meta on the network and which nodes are online, in one round trip each
+
+        Arguments:
+            None
+
+        Returns:
+            None
+        '''
+        # subscribe first, so nothing published while the queries are in flight is missed
+        self.start()
+        self._watch_liveliness()
+        protos, online = self._comm._query_network()
+        pulled = 0
+        with self._lock:
+            # whatever the subscription saw come online while the query was in flight is still online
+            self._online = online if self._online is None else self._online | online
+            for meta in protos:
+                # a Meta that came in on the subscription while we were querying is at least as new
+                if meta.key not in self._protos:
+                    self._protos[meta.key] = meta
+                    pulled += 1
+        logger.info(f"Cached {pulled} metas, {len(online)} nodes online")
+
+    def _watch_liveliness(self) -> None:
+        with self._lock:
+            if self._liveliness_subscriber is not None:
+                return
+            subscriber = self._comm.session.liveliness().declare_subscriber(LIVELINESS_WILDCARD, self._on_liveliness)
+            self._liveliness_subscriber = subscriber
+        self._comm.subscriptions.add(LIVELINESS_WILDCARD, subscriber)
+
+    def _on_liveliness(self, sample: zenoh.Sample) -> None:
+        key = internal_to_user_key(str(sample.key_expr))
+        with self._lock:
+            if self._online is None:
+                return
+            if sample.kind == zenoh.SampleKind.PUT:
+                self._online.add(key)
+                if self._came_online is not None:
+                    self._came_online.add(key)
+            else:
+                # the key of a liveliness DELETE is not always the token that went away when many
+                # sessions share a router, so the whole snapshot is refreshed before it is used again
+                self._online.discard(key)
+                self._stale = True
+
+    def _on_meta(self, sample: zenoh.Sample) -> None:
+        try:
+            meta_proto: proto.Meta = self._comm.deserialize(proto.Meta(), sample.payload.to_bytes())
+        except Exception as e:
+            logger.warning(f"Could not decode meta on {sample.key_expr}: {repr(e)}")
+            return
+        key = meta_proto.key
+        logger.debug(f"Received meta from {key}")
+        with self._lock:
+            self._protos[key] = meta_proto
+            self._metas.pop(key, None)
+            listeners = list(self._listeners.get(key, []))
+        if not listeners:
+            return
+        meta = self.get(NodeKeySpace.from_user_key(key))
+        for listener in listeners:
+            try:
+                listener(str(sample.key_expr), meta)
+            except Exception as e:
+                logger.exception(f"Meta listener for {key} raised {repr(e)}")
+
+    def get(self, ks: NodeKeySpace) -> Meta:
+        '''
+        Returns the Meta of the passed node, pulling it from the network if it is not cached
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+
+        Returns:
+            Meta
+        '''
+        from gedge.py_proto.meta import Meta
+        key = ks.user_key
+        with self._lock:
+            if key in self._metas:
+                return self._metas[key]
+            meta_proto = self._protos.get(key)
+        if meta_proto is None:
+            meta = self._comm.pull_meta_message(ks)
+        else:
+            meta = Meta.from_proto(meta_proto)
+        with self._lock:
+            # a newer Meta may have arrived while this one was parsed
+            if self._protos.get(key, meta_proto) is meta_proto:
+                self._metas[key] = meta
+        return meta
+
+    def is_online(self, ks: NodeKeySpace) -> bool:
+        '''
+        Returns the liveliness of the passed node, without a query once the cache is populated
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+
+        Returns:
+            bool
+        '''
+        with self._lock:
+            populated = self._online is not None
+            if populated and not self._stale:
+                return ks.user_key in self._online # type: ignore
+            if populated:
+                self._stale = False
+                self._came_online = set()
+        if not populated:
+            return self._comm.is_online(ks)
+        try:
+            online = self._comm._query_online()
+        except Exception:
+            with self._lock:
+                self._stale = True
+                self._came_online = None
+            raise
+        with self._lock:
+            # a node that goes offline while the query is in flight leaves the snapshot stale again
+            self._online = online | (self._came_online or set())
+            self._came_online = None
+            return ks.user_key in self._online
+
+    def add_listener(self, ks: NodeKeySpace, on_meta: MetaCallback) -> None:
+        '''
+        Calls on_meta (on zenoh's thread) every time the passed node publishes a new Meta
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+            on_meta (MetaCallback): The callback
+
+        Returns:
+            None
+        '''
+        self.start()
+        with self._lock:
+            self._listeners.setdefault(ks.user_key, []).append(on_meta)
+
+    def remove_listeners(self, ks: NodeKeySpace) -> None:
+        '''
+        Forgets every listener on the passed node
+
+        Arguments:
+            ks (NodeKeySpace): The key space of the node
+
+        Returns:
+            None
+        '''
+        with self._lock:
+            self._listeners.pop(ks.user_key, None)
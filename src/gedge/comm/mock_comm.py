@@ -2,11 +2,16 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass
+import threading
 import zenoh
 from gedge.comm.comm import Comm
+from gedge.comm.dispatch import Dispatcher, DispatchMode
+from gedge.comm.meta_cache import MetaCache
+from gedge.comm.sequence_number import SequenceNumbers, SequenceTracker
 from gedge import proto
 from gedge.comm import keys
 from gedge.comm.keys import NodeKeySpace
+from gedge.comm.wire_format import WireFormat
 
 from typing import Any, TYPE_CHECKING, Callable, override
 
@@ -15,7 +20,6 @@ from gedge.node.gtypes import MethodHandler, MethodReplyCallback, TagBaseValue,
 from gedge.node.method import MethodConfig
 from gedge.py_proto.data_model import DataItem
 from gedge.node.query import TagWriteQuery
-import threading
 
 from gedge.py_proto.meta import Meta
 from gedge.py_proto.tag_config import Tag, TagConfig, ResponseConfig
@@ -25,10 +29,21 @@ if TYPE_CHECKING:
 import logging
 logger = logging.getLogger(__name__)
 
+@dataclass
+class MockPayload:
+    b: bytes
+
+    def to_bytes(self) -> bytes:
+        return self.b
+
 @dataclass
 class MockSample:
+    '''
+    Stands in for a zenoh.Sample, carrying the payload exactly as it would have gone over the wire
+    '''
     key_expr: str
-    value: ProtoMessage
+    payload: MockPayload
+    attachment: MockPayload | None = None
 
 MockCallback = Callable[[MockSample], None]
 
@@ -46,6 +61,23 @@ class MockComm(Comm):
         self.subscribers: dict[str, list[MockCallback]] = defaultdict(list)
         self.active_methods: dict[str, MethodReplyCallback] = dict()
         self.metas: dict[str, Meta] = dict()
+        self.online: set[str] = set() # user keys of the nodes holding a liveliness token
+        self.wire_formats: dict[str, WireFormat] = dict()
+        self.group_decoders = dict()
+        self.response_subscribers = dict()
+        self.pending_calls = dict()
+        self._subscriptions_lock = threading.RLock()
+        self._pending_calls_lock = threading.Lock()
+        self._pending_calls_cond = threading.Condition(self._pending_calls_lock)
+        self._pending_calls_watcher = None
+        self._pending_calls_closed = False
+        self.sequence_numbers = SequenceNumbers()
+        self.sequence_tracker = SequenceTracker()
+        self.meta_cache = MetaCache(self)
+        self.telemetry_dispatcher = Dispatcher(DispatchMode.INLINE, name="mock-telemetry")
+        self.handler_dispatcher = Dispatcher(DispatchMode.INLINE, name="mock-handlers")
+        # messages are delivered off of the sender's thread, like they would be over the network
+        self.network = Dispatcher(DispatchMode.POOL, name="mock-network")
 
     def __enter__(self):
         logger.info(f"Mock connection")
@@ -53,13 +85,29 @@ class MockComm(Comm):
     
     def __exit__(self, *exc):
         logger.info(f"Closing mock connection")
+        self.network.close()
+        self._close_pending_calls()
+        self.telemetry_dispatcher.close()
+        self.handler_dispatcher.close()
 
-    def _send_proto(self, key_expr: str, value: ProtoMessage):
+    def _send_proto(self, key_expr: str, value: ProtoMessage, wire_format: WireFormat = WireFormat.BASE64, attachment: MockPayload | None = None):
+        # encoded like it would be for the network, so the receiving end decodes with the format it expects
+        payload = MockPayload(self.serialize(value, wire_format))
         for key in self.subscribers:
             if keys.overlap(key, key_expr):
                 for handler in self.subscribers[key]:
-                    thread = threading.Thread(target=handler, args=[MockSample(key_expr, value)])
-                    thread.start()
+                    self.network.submit(key_expr, handler, MockSample(key_expr, payload, attachment))
+
+    def publisher(self, key_expr: str):
+        # nothing to declare, publish goes through _send_proto
+        return None
+
+    def publish(self, publisher, key_expr: str, value: ProtoMessage, wire_format: WireFormat = WireFormat.BASE64):
+        self._send_proto(key_expr, value, wire_format, MockPayload(self.sequence_numbers.next(key_expr)))
+
+    def publish_many(self, values: list, wire_format: WireFormat = WireFormat.BASE64):
+        for _, key_expr, value in values:
+            self.publish(None, key_expr, value, wire_format)
 
     def _subscriber(self, key_expr: str, handler: MockCallback):
         self.subscribers[key_expr].append(handler)
@@ -67,20 +115,8 @@ class MockComm(Comm):
     def cancel_subscription(self, key_expr: str):
         self.subscribers[key_expr] = []
     
-    def _on_method_reply(self, on_reply: MethodReplyCallback, method: MethodConfig) -> MockCallback:
-        def _on_reply(reply: MockSample) -> None:
-            assert type(reply.value) == proto.Response
-            self._handle_on_method_reply(method, reply.key_expr, reply.value, on_reply)
-        return _on_reply
-    
-    def _method_reply(self, key_expr: str, method: MethodConfig):
-        return super()._method_reply(key_expr, method)
-    
-    def _on_method_query(self, method: MethodConfig):
-        def _on_query(sample: MockSample) -> None:
-            assert type(sample.value) == proto.MethodCall
-            self._handle_method_query(method, sample.key_expr, sample.value)
-        return _on_query
+    def _method_reply(self, key_expr: str, method: MethodConfig, wire_format: WireFormat = WireFormat.BASE64):
+        return super()._method_reply(key_expr, method, wire_format)
     
     def method_queryable(self, ks: NodeKeySpace, method: MethodConfig) -> None:
         super().method_queryable(ks, method)
@@ -96,5 +132,8 @@ class MockComm(Comm):
         pass
     
     def liveliness_token(self, ks: NodeKeySpace) -> None:
-        # MockComm doesn't worry about this for now, but we need to override Comm
-        pass
\ No newline at end of file
+        # no liveliness subscribers are told, but the node does count as online
+        self.online.add(ks.user_key)
+
+    def is_online(self, ks: NodeKeySpace) -> bool:
+        return ks.user_key in self.online
\ No newline at end of file
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import Enum
+import json
+from typing import Any
+
+import zenoh
+
+from gedge.comm.sequence_number import SequenceFormat
+
+import logging
+logger = logging.getLogger(__name__)
+
+class SessionMode(Enum):
+    '''
+    CLIENT: connect to the listed routers, which route everything (how gedge has always behaved).
+    PEER: also talk directly to other peers, e.g. processes on the same host, without a hop through a router.
+    '''
+    CLIENT = "client"
+    PEER = "peer"
+
+@dataclass
+class Traffic:
+    '''
+    The zenoh quality of service of one kind of traffic.
+    express sends a message right away instead of waiting for it to be batched with others
+    '''
+    priority: zenoh.Priority
+    congestion_control: zenoh.CongestionControl
+    express: bool = False
+
+    def kwargs(self) -> dict[str, Any]:
+        return {"priority": self.priority, "congestion_control": self.congestion_control, "express": self.express}
+
+def _telemetry() -> Traffic:
+    # only the latest value of a tag matters, so a congested link drops samples instead of stalling the node
+    return Traffic(zenoh.Priority.DATA_LOW, zenoh.CongestionControl.DROP, express=False)
+
+def _control() -> Traffic:
+    # tag writes, method calls and their replies, state and meta must arrive, and someone is waiting on them
+    return Traffic(zenoh.Priority.INTERACTIVE_HIGH, zenoh.CongestionControl.BLOCK, express=True)
+
+@dataclass
+class CommOptions:
+    '''
+    How a session talks to zenoh. The defaults are a client session, like gedge has always opened.
+
+    Example Implementation:
+        options = gedge.CommOptions(mode=gedge.SessionMode.PEER, shared_memory=True)
+        with gedge.connect(config, "192.168.4.60", options=options) as session:
+            ...
+
+    Tag and group data is sent as telemetry, everything else (tag writes, method calls, replies, state, meta) as control.
+    '''
+    mode: SessionMode = SessionMode.CLIENT
+    listen: list[str] = field(default_factory=list) # endpoints other peers can connect to in peer mode, e.g. "tcp/0.0.0.0:0"
+    connect_timeout: float = 3.0 # seconds
+    shared_memory: bool = False # hand large payloads to processes on the same host through shared memory
+    batching: bool = True # let zenoh batch messages that are not express into one network message
+    telemetry: Traffic = field(default_factory=_telemetry)
+    control: Traffic = field(default_factory=_control)
+    drop_stale: bool = False # drop tag and group data that is a duplicate of, or older than, data already received on its key
+    sequence_format: SequenceFormat = SequenceFormat.TEXT # how tag and group data is sequenced, BINARY breaks older gedge receivers
+    zenoh_config: dict[str, Any] = field(default_factory=dict) # any other zenoh config by path, e.g. {"transport/link/tx/lease": 5000}, applied last
+
+    def to_zenoh_config(self, connections: list[str]) -> zenoh.Config:
+        '''
+        Returns the zenoh config of a session with these options that connects to the passed endpoints
+
+        Arguments:
+            connections (list[str]): The endpoints to connect to
+
+        Returns:
+            zenoh.Config
+        '''
+        config = zenoh.Config.from_json5(json.dumps({
+            "mode": self.mode.value,
+            "connect": {
+                "endpoints": connections,
+                "timeout_ms": int(self.connect_timeout * 1000),
+                "exit_on_failure": True
+            },
+        }))
+        if self.listen:
+            config.insert_json5("listen/endpoints", json.dumps(self.listen))
+        config.insert_json5("transport/shared_memory/enabled", json.dumps(self.shared_memory))
+        config.insert_json5("transport/link/tx/queue/batching/enabled", json.dumps(self.batching))
+        for path, value in self.zenoh_config.items():
+            config.insert_json5(path, json.dumps(value))
+        return config
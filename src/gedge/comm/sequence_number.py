@@ -1,17 +1,209 @@
-from dataclasses import dataclass, field
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+import itertools
+import os
+import struct
+import threading
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import zenoh
+
+import logging
+logger = logging.getLogger(__name__)
+
+class SequenceFormat(Enum):
+    '''
+    How the sequence number attached to every tag and group data put is encoded. Both carry the epoch of the sending
+    session (random, so a restarted node is told apart from a reordered one) and the sequence number of the put on its
+    key expression, and receivers read both.
+
+    TEXT: "<epoch>:<sequence number>" in ASCII. Older gedge versions decode every attachment as UTF-8 (and fail on
+    anything else), so this is the default.
+    BINARY: 13 packed bytes, cheaper to encode and decode. Only use it once no node on the network runs an older gedge.
+    '''
+    TEXT = "text"
+    BINARY = "binary"
+
+# 0xff never appears in UTF-8, so a binary attachment is never mistaken for a text one
+_BINARY_MARKER = 0xff
+_BINARY = struct.Struct("<BIQ")
+
+# how many sequence numbers below the highest one received are remembered, to tell late samples from duplicates
+WINDOW = 64
+
+class SequenceNumbers:
+    '''
+    The sequence numbers of the tag and group data one session publishes, counted separately for every key expression
+    so that a subscriber on one key sees consecutive numbers. There is one counter per key, so only keys from a fixed set
+    may be sequenced. Thread safe: the counter of a key is created under a lock and advancing an itertools.count is atomic
+    '''
+    def __init__(self, format: SequenceFormat = SequenceFormat.TEXT):
+        self.epoch = int.from_bytes(os.urandom(4), "little")
+        self.format = format
+        self._epoch_text = f"{self.epoch:08x}"
+        self._counters: dict[str, itertools.count] = dict()
+        self._lock = threading.Lock()
+
+    def next(self, key_expr: str) -> bytes:
+        '''
+        Returns the attachment of the next put on key_expr
+
+        Arguments:
+            key_expr (str): The key expression being put on
+
+        Returns:
+            bytes: The encoded epoch and sequence number
+        '''
+        counter = self._counters.get(key_expr)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key_expr, itertools.count())
+        if self.format == SequenceFormat.BINARY:
+            return _BINARY.pack(_BINARY_MARKER, self.epoch, next(counter))
+        return f"{self._epoch_text}:{next(counter)}".encode()
+
+def decode(attachment: zenoh.ZBytes | None) -> tuple[int, int] | None:
+    '''
+    Returns the (epoch, sequence number) in the attachment of a sample, in either SequenceFormat, None if it has none
+    (e.g. sent by an older gedge, whose attachment is a single counter shared by every key)
+    '''
+    if attachment is None:
+        return None
+    b = attachment.to_bytes()
+    if b[:1] == b"\xff":
+        if len(b) != _BINARY.size:
+            return None
+        _, epoch, seq = _BINARY.unpack(b)
+        return epoch, seq
+    epoch, sep, seq = b.partition(b":")
+    if not sep:
+        return None
+    try:
+        return int(epoch, 16), int(seq)
+    except ValueError:
+        return None
 
 @dataclass
-class SequenceNumber:
-    value: int = field(default=0)
-    MAX = 255
-
-    def __int__(self):
-        return self.value
-    
-    def __bytes__(self):
-        return bytes(str(self.value), encoding="utf-8")
-    
-    def increment(self):
-        self.value = (self.value + 1) % self.MAX
-        return self.value
-    
+class SequenceStats:
+    received: int = 0
+    lost: int = 0 # skipped sequence numbers that never arrived (yet)
+    duplicates: int = 0
+    reordered: int = 0 # samples that arrived after a higher sequence number on their key
+    resets: int = 0 # times the sender of a key restarted
+
+    def add(self, other: SequenceStats):
+        self.received += other.received
+        self.lost += other.lost
+        self.duplicates += other.duplicates
+        self.reordered += other.reordered
+        self.resets += other.resets
+
+class _KeyState:
+    __slots__ = ("epoch", "highest", "seen", "stats")
+
+    def __init__(self, epoch: int, seq: int):
+        self.epoch = epoch
+        self.highest = seq
+        self.seen = 1 # bit i is set if highest - i was received
+        self.stats = SequenceStats(received=1)
+
+class SequenceStream:
+    '''
+    The sequence numbers seen by one subscriber, for every key expression it receives samples on.
+    Every subscriber keeps its own, so two subscribers on one key do not see each other's samples as duplicates
+    '''
+    def __init__(self, tracker: SequenceTracker):
+        self._tracker = tracker
+        self._keys: dict[str, _KeyState] = dict()
+        self._lock = threading.Lock()
+
+    def accept(self, key_expr: str, attachment: zenoh.ZBytes | None) -> bool:
+        '''
+        Records the sample on key_expr with the passed attachment
+
+        Arguments:
+            key_expr (str): The key expression of the sample
+            attachment (zenoh.ZBytes | None): The attachment of the sample
+
+        Returns:
+            bool: False if the sample is stale and should be dropped
+        '''
+        sequence = decode(attachment)
+        if sequence is None:
+            return True
+        epoch, seq = sequence
+        with self._lock:
+            state = self._keys.get(key_expr)
+            if state is None:
+                self._keys[key_expr] = _KeyState(epoch, seq)
+                return True
+            stats = state.stats
+            if epoch != state.epoch:
+                stats.resets += 1
+                stats.received += 1
+                state.epoch, state.highest, state.seen = epoch, seq, 1
+                return True
+            if seq > state.highest:
+                gap = seq - state.highest
+                stats.lost += gap - 1
+                stats.received += 1
+                state.seen = ((state.seen << gap) | 1) & ((1 << WINDOW) - 1)
+                state.highest = seq
+                return True
+            behind = state.highest - seq
+            if behind < WINDOW and state.seen & (1 << behind):
+                stats.duplicates += 1
+                return not self._tracker.drop_stale
+            stats.received += 1
+            stats.reordered += 1
+            if behind < WINDOW:
+                # it was counted as lost when a higher number arrived
+                state.seen |= 1 << behind
+                stats.lost -= 1
+            return not self._tracker.drop_stale
+
+    def _add_stats(self, total: SequenceStats, key_expr: str | None):
+        with self._lock:
+            if key_expr is not None:
+                state = self._keys.get(key_expr)
+                if state is not None:
+                    total.add(state.stats)
+                return
+            for state in self._keys.values():
+                total.add(state.stats)
+
+class SequenceTracker:
+    '''
+    Follows the sequence numbers of the samples received by every subscriber of one session, counting lost, duplicate
+    and reordered samples. With drop_stale, duplicates and samples older than one already delivered on their key are
+    not handed to callbacks
+    '''
+    def __init__(self, drop_stale: bool = False):
+        self.drop_stale = drop_stale
+        # a stream lives as long as the handler of its subscriber
+        self._streams: weakref.WeakSet[SequenceStream] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def stream(self) -> SequenceStream:
+        '''
+        Returns the sequence numbers of a new subscriber
+        '''
+        stream = SequenceStream(self)
+        with self._lock:
+            self._streams.add(stream)
+        return stream
+
+    def stats(self, key_expr: str | None = None) -> SequenceStats:
+        '''
+        Returns a snapshot of the counters of the live subscribers on one key expression, or on all of them if key_expr is None
+        '''
+        with self._lock:
+            streams = list(self._streams)
+        total = SequenceStats()
+        for stream in streams:
+            stream._add_stats(total, key_expr)
+        return total
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+from typing import Iterator, TYPE_CHECKING
+
+from gedge.comm.keys import internal_to_user_key
+
+if TYPE_CHECKING:
+    import zenoh
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    '''
+    The handle of one declared subscriber, returned when it is declared and used to undeclare it.
+    owner is the user key of the node the key expression is on (None for key expressions that are not on one node)
+    '''
+    __slots__ = ("key_expr", "owner", "subscriber", "_registry")
+
+    def __init__(self, key_expr: str, owner: str | None, subscriber: zenoh.Subscriber, registry: SubscriptionRegistry):
+        self.key_expr = key_expr
+        self.owner = owner
+        self.subscriber = subscriber
+        self._registry = registry
+
+    def undeclare(self) -> None:
+        self._registry.undeclare(self)
+
+    def __repr__(self) -> str:
+        return f"Subscription({self.key_expr})"
+
+def _owner(key_expr: str) -> str | None:
+    try:
+        owner = internal_to_user_key(key_expr)
+    except ValueError:
+        return None
+    # e.g. **/NODE/*/META, which is on every node
+    return None if "*" in owner else owner
+
+class SubscriptionRegistry:
+    '''
+    Every subscriber declared by one Comm, indexed by exact key expression and by the node that owns it, so that
+    cancelling a key expression or closing a remote only touches the subscribers it undeclares.
+    The owner of a key expression is parsed once, when it is declared.
+    '''
+    def __init__(self):
+        # dicts are used as insertion ordered sets
+        self._by_key: dict[str, dict[Subscription, None]] = dict()
+        self._by_owner: dict[str | None, dict[Subscription, None]] = dict()
+        self._size = 0
+        # zenoh raises if a subscriber is read on one thread while it is undeclared on another
+        self.lock = threading.RLock()
+
+    def add(self, key_expr: str, subscriber: zenoh.Subscriber) -> Subscription:
+        '''
+        Registers a subscriber that was just declared on key_expr
+
+        Arguments:
+            key_expr (str): The key expression the subscriber was declared on
+            subscriber (zenoh.Subscriber): The subscriber
+
+        Returns:
+            Subscription: The handle of the subscriber
+        '''
+        s = Subscription(key_expr, _owner(key_expr), subscriber, self)
+        with self.lock:
+            self._by_key.setdefault(key_expr, dict())[s] = None
+            self._by_owner.setdefault(s.owner, dict())[s] = None
+            self._size += 1
+        return s
+
+    def _remove(self, s: Subscription) -> bool:
+        subs = self._by_key.get(s.key_expr)
+        if subs is None or s not in subs:
+            return False
+        del subs[s]
+        if not subs:
+            del self._by_key[s.key_expr]
+        owned = self._by_owner[s.owner]
+        del owned[s]
+        if not owned:
+            del self._by_owner[s.owner]
+        self._size -= 1
+        return True
+
+    def undeclare(self, s: Subscription) -> bool:
+        '''
+        Undeclares one subscriber, leaving any other subscriber on the same key expression in place
+
+        Arguments:
+            s (Subscription): The handle returned when it was declared
+
+        Returns:
+            bool: False if it was already undeclared
+        '''
+        with self.lock:
+            if not self._remove(s):
+                return False
+            s.subscriber.undeclare()
+            return True
+
+    def undeclare_key(self, key_expr: str) -> int:
+        '''
+        Undeclares every subscriber declared on exactly key_expr
+
+        Arguments:
+            key_expr (str): The key expression
+
+        Returns:
+            int: The number of subscribers undeclared
+        '''
+        with self.lock:
+            subs = list(self._by_key.get(key_expr, ()))
+            for s in subs:
+                self._remove(s)
+                s.subscriber.undeclare()
+            return len(subs)
+
+    def undeclare_owner(self, user_key: str) -> int:
+        '''
+        Undeclares every subscriber on the node with the passed user key (and on its subnodes)
+
+        Arguments:
+            user_key (str): The user key of the node
+
+        Returns:
+            int: The number of subscribers undeclared
+        '''
+        with self.lock:
+            subs = list(self._by_owner.get(user_key, ()))
+            for s in subs:
+                self._remove(s)
+                s.subscriber.undeclare()
+            return len(subs)
+
+    def count(self, user_key: str) -> int:
+        '''
+        Returns the number of live subscribers on the node with the passed user key
+        '''
+        with self.lock:
+            return len(self._by_owner.get(user_key, ()))
+
+    def counts(self) -> dict[str, int]:
+        '''
+        Returns the number of live subscribers on every node that has any
+        '''
+        with self.lock:
+            return {owner: len(subs) for owner, subs in self._by_owner.items() if owner is not None}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Subscription]:
+        with self.lock:
+            return iter([s for subs in self._by_key.values() for s in subs])
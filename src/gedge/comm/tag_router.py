@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from enum import Enum
+import threading
+from typing import Callable, TYPE_CHECKING
+
+from gedge import proto
+from gedge.comm.keys import NodeKeySpace, key_join, overlap
+from gedge.py_proto.base_data import BaseData
+
+if TYPE_CHECKING:
+    from gedge.comm.comm import Comm
+    from gedge.comm.subscriptions import Subscription
+    from gedge.node.gtypes import TagDataCallback
+    from gedge.py_proto.tag_config import TagConfig
+    import zenoh
+
+import logging
+logger = logging.getLogger(__name__)
+
+class TagSubscription(Enum):
+    '''
+    How the tag data callbacks of a remote connection are subscribed.
+
+    PER_TAG: one zenoh subscriber per tag path (the default, and how gedge has always behaved).
+    NODE: one zenoh subscriber on every tag of the remote node, with samples handed to the callbacks of their path in process.
+    Use it when subscribing to many tags of a node, or to many nodes.
+    '''
+    PER_TAG = 0
+    NODE = 1
+
+def is_pattern(path: str) -> bool:
+    '''
+    Whether the passed tag path is a pattern (e.g. "pump/*/temp" or "pump/**") rather than one tag
+    '''
+    return "*" in path
+
+class RoutedCallback:
+    '''
+    The handle of one callback added to a TagDataRouter, used to remove that callback without touching the others on the node
+    '''
+    __slots__ = ("path", "on_tag_data", "_router")
+
+    def __init__(self, path: str, on_tag_data: TagDataCallback, router: TagDataRouter):
+        self.path = path
+        self.on_tag_data = on_tag_data
+        self._router = router
+
+    def undeclare(self) -> None:
+        self._router.remove(self.path, self.on_tag_data)
+
+    def __repr__(self) -> str:
+        return f"RoutedCallback({self.path})"
+
+# the callbacks and the decoder of one tag path
+_Route = tuple[Callable[[proto.BaseData], object] | None, tuple["TagDataCallback", ...]]
+
+class TagDataRouter:
+    '''
+    The one subscriber on <prefix>/NODE/<name>/TAGS/DATA/** of a remote node, and the table that hands its samples to
+    the callbacks of their tag path. Callbacks are registered on a tag path or on a pattern of tag paths, where * matches
+    one component and ** any number of them.
+
+    The callbacks and decoder of a path are resolved the first time a sample arrives on it, so every later sample costs
+    one dict lookup and one decode, however many callbacks and patterns there are. A sample is decoded once and the same
+    value is passed to every callback on its path.
+
+    Members of tag groups are only published in their group's frames, so they never reach a router.
+    '''
+    def __init__(self, comm: Comm, ks: NodeKeySpace, tag_config: TagConfig):
+        self._comm = comm
+        self._ks = ks
+        self._tag_config = tag_config
+        self.key_expr = key_join(ks.tag_data_key_prefix, "**")
+        self._callbacks: dict[str, list[TagDataCallback]] = dict() # tag path or pattern -> callbacks
+        self._routes: dict[str, _Route] = dict() # tag path -> route, rebuilt whenever anything above changes
+        self._subscriber: Subscription | None = None
+        self._sequence = comm.sequence_tracker.stream()
+        self._lock = threading.Lock()
+
+    def add(self, path: str, on_tag_data: TagDataCallback) -> RoutedCallback:
+        '''
+        Adds a callback on a tag path or pattern, declaring the node's subscriber if this is its first callback
+
+        Arguments:
+            path (str): The tag path or pattern
+            on_tag_data (TagDataCallback): The callback
+
+        Returns:
+            RoutedCallback: The handle of the callback (not of the node's subscriber, which its other callbacks share)
+        '''
+        if is_pattern(path):
+            # raises if the pattern is not a valid key expression
+            overlap(path, path)
+        with self._lock:
+            self._callbacks.setdefault(path, []).append(on_tag_data)
+            self._routes = dict()
+            if self._subscriber is None:
+                self._subscriber = self._comm._subscriber(self.key_expr, self._on_sample)
+        return RoutedCallback(path, on_tag_data, self)
+
+    def remove(self, path: str, on_tag_data: TagDataCallback | None = None) -> None:
+        '''
+        Removes one callback on a tag path or pattern (all of them if on_tag_data is None), undeclaring the node's
+        subscriber once no callbacks are left
+
+        Arguments:
+            path (str): The tag path or pattern the callback was added on
+            on_tag_data (TagDataCallback | None): The callback to remove
+
+        Returns:
+            None
+        '''
+        with self._lock:
+            callbacks = self._callbacks.get(path, [])
+            if on_tag_data is None:
+                callbacks.clear()
+            elif on_tag_data in callbacks:
+                callbacks.remove(on_tag_data)
+            if not callbacks:
+                self._callbacks.pop(path, None)
+            self._routes = dict()
+            if not self._callbacks and self._subscriber is not None:
+                self._comm.undeclare_subscriber(self._subscriber)
+                self._subscriber = None
+
+    def set_tag_config(self, tag_config: TagConfig) -> None:
+        '''
+        Switches to a new tag configuration of the remote node (from a new Meta), so paths are decoded with their new types
+        '''
+        with self._lock:
+            self._tag_config = tag_config
+            self._routes = dict()
+
+    def close(self) -> None:
+        '''
+        Forgets every callback. The subscriber itself is undeclared by Comm.close_remote
+        '''
+        with self._lock:
+            self._callbacks.clear()
+            self._routes = dict()
+            self._subscriber = None
+
+    def _route(self, path: str) -> _Route:
+        with self._lock:
+            route = self._routes.get(path)
+            if route is not None:
+                return route
+            callbacks = list(self._callbacks.get(path, []))
+            for pattern, cbs in self._callbacks.items():
+                if is_pattern(pattern) and overlap(pattern, path):
+                    callbacks.extend(cbs)
+            decoder = None
+            entry = self._tag_config.lookup(path)
+            if entry is None or entry.base_type is None:
+                logger.warning(f"Ignoring data on {path}, which is not a base tag of remote node {self._ks.user_key}")
+            else:
+                decoder = BaseData.decoder(entry.base_type)
+            route = (decoder, tuple(callbacks))
+            self._routes[path] = route
+            return route
+
+    def _on_sample(self, sample: zenoh.Sample):
+        key_expr = str(sample.key_expr)
+        if not self._sequence.accept(key_expr, sample.attachment):
+            return
+        path = self._ks.tag_path_from_data_key(key_expr)
+        route = self._routes.get(path)
+        if route is None:
+            route = self._route(path)
+        decoder, callbacks = route
+        if decoder is None or not callbacks:
+            return
+        data: proto.BaseData = self._comm.deserialize(proto.BaseData(), sample.payload.to_bytes(), self._comm.wire_format(self._ks))
+        value = decoder(data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Remote node {self._ks.user_key} received value {value} for tag {path}, routed to {len(callbacks)} callbacks")
+        for on_tag_data in callbacks:
+            self._comm.telemetry_dispatcher.submit(key_expr, on_tag_data, key_expr, value)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import base64
+from enum import Enum
+from typing import Any, Self
+
+# reserved key in a node's Meta props that advertises how that node encodes
+# payloads on its key space. Nodes that do not advertise it (i.e. every node
+# before this existed) are assumed to speak base64
+WIRE_FORMAT_PROP = "gedge/wire_format"
+
+class WireFormat(Enum):
+    '''
+    How a serialized protobuf is laid out in a zenoh payload.
+
+    BASE64: SerializeToString() followed by base64 encoding. This is what every
+    node has always spoken and what the historian (influxdb) needs, because raw
+    protobuf can contain carriage returns that influx mangles.
+    RAW: SerializeToString() with nothing on top of it, about 25% smaller and
+    without the encode/decode on either end.
+
+    Everything on a node's key space (tag data, groups, tag writes, method calls
+    and responses) uses the format advertised in that node's Meta. Meta, state and
+    models always go over base64 so that old peers and the historian can read them.
+    '''
+    BASE64 = "base64"
+    RAW = "raw"
+
+    @property
+    def encoding(self) -> str:
+        return "application/protobuf"
+
+    def encode(self, b: bytes) -> bytes:
+        if self == WireFormat.RAW:
+            return b
+        return base64.b64encode(b)
+
+    def decode(self, b: bytes) -> bytes:
+        if self == WireFormat.RAW:
+            return b
+        return base64.b64decode(b)
+
+    def to_json5(self) -> str:
+        return self.value
+
+    @classmethod
+    def from_json5(cls, j: Any) -> Self:
+        if not isinstance(j, str):
+            raise ValueError(f"wire format must be a string (one of {[w.value for w in WireFormat]}), got {j}")
+        try:
+            return cls(j.lower())
+        except ValueError:
+            raise ValueError(f"invalid wire format {j}, must be one of {[w.value for w in WireFormat]}")
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Callable, TYPE_CHECKING
+
+from gedge.node import codes
+from gedge.node.error import MethodLookupError
+from gedge.node.reply import Response
+from gedge.py_proto.conversions import dict_value_to_proto
+
+if TYPE_CHECKING:
+    import zenoh
+    from gedge.comm.comm import Comm
+    from gedge.node.gtypes import KeyExpr, TagBaseValue, TagGroupValue
+    from gedge.node.remote import RemoteConnection
+
+import logging
+logger = logging.getLogger(__name__)
+
+def call_soon(loop: asyncio.AbstractEventLoop, func, *args):
+    '''
+    Hands func(*args) from a zenoh thread to the event loop. Replies that arrive after the loop closed are dropped
+    '''
+    try:
+        loop.call_soon_threadsafe(func, *args)
+    except RuntimeError:
+        logger.debug(f"Event loop closed, dropping {getattr(func, '__name__', func)}")
+
+class AsyncSubscription:
+    '''
+    An async iterator over the samples of a tag (path, value) or group (key expression, values) subscription.
+    If the consumer falls behind by more than maxsize samples, the oldest ones are dropped.
+
+    Example Implementation:
+        async with remote.aio.subscribe_tag("tag/1") as sub:
+            async for key_expr, value in sub:
+                print(key_expr, value)
+    '''
+    def __init__(self, comm: Comm, loop: asyncio.AbstractEventLoop, maxsize: int = 0):
+        self._comm = comm
+        self._loop = loop
+        self._queue: asyncio.Queue[tuple[KeyExpr, Any]] = asyncio.Queue(maxsize)
+        self._unsubscribe: Callable[[], None] | None = None # removes the callback of this subscription, and only it
+        self.dropped = 0
+        self.closed = False
+
+    def _on_sample(self, key_expr: KeyExpr, value: Any):
+        call_soon(self._loop, self._put, (key_expr, value))
+
+    def _put(self, item: tuple[KeyExpr, Any]):
+        if self.closed:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> tuple[KeyExpr, Any]:
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+        return await self._queue.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.closed = True
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+class AsyncRemoteConnection:
+    '''
+    The asyncio surface of a RemoteConnection, accessed through remote.aio.
+    Replies and samples are bridged from zenoh's callbacks onto the running event loop,
+    so no thread is blocked per in-flight write or method call.
+
+    Example Implementation:
+        remote = session.connect_to_remote("...")
+        reply = await remote.aio.write_tag("tag/1", 10)
+        async for response in remote.aio.call_method("method/1", param0=x):
+            print(response.code, response.body)
+    '''
+    def __init__(self, remote: RemoteConnection):
+        self._remote = remote
+        self._comm = remote._comm
+
+    async def write_tag(self, path: str, value: Any) -> Response:
+        '''
+        Writes the passed value to the tag at the passed path and returns the reply
+
+        Arguments:
+            path (str): The path of the tag being written to
+            value (Any): The value being written to the tag
+
+        Returns:
+            Response: The reply from the tag write
+        '''
+        remote = self._remote
+        if path not in remote.tag_config.all_writable_tags():
+            raise LookupError(f"tag {path} not writable")
+        data = remote._write_data(path, value)
+        response = await self._comm.write_tag_async(remote.ks, path, data)
+        return remote._write_response(path, response)
+
+    async def call_method(self, _path: str, _timeout: float | None = None, **kwargs) -> AsyncIterator[Response]:
+        '''
+        Calls the method along the passed path and yields its responses as they arrive
+
+        Arguments:
+            _path (str): The path to the method being called
+            _timeout (float | None): Optional timeout in milliseconds for the whole call
+            kwargs (dict[str, Any]): Parameters passed to the method
+
+        Returns:
+            AsyncIterator[Response]: The responses from the method, ending with the final one
+        '''
+        remote = self._remote
+        if _path not in remote.methods:
+            raise MethodLookupError(_path, remote.ks.name)
+        method = remote.methods[_path]
+        for param in method.params:
+            if param.path not in kwargs:
+                raise LookupError(f"Parameter {param} defined in config but not included in method call for method {method.path}")
+        params = dict_value_to_proto(kwargs, method.params)
+
+        loop = asyncio.get_running_loop()
+        replies: asyncio.Queue[Response] = asyncio.Queue()
+        def _on_reply(reply: Response) -> None:
+            call_soon(loop, replies.put_nowait, reply)
+
+        logger.info(f"Querying method of node {remote.ks.name} at path {_path} with params {params.keys()}")
+        deadline = None if _timeout is None else loop.time() + _timeout / 1000
+        key_expr = self._comm.query_method(remote.ks, _path, remote.node_id, params, _on_reply, method, None if _timeout is None else _timeout / 1000)
+        while True:
+            try:
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                res = await asyncio.wait_for(replies.get(), timeout)
+            except TimeoutError:
+                self._comm.cancel_method_call(key_expr)
+                raise TimeoutError(f"Timeout of method call at path {method.path} exceeded")
+            if res.code == codes.TIMEOUT:
+                # dropped by the session, because its deadline passed or the session closed
+                raise TimeoutError(f"Timeout of method call at path {method.path} exceeded")
+            yield res
+            if codes.is_final_method_response(res):
+                return
+
+    def subscribe_tag(self, path: str, maxsize: int = 0) -> AsyncSubscription:
+        '''
+        Subscribes to the tag at the passed path. Must be called from within a running event loop
+
+        Arguments:
+            path (str): The path of the tag
+            maxsize (int): How many samples to buffer before dropping the oldest (0 means no limit)
+
+        Returns:
+            AsyncSubscription: An async iterator of (key expression, value)
+        '''
+        sub = AsyncSubscription(self._comm, asyncio.get_running_loop(), maxsize)
+        remote = self._remote
+        remote.add_tag_data_callback(path, sub._on_sample)
+        sub._unsubscribe = lambda: remote.remove_tag_data_callback(path, sub._on_sample)
+        return sub
+
+    def subscribe_group(self, group_path: str, maxsize: int = 0) -> AsyncSubscription:
+        '''
+        Subscribes to the group at the passed path. Must be called from within a running event loop
+
+        Arguments:
+            group_path (str): The path of the group
+            maxsize (int): How many samples to buffer before dropping the oldest (0 means no limit)
+
+        Returns:
+            AsyncSubscription: An async iterator of (key expression, dict of member path -> value)
+        '''
+        sub = AsyncSubscription(self._comm, asyncio.get_running_loop(), maxsize)
+        subscriber = self._remote.add_tag_group_callback(group_path, sub._on_sample)
+        if subscriber is not None:
+            sub._unsubscribe = subscriber.undeclare
+        return sub
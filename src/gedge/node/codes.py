@@ -48,6 +48,18 @@ CALLBACK_ERR_CONFIG = ResponseConfig.from_json5(
     }
 )
 
+# never sent by a callee, the caller hands this to on_reply when it drops a call that did not finish in time
+TIMEOUT = 40
+TIMEOUT_CONFIG = ResponseConfig.from_json5(
+    {
+        "code": TIMEOUT,
+        "type": "err",
+        "props": {
+            "description": "method call did not finish in time (or the session closed) and was abandoned by the caller",
+        },
+    }
+)
+
 def config_from_code(code: int, responses: list[ResponseConfig]) -> ResponseConfig:
     r = {r.code: r for r in responses}
     if code in r:
@@ -58,7 +70,8 @@ def config_from_predefined_code(code: int) -> ResponseConfig:
     mapping = {
         OK: OK_CONFIG,
         ERR: ERR_CONFIG,
-        CALLBACK_ERR: CALLBACK_ERR_CONFIG
+        CALLBACK_ERR: CALLBACK_ERR_CONFIG,
+        TIMEOUT: TIMEOUT_CONFIG,
     }
     if code not in mapping:
         raise ValueError(f"invalid built-in code used in response: {code}")
@@ -66,7 +79,7 @@ def config_from_predefined_code(code: int) -> ResponseConfig:
     return mapping[code]
 
 def is_predefined_code(code: int) -> bool:
-    return code in {OK, ERR, CALLBACK_ERR}
+    return code in {OK, ERR, CALLBACK_ERR, TIMEOUT}
 
 def is_final_method_response(response: Response) -> bool:
     return is_predefined_code(response.code) or response.type in {ResponseType.OK, ResponseType.ERR}
@@ -75,4 +88,4 @@ def is_ok(code: int) -> bool:
     return code == OK
 
 def is_err(code: int) -> bool:
-    return code in {ERR, CALLBACK_ERR}
\ No newline at end of file
+    return code in {ERR, CALLBACK_ERR, TIMEOUT}
\ No newline at end of file
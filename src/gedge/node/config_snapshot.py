@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import struct
+from typing import Any, TYPE_CHECKING
+
+from gedge import proto
+from gedge.comm.wire_format import WireFormat
+from gedge.node.report import ReportConfig
+from gedge.py_proto.data_model_ref import DataModelRef
+from gedge.py_proto.singleton import Singleton
+from gedge.py_proto.tag_config import TagConfig
+
+if TYPE_CHECKING:
+    from gedge.node.node import NodeConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+# MAGIC, the sha256 of the json5 source, the sha256 of the models it references (see models_digest), the length
+# of the config (a proto.Meta without models), the config, then json with what a Meta does not carry (report
+# configs and the wire format) and the paths of the referenced models
+MAGIC = b"GEDGENC2"
+_HEADER = struct.Struct("<8s32s32sQ")
+
+def snapshot_path(config_path: str) -> pathlib.Path:
+    '''
+    Returns where the snapshot of the node config at config_path lives (a hidden file next to it)
+    '''
+    path = pathlib.Path(config_path)
+    return path.with_name(f".{path.name}.gedge")
+
+def source_digest(source: bytes) -> bytes:
+    return hashlib.sha256(source).digest()
+
+def _model_refs(message: Any, refs: list[DataModelRef]):
+    for field, value in message.ListFields():
+        if field.message_type is None:
+            continue
+        values = value if field.label == field.LABEL_REPEATED else [value]
+        for v in values:
+            if isinstance(v, proto.DataModelRef):
+                refs.append(DataModelRef.from_proto(v))
+            else:
+                _model_refs(v, refs)
+
+def model_paths(meta: proto.Meta) -> list[str]:
+    '''
+    Returns the paths of every model the config in meta references, including the models nested in (or inherited by) those
+    '''
+    refs: list[DataModelRef] = []
+    _model_refs(meta, refs)
+    paths: set[str] = set()
+    while refs:
+        ref = refs.pop()
+        if ref.path in paths:
+            continue
+        paths.add(ref.path)
+        try:
+            _model_refs(ref.load_model().to_proto(), refs)
+        except Exception as e:
+            # the json5 loaded without it, its files (or their absence) are still part of the digest
+            logger.debug(f"Could not load model {ref.full_path} referenced by a node config: {repr(e)}")
+    return sorted(paths)
+
+def models_digest(paths: list[str]) -> bytes:
+    '''
+    Returns the sha256 of the model directory and of every version of the models at paths in it, so that a
+    snapshot is stale once any model it was validated against changes (or gets a new version)
+    '''
+    h = hashlib.sha256()
+    model_dir = Singleton().get_model_dir()
+    h.update(f"{model_dir}\0".encode())
+    for path in paths:
+        h.update(f"{path}\0".encode())
+        if not model_dir:
+            continue
+        directory = pathlib.Path(model_dir) / path
+        try:
+            files = sorted(f for f in os.listdir(directory) if f.endswith(".json5"))
+        except OSError:
+            continue
+        for name in files:
+            with open(directory / name, "rb") as f:
+                h.update(f"{name}\0".encode() + source_digest(f.read()))
+    return h.digest()
+
+def _reports(tag_config: TagConfig) -> dict[str, Any]:
+    return {path: dataclasses.asdict(tag.report) for path, tag in tag_config.tags.items() if tag.report is not None}
+
+def _extras(config: NodeConfig) -> dict[str, Any]:
+    return {
+        "reports": _reports(config.tag_config),
+        "subnodes": {name: _extras(subnode) for name, subnode in config.subnodes.items()},
+    }
+
+def _apply_extras(config: NodeConfig, extras: dict[str, Any]):
+    for path, report in extras.get("reports", {}).items():
+        config.tag_config[path].report = ReportConfig(**report)
+    for name, sub_extras in extras.get("subnodes", {}).items():
+        _apply_extras(config.subnodes[name], sub_extras)
+
+def to_snapshot(config: NodeConfig, digest: bytes) -> bytes:
+    '''
+    Serializes a handler-free node config (one just loaded from json5) tagged with the digest of its source
+    and with the digest of the models it references
+
+    Arguments:
+        config (NodeConfig): The config
+        digest (bytes): The sha256 of the json5 the config was loaded from
+
+    Returns:
+        bytes
+    '''
+    meta = proto.Meta(
+        key=config.key,
+        tags=config.tag_config.to_proto(),
+        methods=[m.to_proto() for m in config.methods.values()],
+        subnodes=[s.to_proto() for s in config.subnodes.values()],
+        props=[p.to_proto() for p in config.props.values()],
+    )
+    paths = model_paths(meta)
+    data = meta.SerializeToString()
+    extras = _extras(config)
+    extras["wire_format"] = config.wire_format.to_json5()
+    extras["models"] = paths
+    return _HEADER.pack(MAGIC, digest, models_digest(paths), len(data)) + data + json.dumps(extras).encode()
+
+def from_snapshot(data: bytes, digest: bytes) -> NodeConfig | None:
+    '''
+    Rebuilds the node config in a snapshot, if the snapshot was taken of the source with the passed digest
+    and none of the models it references changed since
+
+    Arguments:
+        data (bytes): The snapshot
+        digest (bytes): The sha256 of the current json5 source
+
+    Returns:
+        NodeConfig | None: None if the source or its models changed since the snapshot was taken
+    '''
+    from gedge.node.node import NodeConfig
+    from gedge.node.method import MethodConfig
+    from gedge.node.subnode import SubnodeConfig
+    from gedge.py_proto.props import Prop
+    magic, snapshot_digest, snapshot_models_digest, length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"unknown node config snapshot format {magic}")
+    if snapshot_digest != digest:
+        return None
+    start = _HEADER.size
+    extras = json.loads(data[start + length:])
+    if models_digest(extras["models"]) != snapshot_models_digest:
+        return None
+    meta = proto.Meta()
+    meta.ParseFromString(data[start:start + length])
+
+    config = NodeConfig(meta.key)
+    config.tag_config = TagConfig.from_proto(meta.tags)
+    config.methods = {m.path: MethodConfig.from_proto(m) for m in meta.methods}
+    config.subnodes = {s.name: SubnodeConfig.from_proto(s, config.ks) for s in meta.subnodes}
+    config.props = {p.key: Prop.from_proto(p) for p in meta.props}
+    config.wire_format = WireFormat.from_json5(extras["wire_format"])
+    _apply_extras(config, extras)
+    return config
+
+def read_snapshot(config_path: str, digest: bytes) -> NodeConfig | None:
+    '''
+    Returns the node config snapshotted next to config_path, None if there is none or it is stale
+    '''
+    try:
+        with open(snapshot_path(config_path), "rb") as f:
+            data = f.read()
+        return from_snapshot(data, digest)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable node config snapshot {snapshot_path(config_path)}: {repr(e)}")
+        return None
+
+def write_snapshot(config_path: str, digest: bytes, config: NodeConfig) -> None:
+    '''
+    Snapshots config next to config_path, so that the next run does not parse the json5 again
+    '''
+    path = snapshot_path(config_path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        data = to_snapshot(config, digest)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        # e.g. a read-only config directory, the json5 is just parsed every time
+        logger.debug(f"Could not write node config snapshot {path}: {repr(e)}")
@@ -1,13 +1,14 @@
-from typing import Callable, Any
+from typing import Awaitable, Callable, Any
 import zenoh
 from gedge import proto
-from gedge.node.query import MethodQuery, TagWriteQuery
+from gedge.node.query import GroupWriteQuery, MethodQuery, TagWriteQuery
 from gedge.node.reply import Response
 from gedge.py_proto.meta import Meta
 from gedge.py_proto.state import State
 # from gedge.py_proto.data_model import DataObject
 
 # a node defines this on its own config for its writable tags
+# list[int], list[long], list[float] and list[bool] values can also be NumPy arrays (see gedge.use_numpy)
 TagBaseValue = int | float | bool | str | list[int] | list[float] | list[bool] | list[str]
 
 # dict is the representation of a DataModel and a TagGroup
@@ -18,7 +19,9 @@ TagValue = TagBaseValue | TagGroupValue
 ProtoMessage = proto.Meta | proto.DataItem | proto.Response | proto.State | proto.MethodCall | proto.DataModelConfig | proto.BaseData | proto.TagGroup
 
 TagWriteHandler = Callable[[TagWriteQuery], None]
-MethodHandler = Callable[[MethodQuery], None]
+GroupWriteHandler = Callable[[GroupWriteQuery], None]
+# method handlers can also be async (async def handler(query): ...)
+MethodHandler = Callable[[MethodQuery], None | Awaitable[None]]
 MethodReplyCallback = Callable[[Response], None]
 
 KeyExpr = str
@@ -1,8 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from gedge.py_proto.base_data import BaseData
-from gedge.py_proto.data_model import DataItem
+from gedge.py_proto.codec import Codec, codecs, decode_dict, encode_dict
 from gedge.py_proto.data_model_config import DataItemConfig
 from gedge.py_proto.props import Prop
 from gedge import proto
@@ -22,6 +22,9 @@ class MethodConfig:
     props: list[Prop]
     handler: MethodHandler | None
 
+    # the compiled codecs of the params, by path, built on first use
+    _codecs: dict[str, Codec] | None = field(default=None, init=False, repr=False, compare=False)
+
     def to_proto(self) -> proto.MethodConfig:
         params = list_to_proto(self.params)
         responses = list_to_proto(self.responses)
@@ -52,13 +55,13 @@ class MethodConfig:
 
         return cls(path, params, responses, props, None)
     
+    def _param_codecs(self) -> dict[str, Codec]:
+        if self._codecs is None:
+            self._codecs = codecs(self.params)
+        return self._codecs
+
     def params_proto_to_py(self, params: dict[str, proto.DataItem]) -> dict[str, TagValue]:
-        params_config = self.params
-        config: dict[str, DataItemConfig] = {i.path: i for i in params_config}
-        value = {k: DataItem.proto_to_py(v, config[k]) for k, v in params.items()}
-        return value
+        return decode_dict(params, self._param_codecs())
     
     def params_py_to_proto(self, params: dict[str, TagValue]) -> dict[str, proto.DataItem]:
-        c: dict[str, DataItemConfig] = {i.path: i for i in self.params}
-        proto = {k: DataItem.py_to_proto(v, c[k]) for k, v in params.items()}
-        return proto
+        return encode_dict(params, self._param_codecs())
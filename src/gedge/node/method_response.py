@@ -1,8 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 
-from gedge.py_proto.data_model import DataItem
+from gedge.py_proto.codec import Codec, codecs, decode_dict, encode_dict
 from gedge.py_proto.data_model_config import DataItemConfig
 from gedge.py_proto.props import Prop
 from gedge import proto
@@ -20,6 +20,9 @@ class ResponseConfig:
     type: ResponseType
     body: list[DataItemConfig]
     props: list[Prop]
+
+    # the compiled codecs of the body, by path, built on first use
+    _codecs: dict[str, Codec] | None = field(default=None, init=False, repr=False, compare=False)
     
     def to_proto(self) -> proto.ResponseConfig:
         props = list_to_proto(self.props)
@@ -59,15 +62,16 @@ class ResponseConfig:
     def is_info(self) -> bool:
         return self.type == ResponseType.INFO
     
+    def _body_codecs(self) -> dict[str, Codec]:
+        if self._codecs is None:
+            self._codecs = codecs(self.body)
+        return self._codecs
+
     def body_proto_to_value(self, proto: dict[str, proto.DataItem]) -> dict[str, TagValue]:
-        config = {i.path: i for i in self.body}
-        body: dict[str, TagValue] = {k: DataItem.proto_to_py(v, config[k]) for k, v in proto.items()}
-        return body
+        return decode_dict(proto, self._body_codecs())
     
     def body_value_to_proto(self, value: dict[str, TagValue]) -> dict[str, proto.DataItem]:
-        config = {i.path: i for i in self.body}
-        body: dict[str, proto.DataItem] = {k: DataItem.py_to_proto(v, config[k]) for k, v in value.items()}
-        return body
+        return encode_dict(value, self._body_codecs())
     
 def get_response_config(code: int, responses: list[ResponseConfig]) -> ResponseConfig:
     from gedge.node import codes
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
 import pathlib
 import uuid
+from collections import defaultdict
 from gedge.node.method import MethodConfig
 from gedge.node.method_response import ResponseConfig
 from gedge.py_proto.base_data import BaseData
@@ -10,16 +12,23 @@ from gedge.py_proto.conversions import props_from_json5
 from gedge.py_proto.data_model import DataItem
 from gedge.py_proto.data_model_config import DataModelConfig, DataItemConfig
 from gedge.py_proto.data_model_ref import DataModelRef
+from gedge.py_proto.ndarray import values_equal
 from gedge.py_proto.props import Prop
 from gedge.node.remote import RemoteConnection
 from gedge import proto
 from gedge.node.error import MethodLookupError, TagLookupError
 from gedge.comm.comm import Comm
+from gedge.comm.tag_router import TagSubscription
+from gedge.comm.options import CommOptions
+from gedge.comm.wire_format import WIRE_FORMAT_PROP, WireFormat
 from gedge.py_proto.singleton import Singleton
 from gedge.py_proto.state import State
 from gedge.py_proto.tag_config import Tag, TagConfig
 from gedge import py_proto
 from gedge.node.tag_bind import TagBind
+from gedge.node.tag_batch import TagBatch
+from gedge.node.tag_publishers import TagPublishers
+from gedge.node.report import ReportFilter
 from gedge.comm.keys import *
 import json5
 
@@ -27,10 +36,12 @@ from typing import Self, Any, TYPE_CHECKING
 
 from gedge.py_proto.type import Type
 if TYPE_CHECKING:
-    from gedge.node.gtypes import LivelinessCallback, MetaCallback, StateCallback, TagDataCallback, TagBaseValue, ZenohQueryCallback, TagWriteHandler, MethodHandler
+    from gedge.node.gtypes import LivelinessCallback, MetaCallback, StateCallback, TagDataCallback, TagBaseValue, ZenohQueryCallback, TagWriteHandler, GroupWriteHandler, MethodHandler, ProtoMessage
+    import zenoh
     from gedge.node.subnode import SubnodeConfig
     from gedge.node.subnode import SubnodeSession
     from gedge.py_proto.meta import Meta
+    from gedge.comm.dispatch import Dispatcher
 
 import logging
 logger = logging.getLogger(__name__)
@@ -44,26 +55,41 @@ class NodeConfig:
         self.subnodes: dict[str, SubnodeConfig] = dict()
         self.models: dict[str, DataModelConfig] = dict()
         self.props: dict[str, Prop] = dict()
+        self.wire_format = WireFormat.BASE64
 
     @classmethod
-    def from_json5(cls, path: str):
+    def from_json5(cls, path: str, snapshot: bool = False):
         '''
-        Creates a new node by loading the opening the parameter path with read persmissions to json5 and returns the NodeConfig of the new node
+        Creates a new node by loading the opening the parameter path with read persmissions to json5 and returns the NodeConfig of the new node.
+        With snapshot, the parsed config is snapshotted next to the file (.<name>.gedge), and later loads reuse the snapshot
+        until the file or a model it references changes
         
         Arguments:
             cls (type[Self@NodeConfig]): The NodeConfig class
             path (str): The path being opened on and loaded into json5
+            snapshot (bool): Whether or not to read and write the snapshot, off by default
 
         Returns:
             NodeConfig
         '''
+        from gedge.node import config_snapshot
         if not pathlib.Path(path).exists():
             raise ValueError(f"Node configuration at path {path} does not exist")
         if pathlib.Path(path).is_dir():
             raise ValueError(f"Node configuration at path {path} is a directory")
-        with open(path, "r") as f:
-            node: dict[str, Any] = json5.load(f)
-        return cls._config_from_json5_obj(node)
+        with open(path, "rb") as f:
+            source = f.read()
+        digest = config_snapshot.source_digest(source)
+        if snapshot:
+            config = config_snapshot.read_snapshot(path, digest)
+            if config is not None:
+                logger.debug(f"Loaded node configuration {path} from its snapshot")
+                return config
+        node: dict[str, Any] = json5.loads(source.decode())
+        config = cls._config_from_json5_obj(node)
+        if snapshot:
+            config_snapshot.write_snapshot(path, digest, config)
+        return config
     
     @classmethod
     def from_json5_str(cls, string: str):
@@ -98,29 +124,30 @@ class NodeConfig:
         
         props = {key: Prop.from_json5(key, p) for key, p in obj.get("props", {}).items()}
         config.props = props
+
+        if "wire_format" in obj:
+            config.wire_format = WireFormat.from_json5(obj["wire_format"])
         
         return config
 
     def get_models(self) -> list[DataModelConfig]:
         models = []
+        # loaded models are already flattened
         for tag in self.tag_config.tag_list():
             if tag.is_base_type():
                 continue
             m = tag.load_model()
             if m:
-                m.add_parent_tags()
                 models.append(m)
         for method in self.methods.values():
             for p in method.params:
                 m = p.type.load_model()
                 if m:
-                    m.add_parent_tags()
                     models.append(m)
             for r in method.responses:
                 for b in r.body:
                     m = b.load_model()
                     if m:
-                        m.add_parent_tags()
                         models.append(m)
         for subnode in self.subnodes.values():
             models += subnode.get_models()
@@ -239,6 +266,20 @@ class NodeConfig:
             None
         '''
         self.tag_config.add_write_handler(path, handler)
+
+    def add_group_write_handler(self, group_path: str, handler: GroupWriteHandler):
+        '''
+        Adds a GroupWriteHandler to a current writable group at the passed path. 
+        A group write hands the values of all the tags written to the handler at once
+
+        Arguments:
+            group_path (str): The path to the group
+            handler (GroupWriteHandler): The handler being added to the group
+
+        Returns:
+            None
+        '''
+        self.tag_config.add_group_write_handler(group_path, handler)
     
     def add_method_handler(self, path: str, handler: MethodHandler):
         '''
@@ -317,15 +358,23 @@ class NodeConfig:
         '''
         from gedge.py_proto.meta import Meta
         self._verify_tags()
-        meta = Meta(self.key, self.tag_config, self.methods, self.subnodes, self.models, self.props)
+        props = self.props
+        if self.wire_format != WireFormat.BASE64:
+            # advertise our wire format so that remotes know how to talk to us, base64 is implied when absent
+            props = dict(self.props)
+            props[WIRE_FORMAT_PROP] = Prop.from_json5(WIRE_FORMAT_PROP, self.wire_format.to_json5())
+        meta = Meta(self.key, self.tag_config, self.methods, self.subnodes, self.models, props)
         return meta
 
-    def _connect(self, connections: list[str]):
+    def _connect(self, connections: list[str], telemetry_dispatcher: Dispatcher | None = None, handler_dispatcher: Dispatcher | None = None, options: CommOptions | None = None):
         '''
         Creates a NodeSession with the passed connections
 
         Arguments:
             connections (list[str]): The connections created in the Session
+            telemetry_dispatcher (Dispatcher | None): Where tag data, group, state, meta and liveliness callbacks run (inline on zenoh's thread by default)
+            handler_dispatcher (Dispatcher | None): Where tag write and method handlers run (inline on zenoh's thread by default)
+            options (CommOptions | None): How the session talks to zenoh (a client session with the default quality of service if None)
 
         Returns:
             NodeSession: The created session with the passed connections
@@ -334,7 +383,7 @@ class NodeConfig:
         models = self.get_models()
         self.models = {m.full_path: m for m in models}
 
-        return NodeSession(self, Comm(connections))
+        return NodeSession(self, Comm(connections, telemetry_dispatcher, handler_dispatcher, options))
 
 class NodeSession:
     def __init__(self, config: NodeConfig, comm: Comm):
@@ -348,9 +397,13 @@ class NodeSession:
         self.method_responses: dict[str, dict[int, ResponseConfig]] = {key:{r.code:r for r in value.responses} for key, value in self.methods.items()}
         self.subnodes: dict[str, SubnodeConfig] = self.config.subnodes
         self.models: dict[str, DataModelConfig] = self.config.models
+        self._last_published: dict[str, TagBaseValue] = {} # path -> last value put on the network
+        self._report = ReportFilter(self.tag_config, self._publish_held)
 
         # connect
         self._comm.connect()
+        self._comm.set_wire_format(self.ks, self.config.wire_format)
+        self._publishers = TagPublishers(self._comm, self.ks)
 
         # TODO: subscribe to our own meta to handle changes to config during session?
         self.meta = self.config.build_meta()
@@ -364,6 +417,7 @@ class NodeSession:
         return self
     
     def __exit__(self, *exc):
+        self._report.close()
         self.update_state(False)
         self._comm.__exit__(*exc)
 
@@ -379,6 +433,7 @@ class NodeSession:
         '''
         for key in self.connections:
             self.disconnect_from_remote(key)
+        self._report.close()
         self.update_state(False)
         self._comm.session.close()
 
@@ -442,20 +497,17 @@ class NodeSession:
         Returns:
             None
         '''
-        metas = self.nodes_on_network(only_online)
-        if len(metas) == 0:
+        nodes = self._comm.discover_nodes(only_online)
+        if len(nodes) == 0:
             print("No Nodes on Network!")
             return
         print("Nodes on Network:")
-        i = 1
-        for meta in metas:
-            _, _, name = meta.key.rpartition("/")
-            online = "online" if self._comm.is_online(NodeKeySpace.from_user_key(meta.key)) else "offline"
+        for i, (meta, is_online) in enumerate(nodes, start=1):
+            online = "online" if is_online else "offline"
             print(f"{i}. {meta.key}: {online}")
             print(f"{meta}\n")
-            i += 1
 
-    def connect_to_remote(self, key: str, on_state: StateCallback | None = None, on_meta: MetaCallback | None = None, on_liveliness_change: LivelinessCallback | None = None, tag_data_callbacks: dict[str, TagDataCallback] = {}) -> RemoteConnection:
+    def connect_to_remote(self, key: str, on_state: StateCallback | None = None, on_meta: MetaCallback | None = None, on_liveliness_change: LivelinessCallback | None = None, tag_data_callbacks: dict[str, TagDataCallback] = {}, tag_subscription: TagSubscription = TagSubscription.PER_TAG) -> RemoteConnection:
         '''
         Connects the current node to a remote node at 'key'
         Raises a ValueError if the remote node 'key' is not online
@@ -485,14 +537,15 @@ class NodeSession:
             on_state (StateCallback | None): Optional StateCallback for the connection
             on_meta (MetaCallback | None): Optional MetaCallback for the connection
             on_liveliness_change (LivelinessCallback | None): Optional LivelinessCallback for the connection
-            tag_data_callbacks (dict[str, TagDataCallbacks] = {}): Optional Dictionary of TagDataCallbacks
+            tag_data_callbacks (dict[str, TagDataCallbacks] = {}): Optional Dictionary of TagDataCallbacks, keyed by tag path or pattern
+            tag_subscription (TagSubscription): One zenoh subscriber per tag (PER_TAG), or one on every tag of the node (NODE)
 
         Returns:
             RemoteConnection: The new connection between the current node and remote node
         '''
         logger.info(f"Node {self.config.key} connecting to remote node {key}")
 
-        connection = RemoteConnection(NodeKeySpace.from_user_key(key), self._comm, self.id, self._on_remote_close)
+        connection = RemoteConnection(NodeKeySpace.from_user_key(key), self._comm, self.id, self._on_remote_close, tag_subscription)
         if on_state:
             connection.add_state_callback(on_state)
         if on_meta:
@@ -504,9 +557,36 @@ class NodeSession:
             connection.add_tag_data_callback(path, tag_data_callbacks[path])
 
         self.connections[key] = connection
-        
+
         return connection
 
+    def connect_to_remotes(self, keys: list[str], on_state: StateCallback | None = None, on_meta: MetaCallback | None = None, on_liveliness_change: LivelinessCallback | None = None, tag_subscription: TagSubscription = TagSubscription.PER_TAG) -> dict[str, RemoteConnection]:
+        '''
+        Connects the current node to many remote nodes at once. The Metas and liveliness of every node
+        on the network are pulled in one query each, instead of two queries per remote node
+        Raises a ValueError if any of the remote nodes are not online, before connecting to any of them
+
+        Example Implementation:
+            remotes = session.connect_to_remotes([f"cell/robot{i}" for i in range(300)])
+            remotes["cell/robot0"].write_tag("speed", 10)
+
+        Arguments:
+            keys (list[str]): The keys of the remote nodes
+            on_state (StateCallback | None): Optional StateCallback for every connection
+            on_meta (MetaCallback | None): Optional MetaCallback for every connection
+            on_liveliness_change (LivelinessCallback | None): Optional LivelinessCallback for every connection
+            tag_subscription (TagSubscription): How tag data callbacks are subscribed on every connection
+
+        Returns:
+            dict[str, RemoteConnection]: key -> the new connection to that node
+        '''
+        logger.info(f"Node {self.config.key} connecting to {len(keys)} remote nodes")
+        self._comm.meta_cache.populate()
+        offline = [key for key in keys if not self._comm.meta_cache.is_online(NodeKeySpace.from_user_key(key))]
+        if offline:
+            raise ValueError(f"Nodes {offline} are not online, so they cannot be connected to!")
+        return {key: self.connect_to_remote(key, on_state, on_meta, on_liveliness_change, tag_subscription=tag_subscription) for key in keys}
+
     def disconnect_from_remote(self, key: str):
         '''
         Disconnects from the remote node that corresponds to the passed key
@@ -560,6 +640,8 @@ class NodeSession:
             if not tag.is_writable():
                 continue
             self._comm.tag_queryable(self.ks, tag, path) 
+        for group_path in self.config.tag_config.all_writable_groups():
+            self._comm.group_queryable(self.ks, group_path, self.config.tag_config)
         for path in self.config.methods:
             # hook up method handlers
             method = self.config.methods[path]
@@ -571,6 +653,8 @@ class NodeSession:
                 if not tag.is_writable():
                     continue
                 self._comm.tag_queryable(config.ks, tag, path) 
+            for group_path in config.tag_config.all_writable_groups():
+                self._comm.group_queryable(config.ks, group_path, config.tag_config)
             for path in config.methods:
                 method = config.methods[path]
                 self._comm.method_queryable(config.ks, method) 
@@ -649,6 +733,86 @@ class NodeSession:
         if path in self.binds:
             self.binds[path]._update_value_externally(value)
 
+    def update_tags(self, tags: dict[str, TagBaseValue], only_changed: bool = False):
+        '''
+        Updates many tags at once. Every value is encoded up front and then published as one burst of puts,
+        with all the updated members of a group sent as a single group frame
+
+        Arguments:
+            tags (dict[str, TagBaseValue]): path -> value for every tag being updated
+            only_changed (bool): only publish the tags whose value is different from the last value published on that path
+
+        Returns:
+            None
+        '''
+        self._update_tags(tags, only_changed)
+
+    def _update_tags(self, tags: dict[str, TagBaseValue], only_changed: bool = False, report: bool = True):
+        # every value is checked and encoded before any of them is offered to the report filter, which
+        # records what it lets through as published, so a bad value cannot leave the filter out of step
+        encoded: list[tuple[str, TagBaseValue, str | None, proto.BaseData]] = []
+        for path, value in tags.items():
+            if only_changed and self._is_unchanged(path, value):
+                continue
+            entry = self.tag_config.get_entry(path)
+            if not entry.is_base_type():
+                raise ValueError(f"cannot update model tag (only base tags) {path}")
+            encoded.append((path, value, entry.group, BaseData.from_value(value, entry.base_type).to_proto())) # type: ignore
+        values: dict[str, proto.BaseData] = {}
+        groups: dict[str, dict[str, proto.BaseData]] = defaultdict(dict)
+        published: dict[str, TagBaseValue] = {}
+        for path, value, group, d in encoded:
+            if report and not self._report.offer(path, value):
+                continue
+            if group:
+                groups[group][path] = d
+            else:
+                values[path] = d
+            published[path] = value
+        if not published:
+            return
+
+        logger.debug(f"Putting {len(values)} tags and {len(groups)} groups")
+        protos: list[tuple[zenoh.Publisher, str, ProtoMessage]] = [(*self._publishers.tag(path), value) for path, value in values.items()]
+        protos.extend((*self._publishers.group(path), proto.TagGroup(data=data)) for path, data in groups.items())
+        self._comm.publish_many(protos, self._comm.wire_format(self.ks))
+        for path, value in published.items():
+            self._set_last_published(path, value)
+            if path in self.binds:
+                self.binds[path]._update_value_externally(value)
+
+    def batch(self, only_changed: bool = False) -> TagBatch:
+        '''
+        Collects tag updates until the batch is closed (or flushed) and then publishes them with update_tags
+
+        Example Implementation:
+            with session.batch(only_changed=True) as batch:
+                batch["tag/1"] = 10
+                batch.update_tag("tag/2", 2.5)
+
+        Arguments:
+            only_changed (bool): only publish the tags whose value is different from the last value published on that path
+
+        Returns:
+            TagBatch: The batch to put updates in
+        '''
+        return TagBatch(self.update_tags, only_changed)
+
+    def _publish_held(self, tags: dict[str, TagBaseValue]):
+        # values held back (or republished) by report-by-exception already went through the filter
+        self._update_tags(tags, report=False)
+
+    def _is_unchanged(self, path: str, value: TagBaseValue) -> bool:
+        if path not in self._last_published:
+            return False
+        last = self._last_published[path]
+        # type check so that, for example, 1 and True are not considered the same value
+        return type(last) == type(value) and values_equal(last, value)
+
+    def _set_last_published(self, path: str, value: TagBaseValue):
+        # copied so that mutating a list in place between cycles still counts as a change
+        self._last_published[path] = copy.copy(value)
+
     def _update_tag(self, path: str, value: TagBaseValue, tag: Tag):
         '''
         Updates the tag at the passed path with the passed value
@@ -661,9 +825,16 @@ class NodeSession:
             None
         '''
         config = tag.get_config(path)
-        logger.debug(f"Putting tag value {value} on path {path}")
         d = BaseData.from_value(value, config.get_base_type()).to_proto() # type: ignore
-        self._comm.update_tag(self.ks, path, d)
+        if not self._report.offer(path, value):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Not putting tag value {value} on path {path}, filtered by report config")
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Putting tag value {value} on path {path}")
+        publisher, key_expr = self._publishers.tag(path)
+        self._comm.publish(publisher, key_expr, d, self._comm.wire_format(self.ks))
+        self._set_last_published(path, value)
     
     def update_group(self, group: dict[str, Any]):
         groups = self.tag_config.get_groups(list(group.keys()))
@@ -673,15 +844,21 @@ class NodeSession:
             raise ValueError(f"no groups found for group {list(group.keys())}")
         
         group_path: str = groups.pop()
-        new_group: dict[str, proto.BaseData] = {}
+        encoded: dict[str, proto.BaseData] = {}
         for path, value in group.items():
             config = self.tag_config.get_config(path)
             t = config.get_base_type()
             assert t is not None
-            new_group[path] = BaseData.from_value(value, config.get_base_type()).to_proto() # type: ignore
-        di = proto.TagGroup(data=new_group)
-        key_expr = self.ks.group_data_path(group_path)
-        self._comm.send_group(key_expr, di)
+            encoded[path] = BaseData.from_value(value, t).to_proto()
+        # offered only once every member is encoded, see _update_tags
+        group = {path: value for path, value in group.items() if self._report.offer(path, value)}
+        if not group:
+            return
+        di = proto.TagGroup(data={path: encoded[path] for path in group})
+        publisher, key_expr = self._publishers.group(group_path)
+        self._comm.publish(publisher, key_expr, di, self._comm.wire_format(self.ks))
+        for path, value in group.items():
+            self._set_last_published(path, value)
 
     def get_model_from_meta(self, config: DataModelRef) -> DataModelConfig:
         if self.models.get(config.full_path) is None:
@@ -8,7 +8,9 @@ from gedge.node import codes
 from gedge import proto
 from gedge.node.error import MethodLookupError, SessionError, TagLookupError
 from gedge.comm.comm import Comm
+from gedge.comm.tag_router import RoutedCallback, TagSubscription, is_pattern
 from gedge.node.tag_bind import TagBind
+from gedge.node.aio import AsyncRemoteConnection
 from gedge.comm.keys import *
 
 from typing import Any, Iterator, Callable, TYPE_CHECKING
@@ -23,35 +25,49 @@ from gedge.py_proto.tag_config import Tag, TagConfig
 if TYPE_CHECKING:
     from gedge.node.gtypes import TagDataCallback, StateCallback, MetaCallback, LivelinessCallback, MethodReplyCallback, TagValue, TagBaseValue, TagGroupDataCallback
     from gedge.node.subnode import RemoteSubConnection
+    from gedge.py_proto.meta import Meta
+    from gedge.comm.subscriptions import Subscription
+    import zenoh
 
 import logging
 logger = logging.getLogger(__name__)
 
 class RemoteConnection:
-    def __init__(self, ks: NodeKeySpace, comm: Comm, node_id: str, on_close: Callable[[str], None] | None = None):
+    def __init__(self, ks: NodeKeySpace, comm: Comm, node_id: str, on_close: Callable[[str], None] | None = None, tag_subscription: TagSubscription = TagSubscription.PER_TAG):
         self._comm = comm 
         self.key = ks.user_key
         self.ks = ks
         self.on_close = on_close
+        self.tag_subscription = tag_subscription
+        # the callbacks on a tag path that have their own subscriber (TagSubscription.PER_TAG)
+        self._tag_subscribers: dict[str, list[tuple[TagDataCallback, Subscription]]] = dict()
 
         self.node_id = node_id
 
-        '''
-        TODO: perhaps we should subscribe to this node's meta message, in which case all the following utility variables (self.tags, self.methods, self.responses) 
-        would need to react to that (i.e. be properties)
-        '''
-        if not self._comm.is_online(ks):
+        if not self._comm.meta_cache.is_online(ks):
             raise ValueError(f"Node {ks.user_key} is not online, so it cannot be connected to!")
-        self.meta = self._comm.pull_meta_message(ks)
+        self._set_meta(self._comm.meta_cache.get(ks))
+
+        # the remote node publishes a new meta whenever it (re)starts, possibly with a different config
+        self._comm.meta_cache.add_listener(ks, self._on_meta)
+
+        self.binds: dict[str, TagBind] = {}
+        self.aio = AsyncRemoteConnection(self)
+
+    def _set_meta(self, meta: Meta):
+        from gedge.node.subnode import SubnodeConfig
+        self.meta = meta
+        self._comm.set_wire_format(self.ks, self.meta.wire_format)
         self.tag_config = self.meta.tags
         self.methods = self.meta.methods
         self.responses: dict[str, dict[int, ResponseConfig]] = {key:{r.code:r for r in value.responses} for key, value in self.methods.items()}
         self.models = self.meta.models
-
-        from gedge.node.subnode import SubnodeConfig
         self.subnodes: dict[str, SubnodeConfig] = self.meta.subnodes
 
-        self.binds: dict[str, TagBind] = {}
+    def _on_meta(self, key_expr: str, meta: Meta):
+        logger.info(f"Received new meta from remote node {self.key}")
+        self._set_meta(meta)
+        self._comm.refresh_group_decoders(self.ks, self.tag_config)
 
     def __enter__(self):
         return self
@@ -65,20 +81,31 @@ class RemoteConnection:
         Closes the current remote connection
         '''
         self._comm.close_remote(self.ks)
+        self._tag_subscribers.clear()
         if self.on_close is not None:
             self.on_close(self.key)
+
+    def subscription_count(self) -> int:
+        '''
+        Returns the number of live zenoh subscribers on the remote node (and its subnodes), declared by this session
+        '''
+        return self._comm.subscriptions.count(self.ks.user_key)
     
-    def add_tag_data_callback(self, path: str, on_tag_data: TagDataCallback) -> None:
+    def add_tag_data_callback(self, path: str, on_tag_data: TagDataCallback) -> Subscription | RoutedCallback:
         '''
-        Adds the passed TagDataCallback to the current node on the passed path
+        Adds the passed TagDataCallback to the current node on the passed path.
+        The path may also be a pattern, where * matches one component and ** any number of them (e.g. "pump/*/temp"),
+        and is then routed through the node's one subscriber on all of its tags, whatever the tag_subscription of this connection
 
         Arguments:
-            path (str): The path of the node recieving the new tag data callback
+            path (str): The path (or pattern) of the node recieving the new tag data callback
             on_tag_data (TagDataCallbacks): The new TagDataCallback being added
 
         Returns:
-            None
+            Subscription | RoutedCallback: The handle of the callback, undeclare() removes it
         '''
+        if is_pattern(path):
+            return self._comm.tag_data_router(self.ks, self.tag_config).add(path, on_tag_data)
         if not self.tag_config.is_valid_path(path):
             raise TagLookupError(path, self.ks.name)
         if not self.tag_config.is_base_type(path):
@@ -88,13 +115,48 @@ class RemoteConnection:
         # if group:
         #     self.add_tag_group_callback(group, on_tag_data)
         #     return
-        self._comm.tag_data_subscriber(self.ks, path, on_tag_data, self.tag_config)
+        # members of groups are only published in the group's frames, so they keep their own subscriber
+        if self.tag_subscription == TagSubscription.NODE and not self.tag_config.get_group(path):
+            return self._comm.tag_data_router(self.ks, self.tag_config).add(path, on_tag_data)
+        subscriber = self._comm.tag_data_subscriber(self.ks, path, on_tag_data, self.tag_config)
+        self._tag_subscribers.setdefault(path, []).append((on_tag_data, subscriber))
+        return subscriber
+
+    def remove_tag_data_callback(self, path: str, on_tag_data: TagDataCallback | None = None) -> None:
+        '''
+        Removes a callback added with add_tag_data_callback (every callback on the path if on_tag_data is None),
+        leaving the other callbacks of the node in place
+
+        Arguments:
+            path (str): The path (or pattern) the callback was added on
+            on_tag_data (TagDataCallback | None): The callback to remove
+
+        Returns:
+            None
+        '''
+        router = self._comm.tag_routers.get(self.ks.tag_data_key_prefix)
+        if router is not None:
+            router.remove(path, on_tag_data)
+        if is_pattern(path):
+            return
+        if on_tag_data is None:
+            self._tag_subscribers.pop(path, None)
+            self._comm.cancel_tag_data_subscription(self.ks, path)
+            return
+        subscribers = self._tag_subscribers.get(path, [])
+        for entry in subscribers:
+            if entry[0] == on_tag_data:
+                subscribers.remove(entry)
+                self._comm.undeclare_subscriber(entry[1])
+                break
+        if not subscribers:
+            self._tag_subscribers.pop(path, None)
     
-    def add_tag_group_callback(self, group_path: str, on_group_data: TagGroupDataCallback) -> None:
+    def add_tag_group_callback(self, group_path: str, on_group_data: TagGroupDataCallback) -> Subscription | None:
         if not self.tag_config.is_valid_group_path(group_path):
             raise LookupError(f"Cannot find group {group_path}")
         
-        self._comm.group_data_subscriber(self.ks, group_path, on_group_data, self.tag_config)
+        return self._comm.group_data_subscriber(self.ks, group_path, on_group_data, self.tag_config)
 
     def add_state_callback(self, on_state: StateCallback) -> None:
         '''
@@ -199,14 +261,14 @@ class RemoteConnection:
             # different uuid or same?
             from gedge.node.subnode import SubnodeConfig
             assert isinstance(curr_node, SubnodeConfig)
-            r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close)
+            r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close, self.tag_subscription)
             return r
 
         if name not in self.subnodes:
             raise ValueError(f"No subnode {name} in config for {self.key}") 
         curr_node = self.subnodes[name]
         logger.debug(self._comm.session.is_closed())
-        r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close)
+        r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close, self.tag_subscription)
         return r
 
     def _write_tag(self, path: str, value: TagBaseValue, tag: Tag) -> Response:
@@ -220,12 +282,18 @@ class RemoteConnection:
         Returns:
             TagWriteReply: The reply from the tag write
         '''
+        response = self._comm.write_tag(self.ks, path, self._write_data(path, value))
+        return self._write_response(path, response)
+
+    def _write_data(self, path: str, value: TagBaseValue) -> BaseData:
         logger.info(f"Remote node '{self.key}' received write request at path '{path}' with value '{value}'")
         config = self.tag_config.get_config(path)
         base_type = config.get_base_type()
         if not base_type:
             raise ValueError(f"cannot write to model type at path {path}")
-        response = self._comm.write_tag(self.ks, path, BaseData.from_value(value, base_type))
+        return BaseData.from_value(value, base_type)
+
+    def _write_response(self, path: str, response: proto.Response) -> Response:
         code = response.code
 
         responses, _ = self.tag_config.all_writable_tags()[path]
@@ -262,9 +330,9 @@ class RemoteConnection:
 
     async def write_tag_async(self, path: str, value: Any) -> Response:
         '''
-        Writes the passed value to the tag at the passed path and returns the reply
+        Writes the passed value to the tag at the passed path and returns the reply, without blocking the event loop
 
-        Note: As of now this functions is implemented the same as write_tag
+        Note: This is the same as remote.aio.write_tag
 
         Example Implementation:
             remote = session.connect_to_remote(...)
@@ -279,12 +347,76 @@ class RemoteConnection:
         Returns:
             TagWriteReply: The reply from the tag write
         '''
-        if path not in self.tag_config.all_writable_tags():
-            raise LookupError(f"tag {path} not writable")
+        return await self.aio.write_tag(path, value)
+
+    def write_tags(self, values: dict[str, Any], timeout: float | None = None, max_in_flight: int | None = None, ordered: bool = False) -> dict[str, Response | Exception]:
+        '''
+        Writes the passed values to the tags at their paths all at once, instead of waiting for the reply of one write
+        before sending the next, and returns the reply of every write
+
+        Example Implementation:
+            remote = session.connect_to_remote(...)
+            replies = remote.write_tags({"recipe/speed": 10, "recipe/temp": 72.5}, timeout=2000)
+            for path, reply in replies.items():
+                if isinstance(reply, Exception):
+                    print(f"write to {path} failed: {reply}")
+                else:
+                    print(f"{path}: {reply.code}")
+
+        Arguments:
+            values (dict[str, Any]): The value being written to each tag, by path
+            timeout (float | None): Optional timeout in milliseconds that all writes share
+            max_in_flight (int | None): The most writes waiting on a reply at any time, no limit if None
+            ordered (bool): Write the tags one after the other, in the order of values, each after the reply to the one before it
+
+        Returns:
+            dict[str, Response | Exception]: The reply of every write by path, or the exception of a write that got no reply (e.g. TimeoutError)
+        '''
+        writable = self.tag_config.all_writable_tags()
+        for path in values:
+            if path not in writable:
+                raise LookupError(f"tag {path} not writable")
+        data = {path: self._write_data(path, value) for path, value in values.items()}
+        if ordered:
+            max_in_flight = 1
+        responses = self._comm.write_tags(self.ks, data, timeout / 1000 if timeout else None, max_in_flight)
+        return {
+            path: r if isinstance(r, Exception) else self._write_response(path, r)
+            for path, r in responses.items()
+        }
+
+    def write_group(self, group: dict[str, Any]) -> Response:
+        '''
+        Writes the passed values to the tags of one group in a single query, so the remote node gets all of them at once
+
+        Example Implementation:
+            remote = session.connect_to_remote(...)
+            reply = remote.write_group({"axis/x": 1.0, "axis/y": 2.0})
+
+        Arguments:
+            group (dict[str, Any]): The value being written to each tag of the group, by path
+
+        Returns:
+            Response: The reply from the group write
+        '''
+        groups = self.tag_config.get_groups(list(group.keys()))
+        if len(groups) > 1:
+            raise ValueError(f"tags are from multiple groups: {groups}")
+        elif len(groups) == 0:
+            raise ValueError(f"no groups found for group {list(group.keys())}")
+        group_path = groups.pop()
+        writable = self.tag_config.all_writable_groups()
+        if group_path not in writable:
+            raise LookupError(f"group {group_path} not writable")
+
+        data: dict[str, proto.BaseData] = {path: self._write_data(path, value).to_proto() for path, value in group.items()}
+        key_expr = self.ks.group_write_path(group_path)
+        response = self._comm.write_group(key_expr, data, self._comm.wire_format(self.ks))
+        responses, _ = writable[group_path]
+        config = get_response_config(response.code, responses)
+        body: dict[str, TagValue] = dict_proto_to_value(dict(response.body), config.body)
+        return Response(key_expr, response.code, config.type, body, props_to_json5(config.props))
 
-        tag = self.tag_config.get_tag(path)
-        return self._write_tag(path, value, tag)
-    
     # TODO: this should have a timeout, just like call_method_iter
     # the reason we prefix the parameters with "_" is so that it does not 
     # conflict with the kwargs that the user passes in (i.e. a user could 
@@ -293,7 +425,8 @@ class RemoteConnection:
     # to "_path")
     def call_method(self, _path: str, _on_reply: MethodReplyCallback, **kwargs) -> None:
         '''
-        Registers the passed MethodReplyCallback and then calls the method at the passed path and all replies get routed to the passed Callback
+        Registers the passed MethodReplyCallback and then calls the method at the passed path and all replies get routed to the passed Callback.
+        If the call never finishes (or the session closes first), the callback gets a final gedge.TIMEOUT response instead
 
         Example Implementation:
             def my_callback(reply):
@@ -363,7 +496,7 @@ class RemoteConnection:
 
         logger.info(f"Querying method of node {self.ks.name} at path {_path} with params {params.keys()}")
         start = time.time()
-        key_expr = self._comm.query_method(self.ks, _path, self.node_id, params, _on_reply, self.methods[_path])
+        key_expr = self._comm.query_method(self.ks, _path, self.node_id, params, _on_reply, self.methods[_path], _timeout or None)
         while True:
             try:
                 elapsed = (time.time() - start)
@@ -377,8 +510,10 @@ class RemoteConnection:
                     # if no timeout, we block forever
                     res = replies.get(block=True)
             except Empty:
-                key_expr = method_response_from_call(key_expr)
-                self._comm.cancel_subscription(key_expr)
+                self._comm.cancel_method_call(key_expr)
+                raise TimeoutError(f"Timeout of method call at path {method.path} exceeded")
+            if res.code == codes.TIMEOUT:
+                # dropped by the session, because its deadline passed or the session closed
                 raise TimeoutError(f"Timeout of method call at path {method.path} exceeded")
             yield res
             if codes.is_final_method_response(res):
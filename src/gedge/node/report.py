@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, fields
+import threading
+import time
+from typing import Any, Callable, Self, TYPE_CHECKING
+
+from gedge.py_proto.ndarray import values_equal
+
+if TYPE_CHECKING:
+    from gedge.node.gtypes import TagBaseValue
+    from gedge.py_proto.tag_config import TagConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ReportConfig:
+    '''
+    Report-by-exception settings for a tag, declared under "report" on the tag in the node json5:
+
+    report: {
+        deadband: 0.5,          // only publish when the value moved more than this from the last published value
+        percent_deadband: 2,    // only publish when the value moved more than this percent of the last published value
+        min_interval_ms: 100,   // publish at most once per interval, the latest value is published when the interval is up
+        max_interval_ms: 5000,  // an update is always published if nothing was published for this long
+        heartbeat_ms: 60000,    // republish the last value if nothing was published for this long, even without updates
+    }
+
+    Deadbands only apply to numbers, every other type is published whenever its value changes.
+    A tag with a report config never publishes a value equal to the last published value (outside of
+    max_interval_ms and heartbeat_ms). Tags without one publish every update, like always.
+    A report config on a model tag applies to every path nested in it.
+    '''
+    deadband: float = 0
+    percent_deadband: float = 0
+    min_interval_ms: int = 0
+    max_interval_ms: int = 0
+    heartbeat_ms: int = 0
+
+    @classmethod
+    def from_json5(cls, j: Any) -> Self:
+        if not isinstance(j, dict):
+            raise ValueError(f"invalid report config, expected dict, got {j}")
+        keys = [f.name for f in fields(cls)]
+        unknown = [key for key in j if key not in keys]
+        if unknown:
+            raise ValueError(f"invalid report config, unknown keys {unknown}, must be some of {keys}")
+        for key, value in j.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"invalid report config, {key} must be a non-negative number, got {value}")
+        return cls(**j)
+
+    def exceeds_deadband(self, last: TagBaseValue, value: TagBaseValue) -> bool:
+        if type(last) != type(value):
+            return True
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            delta = abs(value - last) # type: ignore
+            if delta == 0:
+                return False
+            if self.deadband and delta <= self.deadband:
+                return False
+            if self.percent_deadband and delta <= abs(last) * self.percent_deadband / 100: # type: ignore
+                return False
+            return True
+        return not values_equal(last, value)
+
+@dataclass
+class _ReportState:
+    config: ReportConfig
+    last_value: Any = None
+    last_time: float | None = None # time.monotonic() of the last publish
+    pending: Any = None
+    has_pending: bool = False
+
+    def published(self, value: TagBaseValue, now: float):
+        # copied so that mutating a list in place still counts as a change
+        self.last_value = copy.copy(value)
+        self.last_time = now
+        self.pending = None
+        self.has_pending = False
+
+    def next_deadline(self) -> float | None:
+        if self.last_time is None:
+            return None
+        deadlines = []
+        if self.has_pending:
+            deadlines.append(self.last_time + self.config.min_interval_ms / 1000)
+        if self.config.heartbeat_ms:
+            deadlines.append(self.last_time + self.config.heartbeat_ms / 1000)
+        return min(deadlines) if deadlines else None
+
+class ReportFilter:
+    '''
+    Enforces the report configs of a node's tags before anything is put on the network. Values held back
+    by min_interval_ms and heartbeats are published from a daemon thread through on_publish
+    '''
+    def __init__(self, tag_config: TagConfig, on_publish: Callable[[dict[str, TagBaseValue]], None]):
+        self._tag_config = tag_config
+        self._on_publish = on_publish
+        self._states: dict[str, _ReportState | None] = {} # path -> state, None if the path has no report config
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        tag_config.add_reindex_listener(self._forget)
+
+    def _state(self, path: str) -> _ReportState | None:
+        if path not in self._states:
+            entry = self._tag_config.lookup(path)
+            config = entry.tag.report if entry is not None else None
+            self._states[path] = _ReportState(config) if config is not None else None
+        return self._states[path]
+
+    def _forget(self, tag_path: str):
+        # the tag was added or replaced, so its paths are looked up again with its new report config
+        prefix = tag_path + "/"
+        with self._cond:
+            for path in [p for p in self._states if p == tag_path or p.startswith(prefix)]:
+                del self._states[path]
+
+    def offer(self, path: str, value: TagBaseValue) -> bool:
+        '''
+        Decides whether an update should be published now. If it returns True,
+        the value is recorded as published and the caller must publish it
+
+        Arguments:
+            path (str): The path of the tag
+            value (TagBaseValue): The new value of the tag
+
+        Returns:
+            bool: whether or not to publish value now
+        '''
+        with self._cond:
+            state = self._state(path)
+            if state is None:
+                return True
+            now = time.monotonic()
+            if state.last_time is None:
+                state.published(value, now)
+                self._schedule(state)
+                return True
+            config = state.config
+            elapsed = now - state.last_time
+            if not config.exceeds_deadband(state.last_value, value):
+                if config.max_interval_ms and elapsed >= config.max_interval_ms / 1000:
+                    state.published(value, now)
+                    self._schedule(state)
+                    return True
+                # back inside the deadband, whatever was held back is no longer worth sending
+                state.pending, state.has_pending = None, False
+                return False
+            if config.min_interval_ms and elapsed < config.min_interval_ms / 1000:
+                state.pending, state.has_pending = copy.copy(value), True
+                self._schedule(state)
+                return False
+            state.published(value, now)
+            self._schedule(state)
+            return True
+
+    def _schedule(self, state: _ReportState):
+        if state.next_deadline() is None:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="gedge-report", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due: dict[str, TagBaseValue] = {}
+                next_deadline = None
+                for path, state in self._states.items():
+                    deadline = state.next_deadline() if state else None
+                    if deadline is None:
+                        continue
+                    if deadline <= now:
+                        assert state is not None
+                        value = state.pending if state.has_pending else state.last_value
+                        due[path] = value
+                        state.published(value, now)
+                        deadline = state.next_deadline()
+                    if deadline is not None and (next_deadline is None or deadline < next_deadline):
+                        next_deadline = deadline
+                if not due:
+                    self._cond.wait(None if next_deadline is None else next_deadline - now)
+                    continue
+            try:
+                self._on_publish(due)
+            except Exception as e:
+                logger.warning(f"Could not publish held back tag values {list(due.keys())}: {repr(e)}")
+
+    def close(self):
+        self._tag_config.remove_reindex_listener(self._forget)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
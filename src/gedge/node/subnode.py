@@ -1,16 +1,24 @@
 from __future__ import annotations
-from typing import Any, Callable, Self
+from typing import Any, Callable, Self, TYPE_CHECKING
 import uuid
 
 from gedge import proto
 from gedge.comm.comm import Comm
 from gedge.comm.keys import NodeKeySpace, SubnodeKeySpace
+from gedge.comm.tag_router import TagSubscription
 from gedge.node.method import MethodConfig
 from gedge.node.method_response import ResponseConfig
 from gedge.node.node import NodeConfig, NodeSession
 from gedge.node.remote import RemoteConnection
+from gedge.node.aio import AsyncRemoteConnection
+from gedge.node.report import ReportFilter
 from gedge.node.tag_bind import TagBind
+from gedge.node.tag_publishers import TagPublishers
 from gedge.py_proto.tag_config import Tag, TagConfig
+if TYPE_CHECKING:
+    from gedge.comm.subscriptions import Subscription
+    from gedge.node.gtypes import TagDataCallback
+    from gedge.py_proto.meta import Meta
 
 import logging
 
@@ -84,32 +92,58 @@ class SubnodeSession(NodeSession):
         self.method_responses: dict[str, dict[int, ResponseConfig]] = {key:{r.code:r for r in value.responses} for key, value in self.methods.items()}
         self.subnodes: dict[str, SubnodeConfig] = self.config.subnodes
         self.binds: dict[str, TagBind] = {}
+        self._last_published: dict[str, TagBaseValue] = {}
+        self._report = ReportFilter(self.tag_config, self._publish_held)
+        self._publishers = TagPublishers(self._comm, self.ks)
     
     def subnode(self, name: str) -> SubnodeSession:
         session = SubnodeSession(self.subnodes[name], self._comm)
         return session
     
     def close(self):
+        self._report.close()
         self.update_state(False)
 
 class RemoteSubConnection(RemoteConnection):
-    def __init__(self, name: str, ks: SubnodeKeySpace, subnode_config: SubnodeConfig, comm: Comm, node_id: str, on_close: Callable[[str], None] | None = None):
+    def __init__(self, name: str, ks: SubnodeKeySpace, subnode_config: SubnodeConfig, comm: Comm, node_id: str, on_close: Callable[[str], None] | None = None, tag_subscription: TagSubscription = TagSubscription.PER_TAG):
         self._comm = comm 
         self.key = name
         self.ks = ks
         self.on_close = on_close
+        self.tag_subscription = tag_subscription
+        self._tag_subscribers: dict[str, list[tuple[TagDataCallback, Subscription]]] = dict()
 
         self.node_id = node_id
 
-        '''
-        TODO: perhaps we should subscribe to this node's meta message, in which case all the following utility variables (self.tags, self.methods, self.responses) 
-        would need to react to that (i.e. be properties)
-        '''
+        self._set_subnode_config(subnode_config)
+        self.aio = AsyncRemoteConnection(self)
+
+        # the subnode's config lives in the root node's meta, which is republished whenever the root (re)starts
+        self._comm.meta_cache.add_listener(ks, self._on_meta)
+
+    def _set_subnode_config(self, subnode_config: SubnodeConfig):
         self.meta = subnode_config
         self.tag_config = self.meta.tag_config
         self.methods = self.meta.methods
         self.responses: dict[str, dict[int, ResponseConfig]] = {key:{r.code:r for r in value.responses} for key, value in self.methods.items()}
         self.subnodes: dict[str, SubnodeConfig] = self.meta.subnodes
+
+    def _on_meta(self, key_expr: str, meta: Meta):
+        names: list[str] = []
+        ks: NodeKeySpace = self.ks
+        while isinstance(ks, SubnodeKeySpace):
+            names.insert(0, ks.subnode_name)
+            ks = ks._parent
+        config: NodeConfig | Meta = meta
+        for name in names:
+            if name not in config.subnodes:
+                logger.warning(f"Subnode {'/'.join(names)} is no longer in the meta of {meta.key}, keeping its last config")
+                return
+            config = config.subnodes[name]
+        logger.info(f"Received new meta for remote subnode {self.ks}")
+        assert isinstance(config, SubnodeConfig)
+        self._set_subnode_config(config)
+        self._comm.refresh_group_decoders(self.ks, self.tag_config)
     
     # TODO: this function is repeated 4 times, we need to refactor desperately
     def subnode(self, name: str) -> RemoteSubConnection:
@@ -125,13 +159,13 @@ class RemoteSubConnection(RemoteConnection):
             # we inherit comm
             # different uuid or same?
             assert isinstance(curr_node, SubnodeConfig)
-            r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close)
+            r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close, self.tag_subscription)
             return r
 
         if name not in self.subnodes:
             raise ValueError(f"No subnode {name} in config for {self.key}") 
         curr_node = self.subnodes[name]
-        r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close)
+        r = RemoteSubConnection(name, curr_node.ks, curr_node, self._comm, self.node_id, on_close, self.tag_subscription)
         return r
     
     def close(self):
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Callable, TYPE_CHECKING
+if TYPE_CHECKING:
+    from gedge.node.gtypes import TagBaseValue
+
+import logging
+logger = logging.getLogger(__name__)
+
+class TagBatch:
+    '''
+    Collects tag updates (e.g. one scan cycle of a PLC) and publishes them all at once when the batch is flushed.
+    Updating the same path twice in one batch only publishes the last value.
+
+    Example Implementation:
+        with session.batch(only_changed=True) as batch:
+            for path, value in plc.scan().items():
+                batch[path] = value
+    '''
+    def __init__(self, on_flush: Callable[[dict[str, TagBaseValue], bool], None], only_changed: bool = False):
+        self._on_flush = on_flush
+        self.only_changed = only_changed
+        self.values: dict[str, TagBaseValue] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        # a scan cycle that blew up halfway through should not publish half a cycle
+        if exc_type is None:
+            self.flush()
+        else:
+            logger.warning(f"Discarding batch of {len(self.values)} tag updates due to {exc_type.__name__}")
+            self.values = {}
+
+    def update_tag(self, path: str, value: TagBaseValue):
+        self.values[path] = value
+
+    def update_tags(self, tags: dict[str, TagBaseValue]):
+        self.values.update(tags)
+
+    def flush(self):
+        '''
+        Publishes everything collected so far and empties the batch
+
+        Arguments:
+            None
+
+        Returns:
+            None
+        '''
+        if not self.values:
+            return
+        values, self.values = self.values, {}
+        self._on_flush(values, self.only_changed)
+
+    def __setitem__(self, path: str, value: TagBaseValue):
+        self.update_tag(path, value)
+
+    def __len__(self) -> int:
+        return len(self.values)
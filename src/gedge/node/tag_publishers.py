@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import zenoh
+    from gedge.comm.comm import Comm
+    from gedge.comm.keys import NodeKeySpace
+
+import logging
+logger = logging.getLogger(__name__)
+
+class TagPublishers:
+    '''
+    The publishers of the tag and group data of one (sub)node, by path.
+    The key expression of a path is joined the first time it is updated, and its publisher is the one
+    Comm.publisher(...) declares for that key expression (the only place publishers are cached)
+    '''
+    def __init__(self, comm: Comm, ks: NodeKeySpace):
+        self._comm = comm
+        self._ks = ks
+        self._tag_keys: dict[str, str] = dict() # tag path -> key expression of its data
+        self._group_keys: dict[str, str] = dict() # group path -> key expression of its data
+
+    def tag(self, path: str) -> tuple[zenoh.Publisher, str]:
+        '''
+        Returns the publisher of the tag at path and its key expression
+        '''
+        key_expr = self._tag_keys.get(path)
+        if key_expr is None:
+            key_expr = self._tag_keys[path] = self._ks.tag_data_path(path)
+        return self._comm.publisher(key_expr), key_expr
+
+    def group(self, group_path: str) -> tuple[zenoh.Publisher, str]:
+        '''
+        Returns the publisher of the group at group_path and its key expression
+        '''
+        key_expr = self._group_keys.get(group_path)
+        if key_expr is None:
+            key_expr = self._group_keys[group_path] = self._ks.group_data_path(group_path)
+        return self._comm.publisher(key_expr), key_expr
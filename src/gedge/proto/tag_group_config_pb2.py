@@ -22,15 +22,16 @@ _runtime_version.ValidateProtobufRuntimeVersion(
 _sym_db = _symbol_database.Default()
 
 
+from . import response_config_pb2 as response__config__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x16tag_group_config.proto\"-\n\x0eTagGroupConfig\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\r\n\x05items\x18\x02 \x03(\tb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x16tag_group_config.proto\x1a\x15response_config.proto\"c\n\x0eTagGroupConfig\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\r\n\x05items\x18\x02 \x03(\t\x12\x10\n\x08writable\x18\x03 \x01(\x08\x12\"\n\tresponses\x18\x04 \x03(\x0b\x32\x0f.ResponseConfigb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'tag_group_config_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_TAGGROUPCONFIG']._serialized_start=26
-  _globals['_TAGGROUPCONFIG']._serialized_end=71
+  _globals['_TAGGROUPCONFIG']._serialized_start=49
+  _globals['_TAGGROUPCONFIG']._serialized_end=148
 # @@protoc_insertion_point(module_scope)
@@ -1,15 +1,20 @@
+from . import response_config_pb2 as _response_config_pb2
 from google.protobuf.internal import containers as _containers
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
-from collections.abc import Iterable as _Iterable
-from typing import ClassVar as _ClassVar, Optional as _Optional
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
 
 class TagGroupConfig(_message.Message):
-    __slots__ = ("path", "items")
+    __slots__ = ("path", "items", "writable", "responses")
     PATH_FIELD_NUMBER: _ClassVar[int]
     ITEMS_FIELD_NUMBER: _ClassVar[int]
+    WRITABLE_FIELD_NUMBER: _ClassVar[int]
+    RESPONSES_FIELD_NUMBER: _ClassVar[int]
     path: str
     items: _containers.RepeatedScalarFieldContainer[str]
-    def __init__(self, path: _Optional[str] = ..., items: _Optional[_Iterable[str]] = ...) -> None: ...
+    writable: bool
+    responses: _containers.RepeatedCompositeFieldContainer[_response_config_pb2.ResponseConfig]
+    def __init__(self, path: _Optional[str] = ..., items: _Optional[_Iterable[str]] = ..., writable: bool = ..., responses: _Optional[_Iterable[_Union[_response_config_pb2.ResponseConfig, _Mapping]]] = ...) -> None: ...
@@ -1,19 +1,44 @@
 from __future__ import annotations
 
+from operator import attrgetter
+
 from gedge import proto
-from typing import Any, Self, TYPE_CHECKING
+from typing import Any, Callable, Self, TYPE_CHECKING
 
+from gedge.py_proto import ndarray
 from gedge.py_proto.base_type import BaseType
 from gedge.py_proto.props import Prop
 
 if TYPE_CHECKING:
     from gedge.node.gtypes import TagBaseValue
 
+# marks the side of a BaseData (value or proto) that has not been materialized yet
+_UNSET: Any = object()
+
 class BaseData:
-    def __init__(self, proto_: proto.BaseData, type: BaseType):
+    '''
+    A base type value, held as a Python value, a proto, or both. Whichever side it was built 
+    from is kept, and the other is only converted to the first time it is asked for, 
+    so publishing a value does not decode the proto it was just encoded to
+    '''
+    __slots__ = ("type", "_proto", "_value")
+
+    def __init__(self, proto_: proto.BaseData | None, type: BaseType, value: TagBaseValue = _UNSET):
         self.type = type
-        self.proto = proto_
-        self.value = self.proto_to_py(self.proto, self.type)
+        self._proto = proto_
+        self._value = value
+
+    @property
+    def proto(self) -> proto.BaseData:
+        if self._proto is None:
+            self._proto = self.py_to_proto(self._value, self.type)
+        return self._proto
+
+    @property
+    def value(self) -> TagBaseValue:
+        if self._value is _UNSET:
+            self._value = self.proto_to_py(self._proto, self.type) # type: ignore
+        return self._value
     
     def to_proto(self) -> proto.BaseData:
         return self.proto
@@ -27,8 +52,7 @@ class BaseData:
     
     @classmethod
     def from_value(cls, value: TagBaseValue, type: BaseType) -> Self:
-        proto = cls.py_to_proto(value, type)
-        return cls(proto, type)
+        return cls(None, type, value)
     
     @classmethod
     def from_json5(cls, json5: Any) -> Self:
@@ -38,59 +62,88 @@ class BaseData:
     def to_json5(self) -> TagBaseValue:
         return self.to_py()
 
+    @classmethod
+    def encoder(cls, type: BaseType) -> Callable[[TagBaseValue], proto.BaseData]:
+        '''
+        Returns the function that encodes values of the passed type, resolved once so that encoding does not dispatch on type
+        '''
+        encoder = _ENCODERS.get(type)
+        if encoder is None:
+            raise ValueError(f"Unknown tag type {type}")
+        return encoder
+
+    @classmethod
+    def decoder(cls, type: BaseType) -> Callable[[proto.BaseData], TagBaseValue]:
+        '''
+        Returns the function that decodes values of the passed type, resolved once so that decoding does not dispatch on type
+        '''
+        decoder = _DECODERS.get(type)
+        if decoder is None:
+            raise ValueError(f"Cannot convert tag to type {type}")
+        return decoder
+
     @classmethod
     def py_to_proto(cls, value: TagBaseValue, type: BaseType) -> proto.BaseData:
-        data = proto.BaseData()
-        match type:
-            case BaseType.INT:
-                data.int_data = int(value) # type: ignore
-            case BaseType.LONG:
-                data.long_data = int(value) # type: ignore
-            case BaseType.FLOAT:
-                data.float_data = float(value) # type: ignore
-            case BaseType.STRING:
-                data.string_data = str(value)
-            case BaseType.BOOL:
-                data.bool_data = bool(value)
-            case BaseType.LIST_INT:
-                data.list_int_data.list.extend(list([int(x) for x in value])) # type: ignore
-            case BaseType.LIST_LONG:
-                data.list_long_data.list.extend(list([int(x) for x in value])) # type: ignore
-            case BaseType.LIST_FLOAT:
-                data.list_float_data.list.extend(list([float(x) for x in value])) # type: ignore
-            case BaseType.LIST_STRING:
-                data.list_string_data.list.extend(list([str(x) for x in value])) # type: ignore
-            case BaseType.LIST_BOOL:
-                data.list_bool_data.list.extend(list([bool(x) for x in value])) # type: ignore
-            case _:
-                raise ValueError(f"Unknown tag type {type}")
-        return data
+        return cls.encoder(type)(value)
 
     @classmethod
     def proto_to_py(cls, value: proto.BaseData, type: BaseType) -> TagBaseValue:
-        tag_data = value
-        match type:
-            case BaseType.INT:
-                return int(tag_data.int_data)
-            case BaseType.LONG:
-                return int(tag_data.long_data)
-            case BaseType.FLOAT:
-                return float(tag_data.float_data)
-            case BaseType.STRING:
-                return str(tag_data.string_data)
-            case BaseType.BOOL:
-                return bool(tag_data.bool_data)
-            case BaseType.LIST_INT:
-                return list(tag_data.list_int_data.list)
-            case BaseType.LIST_LONG:
-                return list(tag_data.list_long_data.list)
-            case BaseType.LIST_FLOAT:
-                return list(tag_data.list_float_data.list)
-            case BaseType.LIST_STRING:
-                return list(tag_data.list_string_data.list)
-            case BaseType.LIST_BOOL:
-                return list(tag_data.list_bool_data.list)
-        raise ValueError(f"Cannot convert tag to type {type}")
+        return cls.decoder(type)(value)
     
     def __repr__(self) -> str:
         return f"BaseData('{self.value}')"
+
+
+def _scalar_encoder(field: str, convert: Callable[[Any], Any]) -> Callable[[TagBaseValue], proto.BaseData]:
+    def encode(value: TagBaseValue) -> proto.BaseData:
+        return proto.BaseData(**{field: convert(value)})
+    return encode
+
+def _scalar_decoder(field: str) -> Callable[[proto.BaseData], TagBaseValue]:
+    return attrgetter(field)
+
+def _list_encoder(type: BaseType, field: str, convert: Callable[[Any], Any]) -> Callable[[TagBaseValue], proto.BaseData]:
+    packable = ndarray.is_packable(type)
+    def encode(value: TagBaseValue) -> proto.BaseData:
+        data = proto.BaseData()
+        if packable and ndarray.is_ndarray(value):
+            ndarray.to_proto(value, type, data)
+            return data
+        getattr(data, field).list.extend([convert(x) for x in value]) # type: ignore
+        return data
+    return encode
+
+def _list_decoder(type: BaseType, field: str) -> Callable[[proto.BaseData], TagBaseValue]:
+    packable = ndarray.is_packable(type)
+    get_list = attrgetter(f"{field}.list")
+    def decode(data: proto.BaseData) -> TagBaseValue:
+        if packable and ndarray.as_numpy():
+            return ndarray.from_proto(data, type)
+        return list(get_list(data))
+    return decode
+
+_ENCODERS: dict[BaseType, Callable[[TagBaseValue], proto.BaseData]] = {
+    BaseType.INT: _scalar_encoder("int_data", int),
+    BaseType.LONG: _scalar_encoder("long_data", int),
+    BaseType.FLOAT: _scalar_encoder("float_data", float),
+    BaseType.STRING: _scalar_encoder("string_data", str),
+    BaseType.BOOL: _scalar_encoder("bool_data", bool),
+    BaseType.LIST_INT: _list_encoder(BaseType.LIST_INT, "list_int_data", int),
+    BaseType.LIST_LONG: _list_encoder(BaseType.LIST_LONG, "list_long_data", int),
+    BaseType.LIST_FLOAT: _list_encoder(BaseType.LIST_FLOAT, "list_float_data", float),
+    BaseType.LIST_STRING: _list_encoder(BaseType.LIST_STRING, "list_string_data", str),
+    BaseType.LIST_BOOL: _list_encoder(BaseType.LIST_BOOL, "list_bool_data", bool),
+}
+
+_DECODERS: dict[BaseType, Callable[[proto.BaseData], TagBaseValue]] = {
+    BaseType.INT: _scalar_decoder("int_data"),
+    BaseType.LONG: _scalar_decoder("long_data"),
+    BaseType.FLOAT: _scalar_decoder("float_data"),
+    BaseType.STRING: _scalar_decoder("string_data"),
+    BaseType.BOOL: _scalar_decoder("bool_data"),
+    BaseType.LIST_INT: _list_decoder(BaseType.LIST_INT, "list_int_data"),
+    BaseType.LIST_LONG: _list_decoder(BaseType.LIST_LONG, "list_long_data"),
+    BaseType.LIST_FLOAT: _list_decoder(BaseType.LIST_FLOAT, "list_float_data"),
+    BaseType.LIST_STRING: _list_decoder(BaseType.LIST_STRING, "list_string_data"),
+    BaseType.LIST_BOOL: _list_decoder(BaseType.LIST_BOOL, "list_bool_data"),
+}
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Iterable, TYPE_CHECKING
+
+from gedge import proto
+
+if TYPE_CHECKING:
+    from gedge.node.gtypes import TagValue
+    from gedge.py_proto.data_model_config import DataItemConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Codec:
+    '''
+    The encoder and decoder of one DataItemConfig, compiled once from its type.
+    The codec of a model holds the (compiled) codecs of its items, so encoding and decoding a value
+    of any depth neither dispatches on types nor loads models
+    '''
+    __slots__ = ("encode", "decode")
+
+    def __init__(self):
+        self.encode: Callable[[TagValue], proto.DataItem] = _uncompiled
+        self.decode: Callable[[proto.DataItem], TagValue] = _uncompiled
+
+def _uncompiled(_: Any) -> Any:
+    raise RuntimeError("codec used before it was compiled")
+
+def codec(config: DataItemConfig) -> Codec:
+    '''
+    Returns the codec of the passed config, compiling it (and the codecs of everything nested in it) the first time
+
+    Arguments:
+        config (DataItemConfig): The config to get the codec of
+
+    Returns:
+        Codec
+    '''
+    c = config._codec
+    if c is not None:
+        return c
+    with _lock:
+        c = config._codec
+        if c is None:
+            compiling: dict[int, tuple[DataItemConfig, Codec]] = {}
+            c = _compile(config, compiling)
+            # only published once every codec is complete, so another thread never sees one that is half compiled
+            for item, item_codec in compiling.values():
+                item._codec = item_codec
+    return c
+
+def codecs(configs: Iterable[DataItemConfig]) -> dict[str, Codec]:
+    '''
+    Returns the codecs of the passed configs (e.g. the params of a method), by path
+    '''
+    return {c.path: codec(c) for c in configs}
+
+def encode_dict(value: dict[str, TagValue], codecs: dict[str, Codec]) -> dict[str, proto.DataItem]:
+    try:
+        return {k: codecs[k].encode(v) for k, v in value.items()}
+    except KeyError as e:
+        raise LookupError(f"No item with path {e.args[0]}, must be one of {list(codecs)}")
+
+def decode_dict(value: dict[str, proto.DataItem] | Any, codecs: dict[str, Codec]) -> dict[str, TagValue]:
+    try:
+        return {k: codecs[k].decode(v) for k, v in value.items()}
+    except KeyError as e:
+        raise LookupError(f"No item with path {e.args[0]}, must be one of {list(codecs)}")
+
+# compiling is rare and quick, one lock keeps two threads from compiling (and publishing) the same codec
+_lock = threading.RLock()
+
+def _compile(config: DataItemConfig, compiling: dict[int, tuple[DataItemConfig, Codec]]) -> Codec:
+    c = config._codec
+    if c is not None:
+        return c
+    entry = compiling.get(id(config))
+    if entry is not None:
+        # a model that (indirectly) contains itself, filled in once its outermost compile returns
+        return entry[1]
+    c = Codec()
+    compiling[id(config)] = (config, c)
+    base_type = config.get_base_type()
+    if base_type is not None:
+        _compile_base(c, config, base_type)
+    else:
+        _compile_model(c, config, compiling)
+    return c
+
+def _compile_base(c: Codec, config: DataItemConfig, base_type: Any):
+    from gedge.py_proto.base_data import BaseData
+    encode_base = BaseData.encoder(base_type)
+    decode_base = BaseData.decoder(base_type)
+    path = config.path
+
+    def encode(value: TagValue) -> proto.DataItem:
+        if isinstance(value, dict):
+            raise LookupError(f"Passed in model data {value}, but configuration {path} is a base type!")
+        return proto.DataItem(base_data=encode_base(value)) # type: ignore
+
+    def decode(item: proto.DataItem) -> TagValue:
+        if not item.HasField("base_data"):
+            raise ValueError(f"config {path} is a base type but proto has {item.WhichOneof('data')}")
+        return decode_base(item.base_data)
+
+    c.encode, c.decode = encode, decode
+
+def _compile_model(c: Codec, config: DataItemConfig, compiling: dict[int, tuple[DataItemConfig, Codec]]):
+    model = config.load_model()
+    if model is None:
+        raise LookupError(f"No tags found on model {config.path}")
+    items = {item.path: _compile(item, compiling) for item in model.items}
+    path = config.path
+
+    def encode(value: TagValue) -> proto.DataItem:
+        if not isinstance(value, dict):
+            raise LookupError(f"Passed in python value {value}, but configuration {path} is a model!")
+        data = {}
+        for k, v in value.items():
+            item = items.get(k)
+            if item is None:
+                raise LookupError(f"No tag with path {k} defined on model {model.path}, but that tag is in the model data!")
+            data[k] = item.encode(v)
+        return proto.DataItem(model_data=proto.DataModel(data=data))
+
+    def decode(item: proto.DataItem) -> TagValue:
+        if not item.HasField("model_data"):
+            raise ValueError(f"config {path} is a model but proto has {item.WhichOneof('data')}")
+        return decode_dict(item.model_data.data, items)
+
+    c.encode, c.decode = encode, decode
+    logger.debug(f"Compiled codec for {path} (model {model.full_path})")
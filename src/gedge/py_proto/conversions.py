@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, TypeVar
 
 from gedge import proto
-from gedge.py_proto.data_model import DataItem
+from gedge.py_proto.codec import codecs, decode_dict, encode_dict
 from gedge.py_proto.data_model_config import DataItemConfig
 from gedge.py_proto.props import Prop
 from gedge.py_proto.type import Type
@@ -36,11 +36,7 @@ def props_to_json5(props: list[Prop]) -> dict[str, Any]:
     return j
 
 def dict_proto_to_value(proto: dict[str, proto.DataItem], config: list[DataItemConfig]) -> dict[str, TagValue]:
-    c: dict[str, DataItemConfig] = {i.path: i for i in config}
-    value_dict: dict[str, TagValue] = {k: DataItem.proto_to_py(v, c[k]) for k, v in proto.items()}
-    return value_dict
+    return decode_dict(proto, codecs(config))
 
 def dict_value_to_proto(value: dict[str, TagValue], config: list[DataItemConfig]) -> dict[str, proto.DataItem]:
-    c: dict[str, DataItemConfig] = {i.path: i for i in config}
-    proto = {k: DataItem.py_to_proto(v, c[k]) for k, v in value.items()}
-    return proto
\ No newline at end of file
+    return encode_dict(value, codecs(config))
\ No newline at end of file
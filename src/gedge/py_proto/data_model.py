@@ -1,12 +1,10 @@
 from __future__ import annotations
-from ast import mod
-from dataclasses import dataclass
-from email.mime import base
 from typing import Any, Self, TYPE_CHECKING
 
 from gedge import proto
 from gedge.comm.keys import key_join
 from gedge.py_proto.base_type import BaseType
+from gedge.py_proto.codec import codec
 from gedge.py_proto.data_model_config import DataModelConfig, DataItemConfig
 from gedge.py_proto.type import Type
 
@@ -14,10 +12,55 @@ if TYPE_CHECKING:
     from gedge.py_proto.base_data import BaseData
     from gedge.node.gtypes import TagBaseValue, TagValue
 
-@dataclass
 class DataItem:
-    data: BaseData | dict[str, DataItem]
-    config: DataItemConfig
+    '''
+    The value of a DataItemConfig, a BaseData for base types or a dict of the items of a model.
+    A DataItem decoded from a proto keeps the proto and only builds the items of a model the first time 
+    they are accessed, and encodes back to that same proto
+    '''
+    __slots__ = ("_data", "config", "_proto")
+
+    def __init__(self, data: BaseData | dict[str, DataItem] | None, config: DataItemConfig, proto_: proto.DataItem | None = None):
+        self._data = data
+        self.config = config
+        self._proto = proto_
+
+    @property
+    def data(self) -> BaseData | dict[str, DataItem]:
+        if self._data is None:
+            self._data = self._decode(self._proto, self.config) # type: ignore
+            # the items can be changed from here on, so the proto is encoded again when it is asked for
+            self._proto = None
+        return self._data
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DataItem):
+            return NotImplemented
+        return self.config == other.config and self.to_proto() == other.to_proto()
+
+    def __repr__(self) -> str:
+        return f"DataItem(data={self.data!r}, config={self.config!r})"
+
+    @staticmethod
+    def _model_configs(config: DataItemConfig) -> dict[str, DataItemConfig]:
+        model_config = config.load_model()
+        if model_config is None:
+            raise LookupError(f"No tags found on model {config.path}")
+        return {c.path: c for c in model_config.items}
+
+    @staticmethod
+    def _decode(proto: proto.DataItem, config: DataItemConfig) -> BaseData | dict[str, DataItem]:
+        from gedge.py_proto.base_data import BaseData
+        oneof = proto.WhichOneof("data")
+        if oneof == "base_data":
+            type = config.get_base_type()
+            if not type:
+                raise ValueError(f"config is not base type but proto has {proto.base_data} base data")
+            return BaseData.from_proto(proto.base_data, type)
+        elif oneof == "model_data":
+            configs = DataItem._model_configs(config)
+            return {k: DataItem.from_proto(v, configs[k]) for k, v in proto.model_data.data.items()}
+        raise LookupError(f"No values set in protobuf DataItem except {oneof}")
 
     @classmethod
     def from_json5(cls, j: Any, config: DataItemConfig) -> Self:
@@ -51,6 +94,8 @@ class DataItem:
         return res
 
     def to_proto(self) -> proto.DataItem:
+        if self._proto is not None:
+            return self._proto
         if self.is_base_data():
             return proto.DataItem(base_data=self.data.to_proto()) # type: ignore
         res = {k: v.to_proto() for k, v in self.data.items()} # type: ignore
@@ -58,48 +103,27 @@ class DataItem:
 
     @classmethod
     def from_proto(cls, proto: proto.DataItem, config: DataItemConfig) -> Self:
-        from gedge.py_proto.base_data import BaseData
-        oneof = proto.WhichOneof("data")
-        if oneof == "base_data":
-            type = config.get_base_type()
-            if not type:
-                raise ValueError(f"config is not base type but proto has {proto.base_data} base data")
-            data = BaseData.from_proto(proto.base_data, type)
-        elif oneof == "model_data":
-            model_data = dict(proto.model_data.data)
-            model_config = config.load_model()
-            if model_config is None:
-                raise ValueError(f"No items in config {config}, but we have a dict of {model_data}")
-            
-            # new_data = [DataItem.from_proto(d, c) for d, c in zip(data, model_config.items)]
-            configs = {i.path: i for i in model_config.items}
-            data = {k:DataItem.from_proto(v, configs[k]) for k, v in model_data.items()}
-        else:
-            raise LookupError(f"No values set in protobuf DataItem except {oneof}")
-        return cls(data, config)
+        return cls(None, config, proto)
     
     @classmethod
     def py_to_proto(cls, value: TagValue, config: DataItemConfig) -> proto.DataItem:
-        return cls.from_value(value, config).to_proto()
+        # straight to proto with the compiled codec, without building a DataItem for every item on the way
+        return codec(config).encode(value)
     
     @classmethod
     def proto_to_py(cls, proto: proto.DataItem, config: DataItemConfig) -> TagValue:
-        return cls.from_proto(proto, config).to_value()
+        # straight from proto with the compiled codec, without building a DataItem for every item on the way
+        return codec(config).decode(proto)
     
     @classmethod
     def from_model_value(cls, value: dict, config: DataItemConfig) -> Self:
-        res = cls({}, config)
-        assert isinstance(res.data, dict)
-        model_config = config.load_model()
-        if model_config is None:
-            raise LookupError(f"No tags found on model {config.path}")
-        configs = {c.path: c for c in model_config.items}
+        data: dict[str, DataItem] = {}
+        configs = cls._model_configs(config)
         for k, v in value.items():
             if k not in configs:
-                raise LookupError(f"No tag with path {k} defined on model {model_config.path}, but that tag is in the model data!")
-            res.data[k] = cls.from_value(v, configs[k])
-            # res.data.append(cls.from_value(value[k], v))
-        return res
+                raise LookupError(f"No tag with path {k} defined on model {config.path}, but that tag is in the model data!")
+            data[k] = cls.from_value(v, configs[k])
+        return cls(data, config)
     
     @classmethod
     def from_py_value(cls, value: Any, config: DataItemConfig) -> Self:
@@ -116,6 +140,8 @@ class DataItem:
         return cls.from_py_value(value, config) 
     
     def to_value(self) -> TagValue:
+        if self._data is None:
+            return self.proto_to_py(self._proto, self.config) # type: ignore
         if self.is_base_data():
             return self.data.to_py() # type: ignore
 
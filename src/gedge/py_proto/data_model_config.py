@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 import pathlib
-from typing import Any, Self, TYPE_CHECKING
+from typing import Any, Self, Sequence, TYPE_CHECKING
 
 import json5
 
@@ -15,6 +15,7 @@ from gedge.py_proto.singleton import Singleton
 from gedge.py_proto.type import Type
 
 if TYPE_CHECKING:
+    from gedge.py_proto.codec import Codec
     from gedge.py_proto.props import Prop
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,9 @@ class DataItemConfig:
     type: Type
     props: list[Prop]
 
+    # compiled on first use by gedge.py_proto.codec.codec(...)
+    _codec: Codec | None = field(default=None, init=False, repr=False, compare=False)
+
     def to_proto(self) -> proto.DataItemConfig:
         props = [p.to_proto() for p in self.props]
         return proto.DataItemConfig(path=self.path, type=self.type.to_proto(), props=props)
@@ -81,7 +85,10 @@ class DataModelConfig:
     path: str
     parent: DataModelRef | None
     version: int
-    items: list[DataItemConfig]
+    items: Sequence[DataItemConfig]
+
+    # set once the parent's items have been resolved into items, which are then a tuple
+    _flattened: bool = field(default=False, init=False, repr=False, compare=False)
 
     @property
     def full_path(self):
@@ -167,13 +174,18 @@ class DataModelConfig:
         return cls(path, parent, version, tags)
     
     def add_parent_tags(self):
-        if not self.parent:
+        '''
+        Resolves the items this model inherits from its parent into items. Only does anything the first time it is called
+        '''
+        if self._flattened:
             return
-        model = load(self.parent)
-        model.add_parent_tags()
-
-        # where the inheritance happens
-        for tag in model.items:
-            self.items.append(tag)
-
-        return
+        items = list(self.items)
+        if self.parent:
+            # the parent comes out of the registry already flattened
+            model = load(self.parent)
+
+            # where the inheritance happens, the model's own items win over inherited ones
+            paths = {item.path for item in items}
+            items += [item for item in model.items if item.path not in paths]
+        self.items = tuple(items)
+        self._flattened = True
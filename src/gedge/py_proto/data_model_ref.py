@@ -64,6 +64,4 @@ class DataModelRef:
         return cls(keys.key_join(*components))
     
     def load_model(self) -> DataModelConfig:
-        m = load(self)
-        m.add_parent_tags()
-        return m
\ No newline at end of file
+        return load(self)
\ No newline at end of file
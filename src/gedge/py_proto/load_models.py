@@ -6,35 +6,18 @@ import re
 from typing import TYPE_CHECKING
 
 import json5
-from gedge.py_proto.singleton import Singleton
 
 if TYPE_CHECKING:
     from gedge.py_proto.data_model_config import DataModelConfig
     from gedge.py_proto.data_model_ref import DataModelRef
 
 
-# should this be a try/except or return None?
-# probably should just error out, if they try to load but no model, that's an exception
 def load(path: DataModelRef) -> DataModelConfig:
-
-    # acts as a bit of a cache, so we have to go to the filesystem less and less
-    config = Singleton().get_model(path.full_path)
-    if config is not None:
-        return config 
-
-    directory = Singleton().get_model_dir()
-    if not directory:
-        raise LookupError(f"Trying to find model {path.path} but no model directory passed in. For the cli, use --model-dir. For Python, use gedge.use_models(...)")
-    if path.version is None:
-        dir = pathlib.Path(directory) / path.path
-        path.version = find_latest_version(str(dir))
-    p = path.to_file_path()
-    path_to_json = pathlib.Path(directory) / p
-
-    config = load_from_file(str(path_to_json))
-    # add to cache so next time we retrieve this, it's in the Singleton
-    Singleton().add_model(config)
-    return config
+    '''
+    Returns the flattened model that path points to, from the model registry (which loads it from the model directory if need be)
+    '''
+    from gedge.py_proto.model_registry import model_registry
+    return model_registry().get(path)
 
 def load_from_file(path: str) -> DataModelConfig:
     from gedge.py_proto.data_model_config import DataModelConfig
@@ -1,8 +1,10 @@
 
 from dataclasses import dataclass
+from functools import cached_property
 
 from gedge import proto
 from gedge.comm.keys import NodeKeySpace
+from gedge.comm.wire_format import WIRE_FORMAT_PROP, WireFormat
 from gedge.node.method import MethodConfig
 from gedge.node.subnode import SubnodeConfig
 from gedge.py_proto.data_model_config import DataModelConfig
@@ -20,6 +22,13 @@ class Meta:
     models: dict[str, DataModelConfig]
     props: dict[str, Prop]
 
+    @property
+    def wire_format(self) -> WireFormat:
+        # nodes that predate the raw wire format do not advertise anything and speak base64
+        if WIRE_FORMAT_PROP not in self.props:
+            return WireFormat.BASE64
+        return WireFormat.from_json5(self.props[WIRE_FORMAT_PROP].to_value())
+
     @classmethod
     def from_proto(cls, proto: proto.Meta):
         key = proto.key
@@ -39,4 +48,31 @@ class Meta:
         props: list[proto.Prop] = [p.to_proto() for p in self.props.values()]
         meta = proto.Meta(key=self.key, tags=tags, methods=methods, subnodes=subnodes, models=models, props=props)
         return meta
-    
+
+class LazyMeta(Meta):
+    '''
+    A Meta that only decodes its key and props up front. Tags, methods, subnodes and models
+    are decoded the first time they are accessed, so listing the nodes on a large network
+    does not decode the config of every one of them
+    '''
+    def __init__(self, proto: proto.Meta):
+        self._proto = proto
+        self.key = proto.key
+        self.props = {p.key: Prop.from_proto(p) for p in proto.props}
+
+    @cached_property
+    def tags(self) -> TagConfig: # type: ignore
+        return TagConfig.from_proto(self._proto.tags)
+
+    @cached_property
+    def methods(self) -> dict[str, MethodConfig]: # type: ignore
+        return {m.path: MethodConfig.from_proto(m) for m in self._proto.methods}
+
+    @cached_property
+    def subnodes(self) -> dict[str, SubnodeConfig]: # type: ignore
+        ks = NodeKeySpace.from_user_key(self.key)
+        return {s.name: SubnodeConfig.from_proto(s, ks) for s in self._proto.subnodes}
+
+    @cached_property
+    def models(self) -> dict[str, DataModelConfig]: # type: ignore
+        return {DataModelRef(m.path, m.version).full_path: DataModelConfig.from_proto(m) for m in self._proto.models}
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import copy
+from dataclasses import dataclass
+import pathlib
+import threading
+from typing import Iterable, TYPE_CHECKING
+
+from gedge.py_proto.model_store import model_store
+from gedge.py_proto.singleton import Singleton
+
+if TYPE_CHECKING:
+    from gedge.py_proto.data_model_config import DataModelConfig
+    from gedge.py_proto.data_model_ref import DataModelRef
+
+import logging
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RegistryStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+class ModelRegistry:
+    '''
+    Every model this process has loaded, keyed by (path, version), so two versions of one model never collide.
+    Models are flattened (their parent's items resolved into their own) once, when they are added, and are
+    shared by everything that references them, so they must be treated as read-only.
+
+    If max_size is set, the least recently used models are evicted once there are more than max_size of them.
+    An evicted model is simply loaded again the next time it is needed.
+    '''
+    def __init__(self, max_size: int | None = None):
+        self._models: OrderedDict[tuple[str, int], DataModelConfig] = OrderedDict()
+        self._latest: dict[str, int] = dict() # path -> version that an unversioned reference resolved to
+        self._stats = RegistryStats()
+        self._generation = 0
+        self._lock = threading.RLock()
+        self.max_size = max_size
+
+    @property
+    def generation(self) -> int:
+        '''
+        Changes every time a model is registered or the registry is cleared, so a model that could not be loaded is
+        only worth trying again once it changed
+        '''
+        return self._generation
+
+    @property
+    def max_size(self) -> int | None:
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size: int | None):
+        if max_size is not None and max_size < 1:
+            raise ValueError(f"model registry must hold at least one model, got max_size={max_size}")
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def _evict(self):
+        while self._max_size is not None and len(self._models) > self._max_size:
+            evicted, _ = self._models.popitem(last=False)
+            self._stats.evictions += 1
+            logger.debug(f"Evicted model {evicted[0]} (version {evicted[1]}) from the model registry")
+
+    def get(self, ref: DataModelRef) -> DataModelConfig:
+        '''
+        Returns the flattened model that ref points to, loading it from the model directory if it is not registered.
+        An unversioned ref is resolved to the latest version once, and pinned to that version
+
+        Arguments:
+            ref (DataModelRef): The model to get
+
+        Returns:
+            DataModelConfig: The flattened model
+        '''
+        if ref.version is None:
+            ref.version = self._latest_version(ref.path)
+        key = (ref.path, ref.version)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._stats.hits += 1
+                self._models.move_to_end(key)
+                return model
+            self._stats.misses += 1
+
+        directory = Singleton().get_model_dir()
+        if not directory:
+            raise LookupError(f"Trying to find model {ref.path} but no model directory passed in. For the cli, use --model-dir. For Python, use gedge.use_models(...)")
+        model = model_store(directory).load(ref.path, ref.version)
+        return self.add(model)
+
+    def add(self, model: DataModelConfig) -> DataModelConfig:
+        '''
+        Flattens a copy of the passed model and registers it, replacing any model already registered at its path and version
+
+        Arguments:
+            model (DataModelConfig): The model to add
+
+        Returns:
+            DataModelConfig: The flattened model
+        '''
+        model = copy.copy(model)
+        model.add_parent_tags()
+        key = (model.path, model.version)
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            self._generation += 1
+            if model.path in self._latest and model.version > self._latest[model.path]:
+                self._latest[model.path] = model.version
+            self._evict()
+        return model
+
+    def add_all(self, models: Iterable[DataModelConfig]) -> None:
+        '''
+        Registers models that may inherit from each other (e.g. everything pulled for one model) in one go, parents first
+
+        Arguments:
+            models (Iterable[DataModelConfig]): The models to add
+
+        Returns:
+            None
+        '''
+        batch = {(m.path, m.version): m for m in models}
+        added: set[tuple[str, int]] = set()
+        def _add(model: DataModelConfig):
+            key = (model.path, model.version)
+            if key in added:
+                return
+            added.add(key)
+            parent = model.parent
+            if parent is not None:
+                version = parent.version
+                if version is None:
+                    version = max([v for p, v in batch if p == parent.path], default=None)
+                if (parent.path, version) in batch:
+                    _add(batch[(parent.path, version)])
+            self.add(model)
+        with self._lock:
+            for model in batch.values():
+                _add(model)
+
+    def lookup(self, path: str, version: int) -> DataModelConfig | None:
+        '''
+        Returns the model registered at path and version, without loading it
+
+        Arguments:
+            path (str): The path of the model
+            version (int): The version of the model
+
+        Returns:
+            DataModelConfig | None: The flattened model, None if it is not registered
+        '''
+        with self._lock:
+            return self._models.get((path, version))
+
+    def _latest_version(self, path: str) -> int:
+        with self._lock:
+            if path in self._latest:
+                return self._latest[path]
+        directory = Singleton().get_model_dir()
+        version = None
+        if directory:
+            try:
+                version = model_store(directory).latest_version(path)
+            except LookupError:
+                pass
+        if version is None:
+            with self._lock:
+                versions = [v for p, v in self._models if p == path]
+            if not versions:
+                if not directory:
+                    raise LookupError(f"Trying to find model {path} but no model directory passed in. For the cli, use --model-dir. For Python, use gedge.use_models(...)")
+                raise LookupError(f"No local version of model found in {pathlib.Path(directory) / path}")
+            version = max(versions)
+        with self._lock:
+            self._latest[path] = version
+        return version
+
+    def stats(self) -> RegistryStats:
+        '''
+        Returns a snapshot of the registry's hit, miss and eviction counters and its size
+        '''
+        with self._lock:
+            return RegistryStats(self._stats.hits, self._stats.misses, self._stats.evictions, len(self._models))
+
+    def clear(self) -> None:
+        '''
+        Forgets every model (e.g. after the model directory changed). Counters are kept
+        '''
+        with self._lock:
+            self._models.clear()
+            self._latest.clear()
+            self._generation += 1
+
+_registry = ModelRegistry()
+
+def model_registry() -> ModelRegistry:
+    '''
+    Returns the model registry of this process
+    '''
+    return _registry
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import re
+import struct
+import threading
+from typing import Any, TYPE_CHECKING
+
+from gedge import proto
+from gedge.py_proto.load_models import find_latest_version, load_from_file, to_file_path
+
+if TYPE_CHECKING:
+    from gedge.py_proto.data_model_config import DataModelConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+# one file in the model directory: MAGIC, the length of the manifest, the manifest (json), then the serialized models
+STORE_FILE = ".gedge-models"
+MAGIC = b"GEDGEMS1"
+_HEADER = struct.Struct("<8sQ")
+_MODEL_FILE = re.compile(r'v(\d+).json5')
+
+class ModelStore:
+    '''
+    A compiled copy of the json5 models in a model directory, kept in the directory itself (.gedge-models).
+    It holds every model as a serialized proto.DataModelConfig, plus a manifest of each source file's
+    mtime and size and of each model's latest version, and is read in one shot.
+
+    Parsing json5 is slow, so a model is only parsed from json5 when its source file changed since the
+    store was compiled. refresh() (called by gedge.use_models and 'gedge compile') recompiles what changed.
+    '''
+    def __init__(self, model_dir: str):
+        self.model_dir = pathlib.Path(model_dir)
+        self._lock = threading.Lock()
+        self._files: dict[str, dict[str, Any]] = dict() # relative source file -> {mtime_ns, size, offset, length}
+        self._latest: dict[str, dict[str, Any]] = dict() # model path -> {version, mtime_ns (of its directory)}
+        self._blob = b""
+        self._read()
+
+    @property
+    def store_path(self) -> pathlib.Path:
+        return self.model_dir / STORE_FILE
+
+    def _read(self):
+        try:
+            with open(self.store_path, "rb") as f:
+                data = f.read()
+            magic, length = _HEADER.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError(f"unknown format {magic}")
+            manifest = json.loads(data[_HEADER.size:_HEADER.size + length])
+            self._files = manifest["files"]
+            self._latest = manifest["latest"]
+            self._blob = data[_HEADER.size + length:]
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compiled model store {self.store_path}: {repr(e)}")
+            self._files, self._latest, self._blob = dict(), dict(), b""
+
+    def _stat(self, file: pathlib.Path) -> os.stat_result:
+        try:
+            return os.stat(file)
+        except FileNotFoundError:
+            raise LookupError(f"No model found at path {file}")
+
+    def load(self, path: str, version: int) -> DataModelConfig:
+        '''
+        Returns the model at path and version, from the compiled store if its source file did not change
+
+        Arguments:
+            path (str): The path of the model
+            version (int): The version of the model
+
+        Returns:
+            DataModelConfig
+        '''
+        from gedge.py_proto.data_model_config import DataModelConfig
+        file = to_file_path(path, version)
+        st = self._stat(self.model_dir / file)
+        with self._lock:
+            entry = self._files.get(file)
+            blob = self._blob
+        if entry is None or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+            logger.debug(f"Model {file} changed since the model store was compiled, parsing json5")
+            return load_from_file(str(self.model_dir / file))
+        m = proto.DataModelConfig()
+        m.ParseFromString(blob[entry["offset"]:entry["offset"] + entry["length"]])
+        return DataModelConfig.from_proto(m)
+
+    def latest_version(self, path: str) -> int:
+        '''
+        Returns the latest version of the model at path, without listing its directory if nothing was added to or removed from it
+
+        Arguments:
+            path (str): The path of the model
+
+        Returns:
+            int
+        '''
+        directory = self.model_dir / path
+        st = self._stat(directory)
+        with self._lock:
+            entry = self._latest.get(path)
+        if entry is not None and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["version"]
+        return find_latest_version(str(directory))
+
+    def refresh(self) -> bool:
+        '''
+        Recompiles every model whose json5 changed (or is new) and rewrites the store if anything did
+
+        Arguments:
+            None
+
+        Returns:
+            bool: whether or not the store was rewritten
+        '''
+        from gedge.py_proto.data_model_config import DataModelConfig
+        files: dict[str, dict[str, Any]] = dict()
+        latest: dict[str, dict[str, Any]] = dict()
+        blobs: list[bytes] = []
+        offset = 0
+        changed = False
+        with self._lock:
+            old_files, old_blob = self._files, self._blob
+        for root, dirs, names in os.walk(self.model_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            root_path = pathlib.Path(root)
+            path = root_path.relative_to(self.model_dir).as_posix()
+            if path == ".":
+                continue
+            for name in names:
+                m = _MODEL_FILE.fullmatch(name)
+                if not m:
+                    continue
+                version = int(m.group(1))
+                file = to_file_path(path, version)
+                st = os.stat(root_path / name)
+                entry = old_files.get(file)
+                if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                    blob = old_blob[entry["offset"]:entry["offset"] + entry["length"]]
+                else:
+                    try:
+                        model: DataModelConfig = load_from_file(str(root_path / name))
+                    except Exception as e:
+                        logger.warning(f"Could not compile model {file}: {repr(e)}")
+                        continue
+                    blob = model.to_proto().SerializeToString()
+                    changed = True
+                files[file] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "offset": offset, "length": len(blob)}
+                blobs.append(blob)
+                offset += len(blob)
+                if path not in latest or version > latest[path]["version"]:
+                    latest[path] = {"version": version, "mtime_ns": os.stat(root_path).st_mtime_ns}
+        changed = changed or files.keys() != old_files.keys() or latest != self._latest
+        with self._lock:
+            self._files, self._latest, self._blob = files, latest, b"".join(blobs)
+        if changed:
+            self._write()
+        return changed
+
+    def _write(self):
+        with self._lock:
+            manifest = json.dumps({"files": self._files, "latest": self._latest}).encode()
+            data = _HEADER.pack(MAGIC, len(manifest)) + manifest + self._blob
+        tmp = self.store_path.with_name(f"{STORE_FILE}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.store_path)
+            logger.info(f"Compiled {len(self._files)} models into {self.store_path}")
+        except OSError as e:
+            # e.g. a read-only model directory, the store just lives in memory
+            logger.debug(f"Could not write compiled model store {self.store_path}: {repr(e)}")
+
+_stores: dict[str, ModelStore] = dict()
+_stores_lock = threading.Lock()
+
+def model_store(model_dir: str) -> ModelStore:
+    '''
+    Returns the (one per process) compiled store of the passed model directory
+    '''
+    key = os.path.abspath(model_dir)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ModelStore(model_dir)
+        return _stores[key]
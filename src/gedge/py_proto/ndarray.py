@@ -0,0 +1,177 @@
+'''
+Optional NumPy support for list base types.
+
+Repeated numeric fields are packed on the wire (one length-delimited run of their elements), so a
+NumPy array can be turned into a ListInt/ListLong/ListFloat/ListBool message, and back, with a handful
+of vectorized operations and without creating a Python object per element. The wire format is
+unchanged, nodes that do not use NumPy read these lists like any other.
+
+NumPy is not a dependency of gedge. Arrays are always accepted when it is installed, and received
+lists are only returned as arrays after gedge.use_numpy().
+'''
+from __future__ import annotations
+
+from typing import Any, TYPE_CHECKING
+
+from gedge import proto
+from gedge.py_proto.base_type import BaseType
+
+try:
+    import numpy as np
+except ImportError: # pragma: no cover
+    np = None
+
+if TYPE_CHECKING:
+    from google.protobuf.message import Message
+
+import logging
+logger = logging.getLogger(__name__)
+
+# tag of field 1 (the repeated field of every List* message) as a length-delimited (packed) field
+_PACKED_TAG = b"\x0a"
+
+# the proto field of BaseData and the dtype of its elements for every list type that can be packed
+_PACKED_TYPES: dict[BaseType, tuple[str, str]] = {
+    BaseType.LIST_INT: ("list_int_data", "<u4"),
+    BaseType.LIST_LONG: ("list_long_data", "<u8"),
+    BaseType.LIST_FLOAT: ("list_float_data", "<f4"),
+    BaseType.LIST_BOOL: ("list_bool_data", "?"),
+}
+
+_as_numpy = False
+
+def use_numpy(enabled: bool = True) -> None:
+    '''
+    Returns received list[int], list[long], list[float] and list[bool] values (tag data, method params and
+    response bodies) as NumPy arrays instead of lists. Arrays are accepted as values whether or not this is set
+
+    Arguments:
+        enabled (bool): Whether or not to return NumPy arrays
+
+    Returns:
+        None
+    '''
+    global _as_numpy
+    if enabled and np is None:
+        raise ImportError("NumPy is not installed, install it with 'pip install numpy' to use NumPy arrays with gedge")
+    _as_numpy = enabled
+
+def as_numpy() -> bool:
+    return _as_numpy
+
+def is_ndarray(value: Any) -> bool:
+    return np is not None and isinstance(value, np.ndarray)
+
+def is_packable(type: BaseType) -> bool:
+    return type in _PACKED_TYPES
+
+def values_equal(a: Any, b: Any) -> bool:
+    '''
+    a == b, for values that may be NumPy arrays (where == compares element by element)
+    '''
+    if is_ndarray(a) or is_ndarray(b):
+        return bool(np.array_equal(a, b)) # type: ignore
+    return a == b
+
+def _encode_varint(n: int) -> bytes:
+    out = bytearray()
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+def _encode_varints(values: Any) -> bytes:
+    values = values.astype(np.uint64, copy=False) # type: ignore
+    # number of 7 bit groups in every value
+    sizes = np.ones(values.size, dtype=np.int64) # type: ignore
+    rest = values >> np.uint64(7) # type: ignore
+    while rest.any():
+        sizes += rest != 0
+        rest >>= np.uint64(7) # type: ignore
+    starts = np.cumsum(sizes) - sizes # type: ignore
+    out = np.empty(int(sizes.sum()), dtype=np.uint8) # type: ignore
+    for i in range(int(sizes.max(initial=0))):
+        mask = sizes > i
+        group = (values[mask] >> np.uint64(7 * i)) & np.uint64(0x7f) # type: ignore
+        more = (sizes[mask] > i + 1).astype(np.uint64) << np.uint64(7) # type: ignore
+        out[starts[mask] + i] = group | more
+    return out.tobytes()
+
+def _decode_varints(payload: memoryview) -> Any:
+    buf = np.frombuffer(payload, dtype=np.uint8) # type: ignore
+    if not (buf & 0x80).any():
+        return buf.astype(np.uint64) # type: ignore
+    # the last byte of every varint is the one without the continuation bit
+    ends = np.flatnonzero(buf < 0x80) # type: ignore
+    starts = np.concatenate(([0], ends[:-1] + 1)) # type: ignore
+    sizes = ends - starts + 1
+    values = np.zeros(ends.size, dtype=np.uint64) # type: ignore
+    for i in range(int(sizes.max(initial=0))):
+        mask = sizes > i
+        values[mask] |= (buf[starts[mask] + i] & 0x7f).astype(np.uint64) << np.uint64(7 * i) # type: ignore
+    return values
+
+def _payload(value: Any, type: BaseType) -> bytes:
+    _, dtype = _PACKED_TYPES[type]
+    if type == BaseType.LIST_FLOAT:
+        return np.ascontiguousarray(value, dtype=dtype).tobytes() # type: ignore
+    if type == BaseType.LIST_BOOL:
+        return np.ascontiguousarray(value, dtype=bool).view(np.uint8).tobytes() # type: ignore
+    if value.dtype.kind not in "biu":
+        raise ValueError(f"Cannot convert array of {value.dtype} to {type}")
+    if value.size and value.min() < 0:
+        raise ValueError(f"Cannot convert array with negative values to {type}")
+    if type == BaseType.LIST_INT and value.size and value.max() > 0xffffffff:
+        raise ValueError(f"Cannot convert array with values over 32 bits to {type}")
+    return _encode_varints(value.ravel())
+
+def to_proto(value: Any, type: BaseType, data: proto.BaseData) -> None:
+    '''
+    Sets the list field of data for type to the elements of the passed NumPy array (flattened)
+
+    Arguments:
+        value (np.ndarray): The array
+        type (BaseType): One of list[int], list[long], list[float] or list[bool]
+        data (proto.BaseData): The message to set the list on
+
+    Returns:
+        None
+    '''
+    field, _ = _PACKED_TYPES[type]
+    payload = _payload(value, type)
+    message: Message = getattr(data, field)
+    message.SetInParent()
+    if payload:
+        message.ParseFromString(_PACKED_TAG + _encode_varint(len(payload)) + payload)
+
+def from_proto(data: proto.BaseData, type: BaseType) -> Any:
+    '''
+    Returns the list field of data for type as a NumPy array
+
+    Arguments:
+        data (proto.BaseData): The message holding the list
+        type (BaseType): One of list[int], list[long], list[float] or list[bool]
+
+    Returns:
+        np.ndarray
+    '''
+    field, dtype = _PACKED_TYPES[type]
+    message: Message = getattr(data, field)
+    serialized = message.SerializeToString()
+    if not serialized:
+        return np.empty(0, dtype=dtype) # type: ignore
+    if serialized[:1] != _PACKED_TAG:
+        # not packed (only proto2 style encoders write these), fall back to the slow path
+        return np.array(list(message.list), dtype=dtype) # type: ignore
+    # skip the tag and the length of the packed run
+    start = 1
+    while serialized[start] & 0x80:
+        start += 1
+    payload = memoryview(serialized)[start + 1:]
+    if type == BaseType.LIST_FLOAT:
+        return np.frombuffer(payload, dtype=dtype).copy() # type: ignore
+    values = _decode_varints(payload)
+    if type == BaseType.LIST_BOOL:
+        return values != 0
+    return values.astype(dtype) # type: ignore
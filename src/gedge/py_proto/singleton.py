@@ -23,12 +23,11 @@ class Singleton:
     result: ./foo/bar/baz/v1.json5  
     '''
 
-    def __new__(cls, model_dir: str | None = None, json5_dir: str | None = None, models: dict[str, DataModelConfig] = {}) -> Self:
+    def __new__(cls, model_dir: str | None = None, json5_dir: str | None = None) -> Self:
         if not hasattr(cls, 'instance'):
             cls.instance = super(Singleton, cls).__new__(cls)
             cls.model_dir = model_dir
             cls.json5_dir = json5_dir
-            cls.models = models
         return cls.instance
     
     def set_model_dir(self, path: str) -> None:
@@ -43,10 +42,11 @@ class Singleton:
     def get_json5_dir(self) -> str | None:
         return self.json5_dir
     
+    # models live in the model registry (gedge.py_proto.model_registry), these are kept for existing callers
     def add_model(self, config: DataModelConfig) -> None:
-        self.models[config.path] = config
+        from gedge.py_proto.model_registry import model_registry
+        model_registry().add(config)
     
-    def get_model(self, path: str) -> DataModelConfig | None:
-        if path in self.models:
-            return self.models[path]
-        return None
\ No newline at end of file
+    def get_model(self, path: str, version: int) -> DataModelConfig | None:
+        from gedge.py_proto.model_registry import model_registry
+        return model_registry().lookup(path, version)
\ No newline at end of file
@@ -1,21 +1,23 @@
 from __future__ import annotations
 from collections import defaultdict
-from dataclasses import dataclass
-import os
+from dataclasses import dataclass, field
 
 from gedge import proto
 
-from typing import Any, Self, TYPE_CHECKING
+from typing import Any, Callable, Self, TYPE_CHECKING
 
 from gedge.comm.keys import key_join
 from gedge.node.method_response import ResponseConfig
+from gedge.node.report import ReportConfig
 from gedge.py_proto.conversions import list_from_json5, list_from_proto
 from gedge.py_proto.data_model_config import DataModelConfig
+from gedge.py_proto.model_registry import model_registry
 from gedge.py_proto.tag_group_config import TagGroupConfig
 from gedge.py_proto.tag_write_config import TagWriteConfig
 if TYPE_CHECKING:
+    from gedge.py_proto.base_type import BaseType
     from gedge.py_proto.data_model_config import DataItemConfig
-    from gedge.node.gtypes import TagWriteHandler
+    from gedge.node.gtypes import GroupWriteHandler, TagWriteHandler
 
 import logging
 logger = logging.getLogger(__name__)
@@ -35,39 +37,56 @@ class Tag:
     # TODO: move this to tag config?
     group_config: dict[str, str] # maps a path on this tag to a group. If the tag is a base_type, tag.group[tag.path] is the group name
 
+    # report-by-exception settings, only used by the node publishing this tag (never sent in meta)
+    report: ReportConfig | None = None
+
+    # every full path on this tag (the tag itself plus everything nested in its model(s)) -> its config
+    # built the first time a nested path is looked up, because the models may not be loadable before then
+    _items: dict[str, DataItemConfig] | None = field(default=None, init=False, repr=False, compare=False)
+
     @property
     def path(self) -> str:
         return self.config.path
     
-    def get_config(self, path: str) -> DataItemConfig:
-        # get a nested DataItemConfig from a path that could include multiple models
-        # example: tag/1 is a tag with items, one of them being pump, which has a base, which has a girth
-        # path = tag/1/pump/base/girth
-        # if we get items with pu/ and pump/, we want to take pump
-        # start with res = tag/1
-        if path == self.path:
-            return self.config
-
-        def _get_config(model: DataModelConfig, curr_path: str) -> DataItemConfig:
-            matches = [item for item in model.items if path.startswith(key_join(curr_path, item.path))]
-            if not matches:
-                raise ValueError(f"cannot find item on model {model.path}")
-            best_match = max(matches, key = lambda item: len(os.path.commonprefix([path, key_join(curr_path, item.path)])))
+    def items(self) -> dict[str, DataItemConfig]:
+        '''
+        Flattens this tag into every path that can be addressed on it
+        example: tag/1 is a tag with items, one of them being pump, which has a base, which has a girth
+        result: {tag/1: ..., tag/1/pump: ..., tag/1/pump/base: ..., tag/1/pump/base/girth: ...}
+        '''
+        if self._items is not None:
+            return self._items
 
-            # base case
-            if path == key_join(curr_path, best_match.path):
-                return best_match
-
-            m = best_match.load_model()
+        items: dict[str, DataItemConfig] = {self.path: self.config}
+        def _flatten(config: DataItemConfig, curr_path: str, seen: set[str]):
+            if not config.is_model_ref():
+                return
+            m = config.load_model()
             if not m:
                 raise ValueError("Could not load model")
-            config = _get_config(m, key_join(curr_path, best_match.path))
-            return config
+            # a model that (indirectly) contains itself would flatten forever
+            if m.full_path in seen:
+                return
+            for item in m.items:
+                item_path = key_join(curr_path, item.path)
+                # inherited items come after the model's own items, so the first one wins
+                if item_path in items:
+                    continue
+                items[item_path] = item
+                _flatten(item, item_path, seen | {m.full_path})
+
+        _flatten(self.config, self.path, set())
+        self._items = items
+        return items
 
-        m = self.load_model()
-        if not m:
-            raise ValueError("Could not load model")
-        return _get_config(m, self.path)
+    def get_config(self, path: str) -> DataItemConfig:
+        # get a nested DataItemConfig from a path that could include multiple models
+        if path == self.path:
+            return self.config
+        config = self.items().get(path)
+        if config is None:
+            raise ValueError(f"cannot find item at path {path} on tag {self.path}")
+        return config
 
     @classmethod
     def from_json5(cls, j: Any, writable: bool | None = None) -> Self:
@@ -83,40 +102,20 @@ class Tag:
         if w and config.is_model_ref():
             raise ValueError(f"model {config.get_model_ref().path} cannot be writable, only tags with base types are writable") # type: ignore
 
+        report = None
+        if "report" in j:
+            report = ReportConfig.from_json5(j["report"])
+
         responses = []
         if w: 
             responses = list_from_json5(ResponseConfig, j.get("responses", []))
-            return cls(config, {config.path: (responses, None)}, {})
-        return cls(config, {}, {})
+            return cls(config, {config.path: (responses, None)}, {}, report)
+        return cls(config, {}, {}, report)
     
     def is_valid_path(self, path: str) -> bool:
-        # get a nested DataItemConfig from a path that could include multiple models
-        # example: tag/1 is a tag with items, one of them being pump, which has a base, which has a girth
-        # path = tag/1/pump/base/girth
-        # if we get items with pu/ and pump/, we want to take pump
-        # start with res = tag/1
         if path == self.path:
             return True
-
-        def _is_valid(model: DataModelConfig, curr_path: str) -> bool:
-            matches = [item for item in model.items if path.startswith(key_join(curr_path, item.path))]
-            if not matches:
-                return False
-            best_match = max(matches, key = lambda item: len(os.path.commonprefix([path, key_join(curr_path, item.path)])))
-
-            # base case
-            if path == key_join(curr_path, best_match.path):
-                return True
-
-            m = best_match.load_model()
-            if not m:
-                return False
-            return _is_valid(m, key_join(curr_path, best_match.path))
-
-        m = self.load_model()
-        if not m:
-            return False
-        return _is_valid(m, self.path)
+        return path in self.items()
     
     def add_writable_config_json5(self, j: Any):
         # assumption that this is a valid path
@@ -157,10 +156,53 @@ class Tag:
         responses, _ = self.write_config[path]
         self.write_config[path] = (responses, handler)
 
+@dataclass(frozen=True)
+class TagPathEntry:
+    '''
+    One addressable path on a node, resolved ahead of time so that lookups are a single dict hit.
+    Group and write config are read through to the owning tag, because handlers and groups 
+    are attached to it after the index is built
+    '''
+    path: str
+    tag: Tag
+    config: DataItemConfig
+    base_type: BaseType | None
+
+    @property
+    def group(self) -> str | None:
+        return self.tag.group_config.get(self.path)
+
+    @property
+    def write_config(self) -> tuple[list[ResponseConfig], TagWriteHandler | None] | None:
+        return self.tag.write_config.get(self.path)
+
+    def is_base_type(self) -> bool:
+        return self.base_type is not None
+
+    def is_writable(self) -> bool:
+        return self.path in self.tag.write_config
+
 @dataclass
 class TagConfig:
     tags: dict[str, Tag]
 
+    # group path -> (responses, handler) of every writable group, like Tag.write_config is for tags
+    group_write_config: dict[str, tuple[list[ResponseConfig], GroupWriteHandler | None]] = field(default_factory=dict)
+
+    # full path (tags and everything nested in their models) -> TagPathEntry
+    # tags are flattened into the index lazily, on the first lookup after they are added
+    _index: dict[str, TagPathEntry] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _unindexed: set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    # called with the path of a tag every time it is (re)placed, so anything cached per path can be dropped
+    _reindex_listeners: list[Callable[[str], None]] = field(default_factory=list, init=False, repr=False, compare=False)
+    # tags whose models could not be loaded, so only their own path is indexed (warned about once). They are only
+    # tried again once the model registry changed since _unresolved_generation, not on every lookup miss
+    _unresolved: set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    _unresolved_generation: int = field(default=-1, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._unindexed.update(self.tags.keys())
+
     @property
     def paths(self) -> list[str]:
         return list(self.tags.keys())
@@ -175,7 +217,9 @@ class TagConfig:
                 write_config.append(TagWriteConfig(path, responses[0]).to_proto())
         groups = self.all_groups()
         for group_path, list_paths in groups.items():
-            group_config.append(TagGroupConfig(group_path, list_paths).to_proto())
+            writable = group_path in self.group_write_config
+            responses = self.group_write_config[group_path][0] if writable else []
+            group_config.append(TagGroupConfig(group_path, list_paths, writable, responses).to_proto())
         return proto.TagConfig(data_config=data_config, write_config=write_config, group_config=group_config)
 
     @classmethod
@@ -188,21 +232,26 @@ class TagConfig:
         w_map = {w.path:w for w in write_config}
         g_map = {g.path:g for g in group_config} # group path : list(paths)
 
-        tags: list[Tag] = []
-        for path, config in d_map.items():
-            t = Tag(DataItemConfig.from_proto(config), {}, {})
-            included = {w.path: w for w in w_map.values() if w.path.startswith(path)}
-            for path, conf in included.items():
-                t.write_config[path] = (list_from_proto(ResponseConfig, conf.responses), None)
-            tags.append(t)
+        tags: dict[str, Tag] = {path: Tag(DataItemConfig.from_proto(config), {}, {}) for path, config in d_map.items()}
+        # one pass over the write config, each path belongs to the tag at its longest prefix that is a tag path
+        for path, conf in w_map.items():
+            tag_path = path
+            while tag_path and tag_path not in tags:
+                tag_path = tag_path.rpartition("/")[0]
+            if not tag_path:
+                logger.warning(f"Ignoring write config for {path}, no tag found for it")
+                continue
+            tags[tag_path].write_config[path] = (list_from_proto(ResponseConfig, conf.responses), None)
         
-        tc = cls({t.path: t for t in tags})
+        tc = cls(tags)
         for group_conf in g_map.values():
             g_path = group_conf.path
             paths = list(group_conf.items)
             for path in paths:
                 t = tc.get_tag(path)
                 t.add_group(path, g_path)
+            if group_conf.writable:
+                tc.group_write_config[g_path] = (list_from_proto(ResponseConfig, group_conf.responses), None)
         return tc
     
     @classmethod
@@ -224,13 +273,14 @@ class TagConfig:
         for group in j:
             group = TagGroupConfig.from_json5(group)
             for path in group.items:
-                t = [t for t in self.tags.values() if path.startswith(t.path)][0]
-                if not t.is_valid_path(path):
+                entry = self.lookup(path)
+                if entry is None:
                     raise LookupError(f"invalid group path {path}")
-                c = t.get_config(path)
-                if c.is_model_ref():
+                if entry.config.is_model_ref():
                     raise ValueError(f"model {path} cannot be writable, only tags of it")
-                t.add_group(path, group.path)
+                entry.tag.add_group(path, group.path)
+            if group.writable:
+                self.group_write_config[group.path] = (group.responses, None)
     
     def add_writable_config_json5(self, j: list):
         for config in j:
@@ -238,13 +288,12 @@ class TagConfig:
                 path = config
             else:
                 path = config["path"]
-            t = [t for t in self.tags.values() if path.startswith(t.path)][0]
-            if not t.is_valid_path(path):
+            entry = self.lookup(path)
+            if entry is None:
                 raise LookupError(f"invalid writable path {path}")
-            c = t.get_config(path)
-            if c.is_model_ref():
+            if entry.config.is_model_ref():
                 raise ValueError(f"model {path} cannot be writable, only tags of it")
-            t.add_writable_config_json5(config)
+            entry.tag.add_writable_config_json5(config)
     
     def all_writable_tags(self) -> dict[str, tuple[list[ResponseConfig], TagWriteHandler | None]]:
         d = {}
@@ -252,6 +301,15 @@ class TagConfig:
             d.update(t.write_config)
         return d
     
+    def all_writable_groups(self) -> dict[str, tuple[list[ResponseConfig], GroupWriteHandler | None]]:
+        return self.group_write_config
+
+    def add_group_write_handler(self, group_path: str, handler: GroupWriteHandler):
+        if group_path not in self.group_write_config:
+            raise LookupError(f"group {group_path} not writable")
+        responses, _ = self.group_write_config[group_path]
+        self.group_write_config[group_path] = (responses, handler)
+
     # maps a group to the paths that are in it
     def all_groups(self) -> dict[str, list[str]]:
         d = defaultdict(list)
@@ -271,70 +329,142 @@ class TagConfig:
             configs[path] = self.get_config(path)
         return configs
     
+    def get_group_decoder(self, group_path: str) -> dict[str, BaseType]:
+        '''
+        Resolves every member of a group to the BaseType its data is decoded with, 
+        so that a group subscriber does not have to resolve them on every sample
+        '''
+        decoder = {}
+        for path, config in self.get_group_member_configs(group_path).items():
+            base_type = config.get_base_type()
+            if base_type is None:
+                raise ValueError(f"group {group_path} contains model tag {path} (only base tags)")
+            decoder[path] = base_type
+        return decoder
+
     def get_groups(self, paths: list[str]) -> list[str]:
         res = set()
         for path in paths:
-            t = self.get_tag(path)
-            if path in t.group_config:
-                res.add(t.group_config[path])
-            else:
+            group = self.get_entry(path).group
+            if group is None:
                 raise ValueError(f"path {path} not part of any group")
+            res.add(group)
         return list(res)
     
     def get_group(self, path: str) -> str | None:
-        t = self.get_tag(path)
-        if path in t.group_config:
-            return t.group_config[path]
-        return None
+        return self.get_entry(path).group
     
+    def _needs_indexing(self) -> bool:
+        if len(self._unindexed) > len(self._unresolved):
+            return True
+        return bool(self._unresolved) and model_registry().generation != self._unresolved_generation
+
+    def _index_tags(self):
+        retry = model_registry().generation != self._unresolved_generation
+        for tag_path in list(self._unindexed):
+            tag = self.tags.get(tag_path)
+            if tag is None:
+                self._unindexed.discard(tag_path)
+                continue
+            if tag_path in self._unresolved and not retry:
+                continue
+            try:
+                items = tag.items()
+            except Exception as e:
+                # e.g. a model that is not in the model directory (yet), only this tag's nested paths are unresolved
+                # and it stays unindexed, so that they resolve on a later lookup once the model is registered
+                if tag_path not in self._unresolved:
+                    logger.warning(f"Could not resolve the paths nested in tag {tag_path}: {repr(e)}")
+                    self._unresolved.add(tag_path)
+                self._index[tag_path] = TagPathEntry(tag_path, tag, tag.config, tag.config.get_base_type())
+                continue
+            for path, config in items.items():
+                # a top level tag always wins over a nested item of another tag with the same path
+                if path != tag_path and path in self.tags:
+                    continue
+                self._index[path] = TagPathEntry(path, tag, config, config.get_base_type())
+            self._unindexed.discard(tag_path)
+            self._unresolved.discard(tag_path)
+        # taken after the pass, as resolving the other tags registers the models they load
+        self._unresolved_generation = model_registry().generation
+
+    def _unindex_tag(self, tag_path: str):
+        tag = self.tags.get(tag_path)
+        if tag is None:
+            return
+        if tag_path in self._unindexed:
+            self._unindexed.discard(tag_path)
+            self._unresolved.discard(tag_path)
+            entry = self._index.get(tag_path)
+            if entry is not None and entry.tag is tag:
+                del self._index[tag_path]
+            return
+        for path in tag.items():
+            entry = self._index.get(path)
+            if entry is not None and entry.tag is tag:
+                del self._index[path]
+
+    def lookup(self, path: str) -> TagPathEntry | None:
+        '''
+        Returns the resolved entry for any path on this node (a tag or an item nested in a tag's model), or None if the path does not exist
+        '''
+        entry = self._index.get(path)
+        if entry is None and self._unindexed and self._needs_indexing():
+            self._index_tags()
+            entry = self._index.get(path)
+        return entry
+
     def is_valid_path(self, path: str) -> bool:
-        for t in self.tags.values():
-            if t.is_valid_path(path):
-                return True
-        return False
+        return self.lookup(path) is not None
     
     def is_base_type(self, path: str) -> bool:
-        config = None
-        for t in self.tags.values():
-            try:
-                config = t.get_config(path)
-                break
-            except:
-                pass
-        return config is not None and config.is_base_type()
+        entry = self.lookup(path)
+        return entry is not None and entry.is_base_type()
     
     def is_valid_group_path(self, path: str) -> bool:
         return path in self.all_groups().keys()
 
     def add_tag(self, tag: Tag):
-        self.tags[tag.path] = tag
+        self[tag.path] = tag
     
     def tag_list(self,):
         return self.tags.values()
     
     def add_write_handler(self, path: str, handler: TagWriteHandler):
-        print(path)
-        if not self.is_valid_path(path):
+        entry = self.lookup(path)
+        if entry is None:
             raise LookupError(f"path {path} does not exist")
-        if path not in self.all_writable_tags():
+        if not entry.is_writable():
             raise LookupError(f"path {path} not writable")
-        t = self.get_tag(path)
-        t.add_write_handler(path, handler)
+        entry.tag.add_write_handler(path, handler)
     
+    def get_entry(self, path: str) -> TagPathEntry:
+        entry = self.lookup(path)
+        if entry is None:
+            raise LookupError(f"No tag found at path {path}")
+        return entry
+
     def get_tag(self, path: str) -> Tag:
         if path in self.tags:
             return self.tags[path]
-        t = [t for t in self.tags.values() if t.is_valid_path(path)]
-        if len(t) != 1:
-            raise LookupError(f"No tag found at path {path}")
-
-        return t[0]
+        return self.get_entry(path).tag
 
     def get_config(self, path: str) -> DataItemConfig:
-        return self.get_tag(path).get_config(path)
+        return self.get_entry(path).config
 
     def __setitem__(self, path: str, tag: Tag):
+        self._unindex_tag(path)
         self.tags[path] = tag
+        self._unindexed.add(path)
+        for listener in list(self._reindex_listeners):
+            listener(path)
+
+    def add_reindex_listener(self, listener: Callable[[str], None]):
+        self._reindex_listeners.append(listener)
+
+    def remove_reindex_listener(self, listener: Callable[[str], None]):
+        if listener in self._reindex_listeners:
+            self._reindex_listeners.remove(listener)
     
     def __getitem__(self, path: str):
         return self.tags[path]
@@ -1,25 +1,30 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 from gedge import proto
+from gedge.node.method_response import ResponseConfig
+from gedge.py_proto.conversions import list_from_json5, list_from_proto, list_to_proto
 
 @dataclass
 class TagGroupConfig:
     path: str
     items: list[str]
+    writable: bool = False # remotes can write every member of the group at once, handled by one GroupWriteHandler
+    responses: list[ResponseConfig] = field(default_factory=list) # the responses of a group write
 
     def to_proto(self) -> proto.TagGroupConfig:
-        print(self.path, self.items)
-        return proto.TagGroupConfig(path=self.path, items=list(self.items))
-    
+        return proto.TagGroupConfig(path=self.path, items=list(self.items), writable=self.writable, responses=list_to_proto(self.responses))
+
     @classmethod
     def from_proto(cls, proto: proto.TagGroupConfig):
-        return cls(proto.path, list(proto.items))
-    
+        return cls(proto.path, list(proto.items), proto.writable, list_from_proto(ResponseConfig, proto.responses))
+
     @classmethod
     def from_json5(cls, j: Any):
         if not isinstance(j, dict):
             raise ValueError(f"Tag group configuration must be a dict, found {j}")
         path = j["group_path"]
         items = j["tag_paths"]
-        return cls(path, items)
\ No newline at end of file
+        writable = j.get("writable", False)
+        responses = list_from_json5(ResponseConfig, j.get("responses", [])) if writable else []
+        return cls(path, items, writable, responses)
@@ -0,0 +1,93 @@
+import json
+import socket
+import threading
+import uuid
+
+import pytest
+import zenoh
+
+ROUTER = "tcp/127.0.0.1:7447"
+
+@pytest.fixture(scope="session")
+def router():
+    '''
+    A zenoh router on localhost for the nodes of a test to talk through.
+    A router that is already listening there (e.g. zenohd) is used instead of opening one
+    '''
+    try:
+        socket.create_connection(("127.0.0.1", 7447), timeout=0.5).close()
+        yield ROUTER
+        return
+    except OSError:
+        pass
+    config = zenoh.Config.from_json5(json.dumps({
+        "mode": "router",
+        "listen": {"endpoints": [ROUTER]},
+        "scouting": {"multicast": {"enabled": False}},
+    }))
+    with zenoh.open(config):
+        yield ROUTER
+
+@pytest.fixture
+def node_key():
+    '''
+    A node key no other test (or earlier run of this one) is online with
+    '''
+    return f"test/gedge/{uuid.uuid4().hex[:8]}"
+
+class Published:
+    '''
+    Every tag value a session put on the network, by path, in order. Group frames are split into their members.
+    bursts holds the paths sent by each publish call, so values put on the network together can be told apart
+    '''
+    def __init__(self, session, monkeypatch):
+        from gedge import proto
+        from gedge.py_proto.base_data import BaseData
+        self._proto = proto
+        self._decode = BaseData.proto_to_py
+        self._session = session
+        self._lock = threading.Lock()
+        self.values: list[tuple[str, object]] = []
+        self.bursts: list[list[str]] = []
+        comm = session._comm
+        publish, publish_many = comm.publish, comm.publish_many
+
+        def _publish(publisher, key_expr, value, *args, **kwargs):
+            publish(publisher, key_expr, value, *args, **kwargs)
+            self._record([(key_expr, value)])
+
+        def _publish_many(values, *args, **kwargs):
+            publish_many(values, *args, **kwargs)
+            self._record([(key_expr, value) for _, key_expr, value in values])
+        monkeypatch.setattr(comm, "publish", _publish)
+        monkeypatch.setattr(comm, "publish_many", _publish_many)
+
+    def _record(self, frames: list[tuple[str, object]]):
+        tag_config = self._session.tag_config
+        burst = []
+        with self._lock:
+            for key_expr, value in frames:
+                if isinstance(value, self._proto.TagGroup):
+                    data = dict(value.data)
+                else:
+                    data = {self._session.ks.tag_path_from_data_key(key_expr): value}
+                for path, d in data.items():
+                    self.values.append((path, self._decode(d, tag_config.get_entry(path).base_type)))
+                    burst.append(path)
+            self.bursts.append(burst)
+
+    def of(self, path: str) -> list:
+        with self._lock:
+            return [v for p, v in self.values if p == path]
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+            self.bursts.clear()
+
+@pytest.fixture
+def record_published(monkeypatch):
+    '''
+    Starts recording what the passed session publishes, see Published
+    '''
+    return lambda session: Published(session, monkeypatch)
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from gedge.py_proto.codec import codec
+from gedge.py_proto.data_model_config import DataItemConfig, DataModelConfig
+from gedge.py_proto.data_model_ref import DataModelRef
+from gedge.py_proto.type import Type
+
+def base_item(path: str) -> DataItemConfig:
+    return DataItemConfig(path, Type.from_base_type("int"), [])
+
+def model_item(path: str, model: DataModelConfig, monkeypatch, delay: float = 0.0) -> DataItemConfig:
+    item = DataItemConfig(path, Type(DataModelRef.from_model(model)), [])
+
+    def load_model():
+        time.sleep(delay)
+        return model
+    monkeypatch.setattr(item, "load_model", load_model)
+    return item
+
+def test_encode_decode_model(monkeypatch):
+    model = DataModelConfig("m", None, 1, [base_item("a"), base_item("b")])
+    item = model_item("t", model, monkeypatch)
+    c = codec(item)
+    assert codec(item) is c
+    assert c.decode(c.encode({"a": 1, "b": 2})) == {"a": 1, "b": 2}
+
+def test_recursive_model(monkeypatch):
+    model = DataModelConfig("r", None, 1, [base_item("a")])
+    model.items = [base_item("a"), model_item("self", model, monkeypatch)]
+    c = codec(model_item("t", model, monkeypatch))
+    value = {"a": 1, "self": {"a": 2, "self": {"a": 3}}}
+    assert c.decode(c.encode(value)) == value
+
+def test_concurrent_first_use(monkeypatch):
+    # the second thread asks while the first is still loading the model
+    model = DataModelConfig("m", None, 1, [base_item("a")])
+    item = model_item("t", model, monkeypatch, delay=0.2)
+    results, errors = [], []
+
+    def use():
+        try:
+            c = codec(item)
+            results.append(c.decode(c.encode({"a": 1})))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=use) for _ in range(2)]
+    threads[0].start()
+    time.sleep(0.05)
+    threads[1].start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert results == [{"a": 1}, {"a": 1}]
+
+def test_failed_compile_is_not_kept(monkeypatch):
+    model = DataModelConfig("m", None, 1, [base_item("a")])
+    item = model_item("t", model, monkeypatch)
+    monkeypatch.setattr(item, "load_model", lambda: None)
+    with pytest.raises(LookupError):
+        codec(item)
+    assert item._codec is None
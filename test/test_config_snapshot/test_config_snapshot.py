@@ -0,0 +1,75 @@
+import gedge
+import pytest
+
+from gedge.node import config_snapshot
+from gedge.py_proto.model_registry import model_registry
+from gedge.py_proto.singleton import Singleton
+
+CONFIG = '''
+{
+    key: "test/config/snapshot",
+    tags: [ { path: "t", model_path: "m" } ],
+    writable_config: [ { path: "t/%s", responses: [ { code: 200, type: "ok" } ] } ],
+}
+'''
+
+MODEL = '''
+{
+    path: "m",
+    version: 1,
+    tags: [ { path: "%s", base_type: "int" } ],
+}
+'''
+
+@pytest.fixture
+def model_dir(tmp_path):
+    previous = Singleton().get_model_dir()
+    models = tmp_path / "models"
+    (models / "m").mkdir(parents=True)
+    write_model(models, "x")
+    gedge.use_models(str(models))
+    yield models
+    model_registry().clear()
+    Singleton().set_model_dir(previous)
+
+def write_model(models, item: str):
+    (models / "m" / "v1.json5").write_text(MODEL % item)
+    # as if in a new process, which has not loaded the model yet
+    model_registry().clear()
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "node.json5"
+    path.write_text(CONFIG % "x")
+    return path
+
+def test_no_snapshot_by_default(model_dir, config_path):
+    gedge.NodeConfig.from_json5(str(config_path))
+    assert not config_snapshot.snapshot_path(str(config_path)).exists()
+
+def test_snapshot_is_reused(model_dir, config_path):
+    first = gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+    assert config_snapshot.snapshot_path(str(config_path)).exists()
+    second = gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+    assert second.tag_config.to_proto() == first.tag_config.to_proto()
+    assert list(second.tag_config.all_writable_tags()) == ["t/x"]
+
+def test_changed_source_invalidates_snapshot(model_dir, config_path):
+    gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+    config_path.write_text(CONFIG % "y")
+    with pytest.raises(LookupError):
+        gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+
+def test_changed_model_invalidates_snapshot(model_dir, config_path):
+    # the writable path is only valid as long as the model has the item
+    gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+    write_model(model_dir, "renamed")
+    with pytest.raises(LookupError):
+        gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+
+def test_new_model_version_invalidates_snapshot(model_dir, config_path):
+    gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
+    (model_dir / "m" / "v2.json5").write_text((MODEL % "renamed").replace("version: 1", "version: 2"))
+    model_registry().clear()
+    with pytest.raises(LookupError):
+        gedge.NodeConfig.from_json5(str(config_path), snapshot=True)
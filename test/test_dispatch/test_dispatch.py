@@ -0,0 +1,137 @@
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+from gedge.comm.dispatch import Backpressure, DispatchMode, Dispatcher
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+@pytest.fixture
+def dispatchers():
+    created = []
+    def create(*args, **kwargs) -> Dispatcher:
+        d = Dispatcher(*args, **kwargs)
+        created.append(d)
+        return d
+    yield create
+    for d in created:
+        d.close()
+
+def test_inline_runs_on_the_calling_thread(dispatchers):
+    d = dispatchers(DispatchMode.INLINE)
+    threads = []
+    assert d.submit("k", lambda: threads.append(threading.current_thread()))
+    assert threads == [threading.current_thread()]
+    assert d.stats().completed == 1
+
+def test_serial_keeps_order_per_key(dispatchers):
+    d = dispatchers(DispatchMode.SERIAL, workers=4)
+    got: dict[str, list[int]] = {}
+    threads: dict[str, set[str]] = {}
+    lock = threading.Lock()
+    def callback(key: str, i: int):
+        time.sleep(random.random() / 1000)
+        with lock:
+            got.setdefault(key, []).append(i)
+            threads.setdefault(key, set()).add(threading.current_thread().name)
+    keys = [f"node/TAGS/DATA/{k}" for k in "abcdefgh"]
+    for i in range(50):
+        for key in keys:
+            d.submit(key, callback, key, i)
+    assert wait_for(lambda: d.stats().completed == 50 * len(keys))
+    for key in keys:
+        assert got[key] == list(range(50))
+        assert len(threads[key]) == 1
+
+def test_pool_runs_callbacks_concurrently(dispatchers):
+    workers = 4
+    d = dispatchers(DispatchMode.POOL, workers=workers)
+    # only passes if every callback is running at the same time
+    barrier = threading.Barrier(workers, timeout=2)
+    for _ in range(workers):
+        d.submit("k", barrier.wait)
+    assert wait_for(lambda: d.stats().completed == workers)
+    assert d.stats().errors == 0
+
+def test_asyncio_awaits_coroutines_on_the_loop(dispatchers):
+    d = dispatchers(DispatchMode.ASYNCIO)
+    got = []
+    async def callback(i: int):
+        await asyncio.sleep(0.01)
+        got.append((i, threading.current_thread().name))
+    for i in range(3):
+        d.submit("k", callback, i)
+    assert wait_for(lambda: d.stats().completed == 3)
+    assert sorted(i for i, _ in got) == [0, 1, 2]
+    assert {name for _, name in got} == {d.name}
+
+def test_errors_are_counted(dispatchers):
+    d = dispatchers(DispatchMode.POOL, workers=1)
+    d.submit("k", lambda: 1 / 0)
+    d.submit("k", lambda: None)
+    assert wait_for(lambda: d.stats().completed == 1 and d.stats().errors == 1)
+
+class Blocked:
+    '''
+    A dispatcher with one worker, busy until release() is called, and a full queue behind it
+    '''
+    def __init__(self, d: Dispatcher):
+        self.d = d
+        self.ran = []
+        self._release = threading.Event()
+        started = threading.Event()
+        def block():
+            started.set()
+            self._release.wait(5)
+        d.submit("k", block)
+        assert started.wait(2)
+        for i in range(d.max_queue):
+            assert d.submit("k", self.ran.append, i)
+        assert d.stats().queue_depth == d.max_queue
+
+    def release(self):
+        self._release.set()
+
+def test_drop_newest(dispatchers):
+    b = Blocked(dispatchers(DispatchMode.POOL, workers=1, max_queue=2, backpressure=Backpressure.DROP_NEWEST))
+    assert not b.d.submit("k", b.ran.append, 2)
+    assert b.d.stats().dropped == 1
+    b.release()
+    assert wait_for(lambda: b.d.stats().completed == 3)
+    assert b.ran == [0, 1]
+
+def test_drop_oldest(dispatchers):
+    b = Blocked(dispatchers(DispatchMode.SERIAL, workers=1, max_queue=2, backpressure=Backpressure.DROP_OLDEST))
+    assert b.d.submit("k", b.ran.append, 2)
+    assert b.d.stats().dropped == 1
+    b.release()
+    assert wait_for(lambda: b.d.stats().completed == 3)
+    assert b.ran == [1, 2]
+
+def test_block_waits_for_room(dispatchers):
+    b = Blocked(dispatchers(DispatchMode.POOL, workers=1, max_queue=2, backpressure=Backpressure.BLOCK))
+    submitted = threading.Event()
+    def submit():
+        b.d.submit("k", b.ran.append, 2)
+        submitted.set()
+    threading.Thread(target=submit, daemon=True).start()
+    assert not submitted.wait(0.2)
+    b.release()
+    assert submitted.wait(2)
+    assert wait_for(lambda: b.d.stats().completed == 4)
+    assert b.ran == [0, 1, 2]
+    assert b.d.stats().dropped == 0
+
+def test_closed_dispatcher_refuses_callbacks(dispatchers):
+    d = dispatchers(DispatchMode.POOL, workers=1)
+    d.close()
+    assert not d.submit("k", lambda: None)
@@ -0,0 +1,50 @@
+import contextlib
+import time
+
+import gedge
+import pytest
+
+from gedge.comm.keys import NodeKeySpace
+
+def node(key: str):
+    return gedge.NodeConfig.from_json5_str('{key: "%s", tags: [ { path: "a", base_type: "int" } ]}' % key)
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture
+def caller(router, node_key):
+    with gedge.connect(gedge.NodeConfig(f"{node_key}/caller"), router) as session:
+        yield session
+
+def test_liveliness_keeps_the_snapshot_current(caller, router, node_key, monkeypatch):
+    a, b, c = (NodeKeySpace.from_user_key(f"{node_key}/{name}") for name in ["a", "b", "c"])
+    with contextlib.ExitStack() as nodes:
+        nodes.enter_context(gedge.connect(node(b.user_key), router))
+        with gedge.connect(node(a.user_key), router):
+            caller.connect_to_remotes([a.user_key, b.user_key])
+            cache = caller._comm.meta_cache
+            # from here on, is_online answers from the snapshot, which is refreshed with one wildcard query once a node goes offline
+            def query(ks):
+                raise AssertionError(f"is_online({ks.user_key}) queried the network for one node")
+            monkeypatch.setattr(caller._comm, "is_online", query)
+            refreshes = []
+            query_online = caller._comm._query_online
+            monkeypatch.setattr(caller._comm, "_query_online", lambda: refreshes.append(1) or query_online())
+            assert cache.is_online(a) and cache.is_online(b)
+            assert refreshes == []
+
+        assert wait_until(lambda: not cache.is_online(a))
+        assert cache.is_online(b)
+        assert refreshes
+
+        # nodes that come online after a node went offline are still seen
+        nodes.enter_context(gedge.connect(node(a.user_key), router))
+        assert wait_until(lambda: cache.is_online(a))
+        nodes.enter_context(gedge.connect(node(c.user_key), router))
+        assert wait_until(lambda: cache.is_online(c))
@@ -0,0 +1,123 @@
+import gedge
+import pytest
+
+from gedge.py_proto.data_model_config import DataModelConfig
+from gedge.py_proto.data_model_ref import DataModelRef
+from gedge.py_proto.model_registry import ModelRegistry, model_registry
+from gedge.py_proto.singleton import Singleton
+
+MODEL = '''
+{
+    path: "%s",
+    version: %d,
+    %s
+    tags: [ { path: "%s", base_type: "int" } ],
+}
+'''
+
+def write_model(models, path: str, version: int, tag: str = "x", parent: str | None = None):
+    (models / path).mkdir(parents=True, exist_ok=True)
+    parent_line = f'parent: "{parent}",' if parent else ""
+    (models / path / f"v{version}.json5").write_text(MODEL % (path, version, parent_line, tag))
+
+def paths(model: DataModelConfig) -> list[str]:
+    return [item.path for item in model.items]
+
+@pytest.fixture
+def model_dir(tmp_path):
+    previous = Singleton().get_model_dir()
+    models = tmp_path / "models"
+    write_model(models, "a", 1)
+    write_model(models, "a", 2, tag="y")
+    write_model(models, "child", 1, tag="z", parent="a/VERSION/1")
+    gedge.use_models(str(models))
+    yield models
+    model_registry().clear()
+    model_registry().max_size = None
+    Singleton().set_model_dir(previous)
+
+def test_miss_then_hit(model_dir):
+    registry = ModelRegistry()
+    model = registry.get(DataModelRef("a", 1))
+    assert paths(model) == ["x"]
+    assert registry.get(DataModelRef("a", 1)) is model
+    stats = registry.stats()
+    assert (stats.misses, stats.hits, stats.size) == (1, 1, 1)
+    assert registry.lookup("a", 1) is model
+    assert registry.lookup("a", 2) is None
+
+def test_versions_do_not_collide(model_dir):
+    registry = ModelRegistry()
+    assert paths(registry.get(DataModelRef("a", 1))) == ["x"]
+    assert paths(registry.get(DataModelRef("a", 2))) == ["y"]
+    assert registry.stats().size == 2
+
+def test_unversioned_ref_is_pinned_to_latest(model_dir):
+    registry = ModelRegistry()
+    ref = DataModelRef("a")
+    assert paths(registry.get(ref)) == ["y"]
+    assert ref.version == 2
+
+def test_parent_items_are_flattened(model_dir):
+    assert paths(ModelRegistry().get(DataModelRef("child", 1))) == ["z", "x"]
+
+def test_missing_model(model_dir):
+    registry = ModelRegistry()
+    with pytest.raises(LookupError):
+        registry.get(DataModelRef("nope", 1))
+    with pytest.raises(LookupError):
+        registry.get(DataModelRef("nope"))
+    with pytest.raises(LookupError):
+        registry.get(DataModelRef("a", 3))
+    assert registry.stats().size == 0
+
+def test_no_model_dir(model_dir):
+    Singleton().set_model_dir(None)
+    with pytest.raises(LookupError):
+        ModelRegistry().get(DataModelRef("a", 1))
+
+def test_least_recently_used_is_evicted(model_dir):
+    registry = ModelRegistry(max_size=2)
+    a1 = registry.get(DataModelRef("a", 1))
+    registry.get(DataModelRef("a", 2))
+    registry.get(DataModelRef("a", 1))
+    registry.get(DataModelRef("child", 1))
+    stats = registry.stats()
+    assert (stats.size, stats.evictions) == (2, 1)
+    assert registry.lookup("a", 1) is a1
+    assert registry.lookup("a", 2) is None
+    # an evicted model is just loaded again
+    assert paths(registry.get(DataModelRef("a", 2))) == ["y"]
+
+def test_max_size_must_be_positive():
+    with pytest.raises(ValueError):
+        ModelRegistry(max_size=0)
+
+def test_clear_forgets_models(model_dir):
+    registry = ModelRegistry()
+    model = registry.get(DataModelRef("a", 1))
+    registry.clear()
+    assert registry.lookup("a", 1) is None
+    assert registry.get(DataModelRef("a", 1)) is not model
+    assert registry.stats().misses == 2
+
+def test_other_model_dir_invalidates(model_dir, tmp_path):
+    assert paths(model_registry().get(DataModelRef("a", 1))) == ["x"]
+    other = tmp_path / "other"
+    write_model(other, "a", 1, tag="other")
+    gedge.use_models(str(other))
+    assert paths(model_registry().get(DataModelRef("a", 1))) == ["other"]
+
+def test_changed_model_invalidates(model_dir):
+    assert paths(model_registry().get(DataModelRef("a", 1))) == ["x"]
+    assert paths(model_registry().get(DataModelRef("a"))) == ["y"]
+    write_model(model_dir, "a", 1, tag="changed")
+    write_model(model_dir, "a", 3, tag="new")
+    gedge.use_models(str(model_dir))
+    assert paths(model_registry().get(DataModelRef("a", 1))) == ["changed"]
+    assert paths(model_registry().get(DataModelRef("a"))) == ["new"]
+
+def test_unchanged_model_dir_keeps_models(model_dir):
+    model = model_registry().get(DataModelRef("a", 1))
+    gedge.use_models(str(model_dir))
+    assert model_registry().get(DataModelRef("a", 1)) is model
@@ -0,0 +1,109 @@
+import pytest
+
+from gedge.py_proto import model_store as store_module
+from gedge.py_proto.model_store import STORE_FILE, ModelStore
+
+MODEL = '''
+{
+    path: "%s",
+    version: %d,
+    tags: [ { path: "%s", base_type: "int" } ],
+}
+'''
+
+def write_model(models, path: str, version: int, tag: str = "x"):
+    (models / path).mkdir(parents=True, exist_ok=True)
+    (models / path / f"v{version}.json5").write_text(MODEL % (path, version, tag))
+
+def paths(model) -> list[str]:
+    return [item.path for item in model.items]
+
+@pytest.fixture
+def model_dir(tmp_path):
+    models = tmp_path / "models"
+    write_model(models, "a", 1)
+    write_model(models, "a", 2, tag="y")
+    write_model(models, "b/c", 1, tag="z")
+    ModelStore(str(models)).refresh()
+    return models
+
+@pytest.fixture
+def parsed(monkeypatch):
+    '''
+    The json5 files parsed from here on
+    '''
+    files = []
+    load_from_file = store_module.load_from_file
+    def _load_from_file(path: str):
+        files.append(path)
+        return load_from_file(path)
+    monkeypatch.setattr(store_module, "load_from_file", _load_from_file)
+    return files
+
+def test_refresh_only_rewrites_on_change(model_dir):
+    assert (model_dir / STORE_FILE).exists()
+    store = ModelStore(str(model_dir))
+    assert not store.refresh()
+    write_model(model_dir, "d", 1)
+    assert store.refresh()
+    assert not store.refresh()
+
+def test_loads_from_store_without_parsing(model_dir, parsed):
+    # a new store reads what an earlier process compiled
+    store = ModelStore(str(model_dir))
+    assert paths(store.load("a", 1)) == ["x"]
+    assert paths(store.load("a", 2)) == ["y"]
+    assert paths(store.load("b/c", 1)) == ["z"]
+    assert not store.refresh()
+    assert parsed == []
+
+def test_changed_model_is_parsed_again(model_dir, parsed):
+    store = ModelStore(str(model_dir))
+    write_model(model_dir, "a", 1, tag="changed")
+    assert paths(store.load("a", 1)) == ["changed"]
+    assert len(parsed) == 1
+    # recompiling picks up the change, so the next store does not parse it
+    assert store.refresh()
+    assert len(parsed) == 2
+    assert paths(ModelStore(str(model_dir)).load("a", 1)) == ["changed"]
+    assert len(parsed) == 2
+
+def test_missing_model(model_dir):
+    store = ModelStore(str(model_dir))
+    with pytest.raises(LookupError):
+        store.load("a", 3)
+    with pytest.raises(LookupError):
+        store.load("nope", 1)
+    with pytest.raises(LookupError):
+        store.latest_version("nope")
+
+def test_deleted_model_is_a_miss(model_dir):
+    store = ModelStore(str(model_dir))
+    (model_dir / "a" / "v1.json5").unlink()
+    with pytest.raises(LookupError):
+        store.load("a", 1)
+
+def test_latest_version(model_dir):
+    store = ModelStore(str(model_dir))
+    assert store.latest_version("a") == 2
+    assert store.latest_version("b/c") == 1
+    # adding a version changes the directory, so it is listed again without a refresh
+    write_model(model_dir, "a", 3)
+    assert store.latest_version("a") == 3
+
+def test_unreadable_store_is_ignored(model_dir, parsed):
+    (model_dir / STORE_FILE).write_bytes(b"not a model store")
+    store = ModelStore(str(model_dir))
+    assert paths(store.load("a", 1)) == ["x"]
+    assert len(parsed) == 1
+    assert store.refresh()
+    assert paths(ModelStore(str(model_dir)).load("a", 1)) == ["x"]
+    assert len(parsed) == 1 + 3
+
+def test_broken_model_is_skipped(model_dir):
+    (model_dir / "a" / "v4.json5").write_text("{ not json5")
+    store = ModelStore(str(model_dir))
+    store.refresh()
+    assert paths(store.load("a", 2)) == ["y"]
+    with pytest.raises(Exception):
+        store.load("a", 4)
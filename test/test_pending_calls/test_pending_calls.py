@@ -0,0 +1,82 @@
+import asyncio
+import queue
+import threading
+import time
+
+import gedge
+import pytest
+
+CONFIG = '''
+{
+    key: "%s",
+    methods: [
+        { path: "slow", responses: [ { code: 200, type: "ok" } ] },
+        { path: "fast", responses: [ { code: 200, type: "ok" } ] },
+    ],
+}
+'''
+
+@pytest.fixture
+def callee(router, node_key):
+    release = threading.Event()
+    config = gedge.NodeConfig.from_json5_str(CONFIG % node_key)
+    # never finishes while the test is running
+    config.add_method_handler("slow", lambda q: release.wait(10))
+    config.add_method_handler("fast", lambda q: q.reply_ok(200))
+    with gedge.connect(config, router) as session:
+        yield session
+        release.set()
+
+@pytest.fixture
+def caller(callee, router):
+    with gedge.connect(gedge.NodeConfig(f"{callee.ks.user_key}/caller"), router) as session:
+        yield session
+
+@pytest.fixture
+def remote(caller, callee):
+    return caller.connect_to_remote(callee.ks.user_key)
+
+def call(remote, path: str, timeout: float) -> queue.Queue:
+    replies = queue.Queue()
+    remote._comm.query_method(remote.ks, path, remote.node_id, {}, replies.put, remote.methods[path], timeout)
+    return replies
+
+def test_dropped_call_gets_timeout_response(remote):
+    replies = call(remote, "slow", 0.3)
+    start = time.monotonic()
+    reply = replies.get(timeout=2)
+    assert time.monotonic() - start < 1
+    assert reply.code == gedge.TIMEOUT
+    assert reply.is_err()
+    assert remote._comm.pending_calls == {}
+
+def test_finished_call_is_not_timed_out(remote):
+    replies = call(remote, "fast", 0.3)
+    assert replies.get(timeout=2).code == 200
+    time.sleep(0.5)
+    assert replies.empty()
+
+def test_earlier_deadline_wakes_the_watcher(remote):
+    # the watcher is already waiting on the first call when the second, shorter one comes in
+    late = call(remote, "slow", 5)
+    early = call(remote, "slow", 0.3)
+    assert early.get(timeout=1).code == gedge.TIMEOUT
+    assert late.empty()
+
+def test_closing_session_abandons_calls(callee, router):
+    replies = queue.Queue()
+    with gedge.connect(gedge.NodeConfig(f"{callee.ks.user_key}/caller"), router) as session:
+        session.connect_to_remote(callee.ks.user_key).call_method("slow", replies.put)
+    assert replies.get(timeout=2).code == gedge.TIMEOUT
+
+def test_call_method_iter_times_out(remote):
+    with pytest.raises(TimeoutError):
+        list(remote.call_method_iter("slow", 300))
+    assert remote._comm.pending_calls == {}
+
+def test_async_call_method_times_out(remote):
+    async def call_slow():
+        async for _ in remote.aio.call_method("slow", 300):
+            pass
+    with pytest.raises(TimeoutError):
+        asyncio.run(call_slow())
@@ -0,0 +1,127 @@
+import time
+
+import gedge
+import pytest
+
+from gedge.py_proto.tag_config import Tag
+
+CONFIG = '''
+{
+    key: "%s",
+    tags: [
+        { path: "plain", base_type: "int" },
+        { path: "db", base_type: "float", report: { deadband: 1 } },
+        { path: "pct", base_type: "float", report: { percent_deadband: 10 } },
+        { path: "min", base_type: "int", report: { min_interval_ms: 300 } },
+        { path: "max", base_type: "float", report: { deadband: 100, max_interval_ms: 300 } },
+        { path: "hb", base_type: "int", report: { heartbeat_ms: 200 } },
+        { path: "g/a", base_type: "float", report: { deadband: 1 } },
+        { path: "g/b", base_type: "int" },
+    ],
+    group_config: [ { group_path: "g", tag_paths: ["g/a", "g/b"] } ],
+}
+'''
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture
+def session(router, node_key):
+    with gedge.connect(gedge.NodeConfig.from_json5_str(CONFIG % node_key), router) as session:
+        yield session
+
+@pytest.fixture
+def published(session, record_published):
+    return record_published(session)
+
+def test_without_report_config_every_update_is_published(session, published):
+    for value in [1, 1, 2]:
+        session.update_tag("plain", value)
+    assert published.of("plain") == [1, 1, 2]
+
+def test_deadband(session, published):
+    for value in [0.0, 0.5, 1.5, 2.0, 3.0, 3.0]:
+        session.update_tag("db", value)
+    assert published.of("db") == [0.0, 1.5, 3.0]
+
+def test_percent_deadband(session, published):
+    for value in [100.0, 105.0, 115.0, 120.0]:
+        session.update_tag("pct", value)
+    assert published.of("pct") == [100.0, 115.0]
+
+def test_min_interval_holds_the_latest_value(session, published):
+    for value in [1, 5, 7]:
+        session.update_tag("min", value)
+    assert published.of("min") == [1]
+    # the held value is published by the report thread once the interval is up
+    assert wait_for(lambda: published.of("min") == [1, 7])
+    time.sleep(0.4)
+    assert published.of("min") == [1, 7]
+
+def test_value_back_inside_deadband_is_not_held(session, published):
+    session.update_tag("min", 1)
+    session.update_tag("min", 5)
+    session.update_tag("min", 1)
+    time.sleep(0.5)
+    assert published.of("min") == [1]
+
+def test_max_interval(session, published):
+    session.update_tag("max", 1.0)
+    session.update_tag("max", 2.0)
+    assert published.of("max") == [1.0]
+    time.sleep(0.35)
+    session.update_tag("max", 3.0)
+    assert published.of("max") == [1.0, 3.0]
+
+def test_heartbeat(session, published):
+    session.update_tag("hb", 4)
+    session.update_tag("hb", 4)
+    assert published.of("hb") == [4]
+    assert wait_for(lambda: len(published.of("hb")) >= 3)
+    assert set(published.of("hb")) == {4}
+
+def test_group_members_are_filtered_one_by_one(session, published):
+    session.update_group({"g/a": 0.0, "g/b": 1})
+    session.update_group({"g/a": 0.5, "g/b": 1})
+    session.update_group({"g/a": 0.6})
+    assert published.of("g/a") == [0.0]
+    assert published.of("g/b") == [1, 1]
+
+def test_failed_update_tags_is_not_recorded_as_published(session, published):
+    session.update_tag("db", 0.0)
+    with pytest.raises((TypeError, ValueError)):
+        session.update_tags({"db": 10.0, "plain": "not an int"})
+    # nothing went out, so 10.0 is still outside the deadband of the last published value
+    session.update_tags({"db": 10.0})
+    assert published.of("db") == [0.0, 10.0]
+    assert published.of("plain") == []
+
+def test_failed_update_group_is_not_recorded_as_published(session, published):
+    session.update_group({"g/a": 0.0})
+    with pytest.raises((TypeError, ValueError)):
+        session.update_group({"g/a": 10.0, "g/b": "not an int"})
+    session.update_group({"g/a": 10.0})
+    assert published.of("g/a") == [0.0, 10.0]
+
+def test_failed_update_tag_is_not_recorded_as_published(session, published):
+    session.update_tag("db", 0.0)
+    with pytest.raises((TypeError, ValueError)):
+        session.update_tag("db", "not a float")
+    session.update_tag("db", 0.0)
+    assert published.of("db") == [0.0]
+
+def test_replaced_tag_uses_its_new_report_config(session, published):
+    session.update_tag("db", 0.0)
+    session.update_tag("db", 0.5)
+    session.tag_config["db"] = Tag.from_json5({ "path": "db", "base_type": "float" })
+    session.update_tag("db", 0.5)
+    session.update_tag("db", 0.5)
+    session.tag_config["db"] = Tag.from_json5({ "path": "db", "base_type": "float", "report": { "deadband": 5 } })
+    session.update_tag("db", 1.0)
+    session.update_tag("db", 2.0)
+    assert published.of("db") == [0.0, 0.5, 0.5, 1.0]
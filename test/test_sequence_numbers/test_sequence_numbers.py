@@ -0,0 +1,133 @@
+import gedge
+import pytest
+import zenoh
+
+from gedge.comm.sequence_number import WINDOW, SequenceFormat, SequenceNumbers, SequenceTracker, decode
+
+KEY = "test/NODE/seq/TAGS/DATA/a"
+
+@pytest.fixture(params=list(SequenceFormat), ids=lambda f: f.value)
+def numbers(request):
+    return SequenceNumbers(request.param)
+
+def attachments(numbers: SequenceNumbers, n: int, key: str = KEY) -> list[zenoh.ZBytes]:
+    return [zenoh.ZBytes(numbers.next(key)) for _ in range(n)]
+
+def test_in_order(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    for a in attachments(numbers, 5):
+        assert stream.accept(KEY, a)
+    assert tracker.stats() == gedge.SequenceStats(received=5)
+
+def test_gap_counts_lost(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    a = attachments(numbers, 6)
+    for i in [0, 1, 4, 5]:
+        stream.accept(KEY, a[i])
+    assert tracker.stats() == gedge.SequenceStats(received=4, lost=2)
+
+def test_late_sample_is_reordered_not_lost(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    a = attachments(numbers, 4)
+    for i in [0, 2, 3, 1]:
+        stream.accept(KEY, a[i])
+    assert tracker.stats() == gedge.SequenceStats(received=4, lost=0, reordered=1)
+
+def test_duplicate(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    a = attachments(numbers, 3)
+    for i in [0, 1, 1, 2, 0]:
+        stream.accept(KEY, a[i])
+    assert tracker.stats() == gedge.SequenceStats(received=3, duplicates=2)
+
+def test_drop_stale(numbers):
+    stream = SequenceTracker(drop_stale=True).stream()
+    a = attachments(numbers, 3)
+    assert stream.accept(KEY, a[0])
+    assert stream.accept(KEY, a[2])
+    assert not stream.accept(KEY, a[1])
+    assert not stream.accept(KEY, a[2])
+
+def test_sample_older_than_window_is_reordered(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    a = attachments(numbers, WINDOW + 2)
+    stream.accept(KEY, a[WINDOW + 1])
+    stream.accept(KEY, a[0])
+    assert tracker.stats() == gedge.SequenceStats(received=2, reordered=1)
+
+def test_restarted_sender_is_a_reset(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    for a in attachments(numbers, 3):
+        stream.accept(KEY, a)
+    # a new session starts over at 0 with a new epoch
+    for a in attachments(SequenceNumbers(numbers.format), 2):
+        stream.accept(KEY, a)
+    assert tracker.stats() == gedge.SequenceStats(received=5, resets=1)
+
+def test_keys_are_counted_separately(numbers):
+    tracker = SequenceTracker()
+    stream = tracker.stream()
+    other = "test/NODE/seq/TAGS/DATA/b"
+    stream.accept(KEY, zenoh.ZBytes(numbers.next(KEY)))
+    stream.accept(other, zenoh.ZBytes(numbers.next(other)))
+    stream.accept(KEY, zenoh.ZBytes(numbers.next(KEY)))
+    assert tracker.stats(KEY) == gedge.SequenceStats(received=2)
+    assert tracker.stats(other) == gedge.SequenceStats(received=1)
+
+def test_subscribers_do_not_see_each_others_samples_as_duplicates(numbers):
+    tracker = SequenceTracker()
+    first, second = tracker.stream(), tracker.stream()
+    for a in attachments(numbers, 3):
+        first.accept(KEY, a)
+        second.accept(KEY, a)
+    assert tracker.stats() == gedge.SequenceStats(received=6)
+
+def test_decode(numbers):
+    numbers.next(KEY)
+    assert decode(zenoh.ZBytes(numbers.next(KEY))) == (numbers.epoch, 1)
+
+def test_text_format_is_utf8():
+    # older gedge versions log every attachment with ZBytes.to_string(), which raises on anything but UTF-8
+    numbers = SequenceNumbers()
+    assert zenoh.ZBytes(numbers.next(KEY)).to_string() == f"{numbers.epoch:08x}:0"
+
+@pytest.mark.parametrize("attachment", [b"17", b"", b"xyz:1", b"\xff\x00"], ids=["older gedge", "empty", "not hex", "short binary"])
+def test_unknown_attachment_is_not_sequenced(attachment):
+    tracker = SequenceTracker(drop_stale=True)
+    stream = tracker.stream()
+    assert decode(zenoh.ZBytes(attachment)) is None
+    assert stream.accept(KEY, zenoh.ZBytes(attachment))
+    assert stream.accept(KEY, zenoh.ZBytes(attachment))
+    assert tracker.stats() == gedge.SequenceStats()
+
+def test_no_attachment_is_accepted():
+    tracker = SequenceTracker(drop_stale=True)
+    assert tracker.stream().accept(KEY, None)
+    assert tracker.stats() == gedge.SequenceStats()
+
+CONFIG = '''
+{
+    key: "%s",
+    tags: [ { path: "t", base_type: "int" } ],
+    methods: [ { path: "m", responses: [ { code: 200, type: "ok" } ] } ],
+}
+'''
+
+def test_method_calls_are_not_sequenced(router, node_key):
+    # every call and reply is put on a key of its own, which would leave a counter behind per call
+    config = gedge.NodeConfig.from_json5_str(CONFIG % node_key)
+    config.add_method_handler("m", lambda q: q.reply_ok(200))
+    with gedge.connect(config, router) as callee:
+        with gedge.connect(gedge.NodeConfig(f"{node_key}/caller"), router) as caller:
+            remote = caller.connect_to_remote(node_key)
+            for _ in range(20):
+                assert [r.code for r in remote.call_method_iter("m", _timeout=3000)] == [200]
+            callee.update_tag("t", 1)
+            assert len(caller._comm.sequence_numbers._counters) == 0
+            assert list(callee._comm.sequence_numbers._counters) == [callee.ks.tag_data_path("t")]
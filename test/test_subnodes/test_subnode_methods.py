@@ -0,0 +1,42 @@
+import gedge
+import pytest
+
+CONFIG = '''
+{
+    key: "%s",
+    methods: [ { path: "m", responses: [ { code: 200, type: "ok" } ] } ],
+    subnodes: [
+        {
+            name: "s",
+            methods: [ { path: "sm", responses: [ { code: 201, type: "ok" } ] } ],
+        },
+    ],
+}
+'''
+
+@pytest.fixture
+def callee(router, node_key):
+    config = gedge.NodeConfig.from_json5_str(CONFIG % node_key)
+    config.add_method_handler("m", lambda q: q.reply_ok(200))
+    config.subnode("s").add_method_handler("sm", lambda q: q.reply_ok(201))
+    with gedge.connect(config, router) as session:
+        yield session
+
+def call(remote, path: str) -> list[int]:
+    return [r.code for r in remote.call_method_iter(path, _timeout=3000)]
+
+@pytest.mark.parametrize("root_first", [True, False], ids=["root then subnode", "subnode then root"])
+def test_root_and_subnode_methods(callee, router, root_first):
+    # a subnode shares the user key of its node, but its responses come back on its own key expressions
+    with gedge.connect(gedge.NodeConfig(f"{callee.ks.user_key}/caller"), router) as session:
+        remote = session.connect_to_remote(callee.ks.user_key)
+        sub = remote.subnode("s")
+        if root_first:
+            assert call(remote, "m") == [200]
+            assert call(sub, "sm") == [201]
+        else:
+            assert call(sub, "sm") == [201]
+            assert call(remote, "m") == [200]
+        # both keep working once both subscribers are declared
+        assert call(remote, "m") == [200]
+        assert call(sub, "sm") == [201]
@@ -0,0 +1,114 @@
+import gedge
+import json5
+import pytest
+
+from gedge.py_proto.data_model_config import DataModelConfig
+from gedge.py_proto.model_registry import model_registry
+from gedge.py_proto.model_store import ModelStore
+from gedge.py_proto.singleton import Singleton
+from gedge.py_proto.tag_config import Tag, TagConfig
+
+MODEL = '''
+{
+    path: "%s",
+    version: 1,
+    tags: [ { path: "x", base_type: "int" }, { path: "inner", model_path: "%s" } ],
+}
+'''
+
+LEAF = '''
+{
+    path: "leaf",
+    version: 1,
+    tags: [ { path: "y", base_type: "string" } ],
+}
+'''
+
+TAGS = [
+    { "path": "a", "base_type": "int" },
+    { "path": "m", "model_path": "good" },
+    { "path": "broken", "model_path": "missing" },
+]
+
+@pytest.fixture
+def model_dir(tmp_path):
+    previous = Singleton().get_model_dir()
+    models = tmp_path / "models"
+    write_model(models, "good", MODEL % ("good", "leaf"))
+    write_model(models, "leaf", LEAF)
+    gedge.use_models(str(models))
+    yield models
+    model_registry().clear()
+    Singleton().set_model_dir(previous)
+
+def write_model(models, path: str, model: str):
+    (models / path).mkdir(parents=True, exist_ok=True)
+    (models / path / "v1.json5").write_text(model)
+
+@pytest.fixture
+def tags(model_dir):
+    return TagConfig.from_json5(TAGS, [], [])
+
+def test_nested_paths(tags):
+    assert tags.is_base_type("a")
+    assert tags.is_valid_path("m")
+    assert not tags.is_base_type("m")
+    assert tags.is_base_type("m/x")
+    assert tags.is_base_type("m/inner/y")
+    assert tags.get_tag("m/inner/y") is tags["m"]
+    assert tags.get_config("m/inner/y").path == "y"
+    assert not tags.is_valid_path("m/y")
+    assert tags.lookup("m/nope") is None
+
+def test_unloadable_model_only_affects_its_tag(tags):
+    # the baseline answered False for the paths it could not resolve, instead of raising for every path
+    assert tags.is_valid_path("m/inner/y")
+    assert tags.is_valid_path("broken")
+    assert not tags.is_base_type("broken")
+    assert not tags.is_valid_path("broken/x")
+    assert not tags.is_valid_path("nope")
+    with pytest.raises(LookupError):
+        tags.get_entry("broken/x")
+
+def test_unloadable_model_resolves_once_it_can_be_loaded(tags, model_dir):
+    assert not tags.is_valid_path("broken/x")
+    write_model(model_dir, "missing", MODEL % ("missing", "leaf"))
+    gedge.use_models(str(model_dir))
+    assert tags.is_base_type("broken/x")
+    assert tags.is_base_type("broken/inner/y")
+
+def test_unloadable_model_resolves_once_it_is_registered(tags):
+    assert not tags.is_valid_path("broken/x")
+    model_registry().add(DataModelConfig.from_json5(json5.loads(LEAF.replace('"leaf"', '"missing"'))))
+    assert tags.is_base_type("broken/y")
+
+def test_lookup_misses_do_not_reload_unloadable_model(tags, monkeypatch):
+    assert not tags.is_valid_path("broken/x")
+    reads = []
+    latest_version = ModelStore.latest_version
+    def _latest_version(self, path: str) -> int:
+        reads.append(path)
+        return latest_version(self, path)
+    monkeypatch.setattr(ModelStore, "latest_version", _latest_version)
+    for path in ["broken/x", "nope", "m/nope", "broken/y"]:
+        assert not tags.is_valid_path(path)
+    # a new tag is indexed without trying the unloadable one again
+    tags["b"] = Tag.from_json5({ "path": "b", "base_type": "int" })
+    assert tags.is_base_type("b")
+    assert not tags.is_valid_path("broken/x")
+    assert reads == []
+    # until a model is registered
+    model_registry().add(DataModelConfig.from_json5(json5.loads(LEAF)))
+    assert not tags.is_valid_path("broken/x")
+    assert reads == ["missing"]
+
+def test_tag_wins_over_nested_item(model_dir):
+    tags = TagConfig.from_json5([{ "path": "m", "model_path": "good" }, { "path": "m/x", "base_type": "string" }], [], [])
+    assert tags.get_tag("m/x") is tags["m/x"]
+    assert tags.get_tag("m/inner/y") is tags["m"]
+
+def test_replaced_tag_is_reindexed(tags):
+    assert tags.is_base_type("m/x")
+    tags["m"] = Tag.from_json5({ "path": "m", "base_type": "int" })
+    assert tags.is_base_type("m")
+    assert not tags.is_valid_path("m/x")
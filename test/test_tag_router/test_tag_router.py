@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import gedge
+import pytest
+
+CONFIG = '''
+{
+    key: "%s",
+    tags: [
+        { path: "a", base_type: "int" },
+        { path: "b", base_type: "int" },
+    ],
+}
+'''
+
+class Received:
+    '''
+    The values a callback got, to wait on from the test
+    '''
+    def __init__(self):
+        self.values = []
+        self._event = threading.Event()
+
+    def __call__(self, key_expr, value):
+        self.values.append(value)
+        self._event.set()
+
+    def wait_for(self, value, timeout: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while value not in self.values:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._event.wait(remaining)
+            self._event.clear()
+        return True
+
+@pytest.fixture
+def node(router, node_key):
+    with gedge.connect(gedge.NodeConfig.from_json5_str(CONFIG % node_key), router) as session:
+        yield session
+
+@pytest.fixture(params=[gedge.TagSubscription.NODE, gedge.TagSubscription.PER_TAG], ids=["node", "per tag"])
+def remote(request, node, router):
+    with gedge.connect(gedge.NodeConfig(f"{node.ks.user_key}/caller"), router) as session:
+        yield session.connect_to_remote(node.ks.user_key, tag_subscription=request.param)
+
+def test_closing_async_subscription_keeps_other_callbacks(node, remote):
+    first = Received()
+    remote.add_tag_data_callback("a", first)
+
+    async def subscribe_once():
+        async with remote.aio.subscribe_tag("a") as sub:
+            await asyncio.sleep(0.3)
+            node.update_tag("a", 1)
+            key_expr, value = await asyncio.wait_for(sub.__anext__(), 2)
+            assert value == 1
+    asyncio.run(subscribe_once())
+
+    later = Received()
+    remote.add_tag_data_callback("a", later)
+    time.sleep(0.3)
+    node.update_tag("a", 2)
+    assert first.wait_for(2)
+    assert later.wait_for(2)
+
+def test_undeclare_removes_only_its_callback(node, remote):
+    kept, removed = Received(), Received()
+    remote.add_tag_data_callback("b", kept)
+    handle = remote.add_tag_data_callback("b", removed)
+    time.sleep(0.3)
+    handle.undeclare()
+    node.update_tag("b", 3)
+    assert kept.wait_for(3)
+    time.sleep(0.2)
+    assert removed.values == []
+
+def test_remove_last_callback_undeclares_router_subscriber(node, router, node_key):
+    with gedge.connect(gedge.NodeConfig(f"{node_key}/caller"), router) as session:
+        remote = session.connect_to_remote(node_key, tag_subscription=gedge.TagSubscription.NODE)
+        a, b = Received(), Received()
+        remote.add_tag_data_callback("a", a)
+        remote.add_tag_data_callback("b", b)
+        assert remote.subscription_count() == 1
+        remote.remove_tag_data_callback("a", a)
+        assert remote.subscription_count() == 1
+        remote.remove_tag_data_callback("b", b)
+        assert remote.subscription_count() == 0
+        # a callback added afterwards declares a new subscriber
+        remote.add_tag_data_callback("a", a)
+        time.sleep(0.3)
+        node.update_tag("a", 4)
+        assert a.wait_for(4)
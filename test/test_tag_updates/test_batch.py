@@ -0,0 +1,121 @@
+import gedge
+import pytest
+
+CONFIG = '''
+{
+    key: "%s",
+    tags: [
+        { path: "a", base_type: "int" },
+        { path: "b", base_type: "float" },
+        { path: "c", base_type: "list[int]" },
+        { path: "g/x", base_type: "int" },
+        { path: "g/y", base_type: "string" },
+    ],
+    group_config: [ { group_path: "g", tag_paths: ["g/x", "g/y"] } ],
+}
+'''
+
+@pytest.fixture
+def session(router, node_key):
+    with gedge.connect(gedge.NodeConfig.from_json5_str(CONFIG % node_key), router) as session:
+        yield session
+
+@pytest.fixture
+def published(session, record_published):
+    return record_published(session)
+
+def test_batch_publishes_on_exit(session, published):
+    with session.batch() as batch:
+        batch["a"] = 1
+        batch.update_tag("b", 2.5)
+        batch.update_tags({"c": [1, 2]})
+        batch["a"] = 3
+        assert published.values == []
+    assert published.values == [("a", 3), ("b", 2.5), ("c", [1, 2])]
+    assert len(published.bursts) == 1
+
+def test_batch_only_changed(session, published):
+    with session.batch(only_changed=True) as batch:
+        batch.update_tags({"a": 1, "b": 2.5, "c": [1, 2]})
+    published.clear()
+    with session.batch(only_changed=True) as batch:
+        batch.update_tags({"a": 1, "b": 3.5, "c": [1, 2]})
+    assert published.values == [("b", 3.5)]
+    published.clear()
+    # nothing changed, so nothing goes out at all
+    with session.batch(only_changed=True) as batch:
+        batch.update_tags({"a": 1, "b": 3.5, "c": [1, 2]})
+    assert published.bursts == []
+
+def test_batch_only_changed_sees_same_value_of_other_type(session, published):
+    session.update_tags({"a": 1})
+    published.clear()
+    with session.batch(only_changed=True) as batch:
+        batch["a"] = True
+    assert published.of("a") == [1]
+
+def test_batch_only_changed_sees_list_mutated_in_place(session, published):
+    value = [1, 2]
+    with session.batch(only_changed=True) as batch:
+        batch["c"] = value
+    value.append(3)
+    with session.batch(only_changed=True) as batch:
+        batch["c"] = value
+    assert published.of("c") == [[1, 2], [1, 2, 3]]
+
+def test_batch_publishes_group_and_plain_tags_together(session, published):
+    with session.batch() as batch:
+        batch["a"] = 1
+        batch["g/x"] = 2
+        batch["g/y"] = "two"
+    assert sorted(published.values) == [("a", 1), ("g/x", 2), ("g/y", "two")]
+    assert len(published.bursts) == 1
+    # the group members share one frame rather than going out as separate tags
+    assert len(published.bursts[0]) == 3
+
+def test_batch_group_only_sends_changed_members(session, published):
+    with session.batch(only_changed=True) as batch:
+        batch.update_tags({"g/x": 1, "g/y": "one"})
+    published.clear()
+    with session.batch(only_changed=True) as batch:
+        batch.update_tags({"g/x": 1, "g/y": "two"})
+    assert published.values == [("g/y", "two")]
+
+def test_batch_bad_value_publishes_nothing(session, published):
+    with pytest.raises(ValueError):
+        with session.batch(only_changed=True) as batch:
+            batch["a"] = 1
+            batch["g/x"] = 2
+            batch["b"] = "not a float"
+    assert published.values == []
+    # the values in front of the bad one were never published, so they are still changes
+    with session.batch(only_changed=True) as batch:
+        batch.update_tags({"a": 1, "g/x": 2})
+    assert sorted(published.values) == [("a", 1), ("g/x", 2)]
+
+def test_batch_unknown_tag_publishes_nothing(session, published):
+    with pytest.raises(LookupError):
+        with session.batch() as batch:
+            batch["a"] = 1
+            batch["missing"] = 1
+    assert published.values == []
+
+def test_batch_discarded_on_exception(session, published):
+    with pytest.raises(RuntimeError):
+        with session.batch() as batch:
+            batch["a"] = 1
+            raise RuntimeError("scan failed")
+    assert published.values == []
+    assert len(batch) == 0
+    with session.batch(only_changed=True) as batch:
+        batch["a"] = 1
+    assert published.of("a") == [1]
+
+def test_batch_flush(session, published):
+    batch = session.batch()
+    batch["a"] = 1
+    batch.flush()
+    batch.flush()
+    assert published.of("a") == [1]
+    assert len(published.bursts) == 1
+    assert len(batch) == 0
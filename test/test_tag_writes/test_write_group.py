@@ -0,0 +1,84 @@
+import gedge
+import pytest
+
+CONFIG = '''
+{
+    key: "%s",
+    tags: [
+        { path: "x", base_type: "float" },
+        { path: "y", base_type: "float" },
+        { path: "z", base_type: "int" },
+        { path: "r", base_type: "int" },
+    ],
+    group_config: [
+        {
+            group_path: "axis",
+            tag_paths: ["x", "y", "z"],
+            writable: true,
+            responses: [
+                { code: 210, type: "ok", body: [ { path: "n", base_type: "int" } ] },
+                { code: 410, type: "err" },
+            ],
+        },
+        { group_path: "readonly", tag_paths: ["r"] },
+    ],
+}
+'''
+
+@pytest.fixture
+def written(router, node_key):
+    written = []
+    def handler(query: gedge.GroupWriteQuery):
+        written.append(query.values)
+        if query.values.get("z", 0) > 100:
+            query.reply_err(410)
+        query.reply_ok(210, {"n": len(query.values)})
+    config = gedge.NodeConfig.from_json5_str(CONFIG % node_key)
+    config.add_group_write_handler("axis", handler)
+    with gedge.connect(config, router):
+        yield written
+
+@pytest.fixture
+def remote(written, router, node_key):
+    with gedge.connect(gedge.NodeConfig(f"{node_key}/writer"), router) as session:
+        yield session.connect_to_remote(node_key)
+
+def test_handler_must_be_for_a_writable_group():
+    config = gedge.NodeConfig.from_json5_str(CONFIG % "test/gedge/group")
+    with pytest.raises(LookupError):
+        config.add_group_write_handler("readonly", lambda q: q.reply_ok(210))
+    with pytest.raises(LookupError):
+        config.add_group_write_handler("nope", lambda q: q.reply_ok(210))
+
+def test_writable_group_is_in_meta(remote):
+    responses, _ = remote.tag_config.all_writable_groups()["axis"]
+    assert [r.code for r in responses] == [210, 410]
+    assert "readonly" not in remote.tag_config.all_writable_groups()
+
+def test_one_query_for_the_whole_group(written, remote):
+    reply = remote.write_group({"x": 1.5, "y": 2.5, "z": 3})
+    assert reply.code == 210 and reply.type == gedge.ResponseType.OK
+    assert reply.body == {"n": 3}
+    assert written == [{"x": 1.5, "y": 2.5, "z": 3}]
+
+def test_part_of_a_group(written, remote):
+    reply = remote.write_group({"z": 1000})
+    assert reply.code == 410 and reply.type == gedge.ResponseType.ERR
+    assert written == [{"z": 1000}]
+
+def test_members_of_several_groups(written, remote):
+    with pytest.raises(ValueError):
+        remote.write_group({"x": 1.0, "r": 2})
+    assert written == []
+
+def test_group_not_writable(written, remote):
+    with pytest.raises(LookupError):
+        remote.write_group({"r": 2})
+    assert written == []
+
+def test_callee_checks_membership(written, remote):
+    # a remote with a stale config that thinks r is in the group, the callee refuses it without calling the handler
+    remote.tag_config.get_entry("r").tag.group_config["r"] = "axis"
+    reply = remote.write_group({"r": 2})
+    assert reply.code == gedge.CALLBACK_ERR
+    assert written == []
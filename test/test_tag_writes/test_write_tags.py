@@ -0,0 +1,78 @@
+import threading
+import time
+
+import gedge
+import pytest
+
+CONFIG = '''
+{
+    key: "%s",
+    tags: [
+        { path: "a", base_type: "int", writable: true, responses: [ { code: 200, type: "ok" }, { code: 400, type: "err" } ] },
+        { path: "b", base_type: "int", writable: true, responses: [ { code: 201, type: "ok" } ] },
+        { path: "c", base_type: "int" },
+    ],
+}
+'''
+
+DELAY = 0.3
+
+class Writee:
+    '''
+    Write handlers that take DELAY seconds each and record the order they were called in
+    '''
+    def __init__(self):
+        self.order = []
+        self._lock = threading.Lock()
+
+    def handler(self, path: str, code: int):
+        def _handler(query: gedge.TagWriteQuery):
+            with self._lock:
+                self.order.append((path, query.value))
+            time.sleep(DELAY)
+            if query.value > 10:
+                query.reply_err(400)
+            query.reply_ok(code)
+        return _handler
+
+@pytest.fixture
+def writee(router, node_key):
+    w = Writee()
+    config = gedge.NodeConfig.from_json5_str(CONFIG % node_key)
+    config.add_tag_write_handler("a", w.handler("a", 200))
+    config.add_tag_write_handler("b", w.handler("b", 201))
+    with gedge.connect(config, router):
+        yield w
+
+@pytest.fixture
+def remote(writee, router, node_key):
+    with gedge.connect(gedge.NodeConfig(f"{node_key}/writer"), router) as session:
+        yield session.connect_to_remote(node_key)
+
+def test_writes_are_in_flight_together(writee, remote):
+    start = time.monotonic()
+    replies = remote.write_tags({"a": 3, "b": 4})
+    elapsed = time.monotonic() - start
+    assert {path: r.code for path, r in replies.items()} == {"a": 200, "b": 201}
+    assert elapsed < 2 * DELAY
+
+def test_ordered(writee, remote):
+    start = time.monotonic()
+    replies = remote.write_tags({"b": 4, "a": 30}, ordered=True)
+    elapsed = time.monotonic() - start
+    assert replies["a"].code == 400 and replies["a"].type == gedge.ResponseType.ERR
+    assert replies["b"].code == 201
+    assert writee.order == [("b", 4), ("a", 30)]
+    assert elapsed >= 2 * DELAY
+
+def test_timeout(writee, remote):
+    replies = remote.write_tags({"a": 3, "b": 4}, timeout=DELAY * 1000 / 3)
+    assert set(replies) == {"a", "b"}
+    assert all(isinstance(r, TimeoutError) for r in replies.values())
+
+def test_not_writable(writee, remote):
+    with pytest.raises(LookupError):
+        remote.write_tags({"a": 1, "c": 1})
+    # nothing was written
+    time.sleep(DELAY)
+    assert writee.order == []
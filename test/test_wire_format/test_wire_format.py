@@ -0,0 +1,100 @@
+import queue
+import time
+
+import gedge
+import pytest
+
+from gedge.comm.wire_format import WireFormat
+from gedge.py_proto.base_data import BaseData
+from gedge.py_proto.base_type import BaseType
+from gedge.py_proto.tag_config import Tag
+
+CONFIG = '''
+{
+    key: "%s",
+    wire_format: "%s",
+    tags: [
+        { path: "a", base_type: "int" },
+        { path: "g/x", base_type: "int" },
+        { path: "g/y", base_type: "string" },
+    ],
+    group_config: [ { group_path: "g", tag_paths: ["g/x", "g/y"] } ],
+    methods: [
+        {
+            path: "echo",
+            params: [ { path: "x", base_type: "int" } ],
+            responses: [ { code: 200, type: "ok", body: [ { path: "x", base_type: "int" } ] } ],
+        },
+    ],
+}
+'''
+
+FORMATS = [WireFormat.BASE64, WireFormat.RAW]
+
+def config(key: str, wire_format: WireFormat) -> gedge.NodeConfig:
+    c = gedge.NodeConfig.from_json5_str(CONFIG % (key, wire_format.to_json5()))
+    c.add_method_handler("echo", lambda query: query.reply_ok(200, {"x": query.params["x"]}))
+    return c
+
+class Received:
+    '''
+    What the tag and group callbacks of a remote connection got
+    '''
+    def __init__(self, remote):
+        self.tags, self.groups, self.members = queue.Queue(), queue.Queue(), queue.Queue()
+        remote.add_tag_data_callback("a", lambda key_expr, value: self.tags.put(value))
+        remote.add_tag_group_callback("g", lambda key_expr, value: self.groups.put(value))
+        remote.add_tag_data_callback("g/y", lambda key_expr, value: self.members.put(value))
+
+def round_trip(node, remote, received: Received):
+    assert remote.meta.wire_format == node.config.wire_format
+    node.update_tag("a", 7)
+    assert received.tags.get(timeout=2) == 7
+    node.update_group({"g/x": 1, "g/y": "one"})
+    assert received.groups.get(timeout=2) == {"g/x": 1, "g/y": "one"}
+    assert received.members.get(timeout=2) == "one"
+    responses = list(remote.call_method_iter("echo", 2000, x=5))
+    assert [(r.code, r.body) for r in responses] == [(200, {"x": 5})]
+
+@pytest.mark.parametrize("wire_format", FORMATS, ids=lambda w: w.value)
+def test_round_trip(wire_format, router, node_key):
+    c = config(node_key, wire_format)
+    # MockComm has no queryables, so tag writes are only covered over zenoh
+    c.tag_config["w"] = Tag.from_json5({"path": "w", "base_type": "int", "writable": True, "responses": [{"code": 200, "type": "ok"}]})
+    c.add_tag_write_handler("w", lambda query: query.reply_ok(200))
+    with gedge.connect(c, router) as node, \
+            gedge.connect(gedge.NodeConfig(f"{node_key}/caller"), router) as caller:
+        remote = caller.connect_to_remote(node_key)
+        received = Received(remote)
+        # give the router a moment to propagate the new subscribers
+        time.sleep(0.3)
+        round_trip(node, remote, received)
+        assert remote.write_tag("w", 3).code == 200
+
+@pytest.mark.parametrize("wire_format", FORMATS, ids=lambda w: w.value)
+def test_payload_layout(wire_format, router, node_key):
+    with gedge.connect(config(node_key, wire_format), router) as node, \
+            gedge.connect(gedge.NodeConfig(f"{node_key}/caller"), router) as caller:
+        payloads = queue.Queue()
+        caller._comm.session.declare_subscriber(node.ks.tag_data_path("a"), lambda sample: payloads.put(sample.payload.to_bytes()))
+        time.sleep(0.3)
+        node.update_tag("a", 7)
+        expected = BaseData.from_value(7, BaseType.INT).to_proto().SerializeToString()
+        assert payloads.get(timeout=2) == wire_format.encode(expected)
+
+@pytest.mark.parametrize("wire_format", FORMATS, ids=lambda w: w.value)
+def test_mock_round_trip(wire_format, node_key):
+    with gedge.mock_connect(config(node_key, wire_format)) as node:
+        remote = node.connect_to_remote(node_key)
+        round_trip(node, remote, Received(remote))
+
+def test_mock_decodes_with_the_advertised_format(node_key):
+    with gedge.mock_connect(config(node_key, WireFormat.RAW)) as node:
+        remote = node.connect_to_remote(node_key)
+        received = Received(remote)
+        # sent as base64 to a subscriber that expects raw, which cannot read it
+        node._comm.publish(None, node.ks.tag_data_path("a"), BaseData.from_value(7, BaseType.INT).to_proto(), WireFormat.BASE64)
+        with pytest.raises(queue.Empty):
+            received.tags.get(timeout=0.3)
+        node.update_tag("a", 8)
+        assert received.tags.get(timeout=2) == 8